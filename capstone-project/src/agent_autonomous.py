@@ -1,104 +1,223 @@
 """Agent Host - Orchestrates multi-agent workflows with autonomous decision-making"""
 
 import os
+import time
 import asyncio
+import argparse
+from contextlib import aclosing
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from uuid import uuid4
 import json
 
 import httpx
-from langchain_google_genai import ChatGoogleGenerativeAI
 
-from a2a.client import A2ACardResolver, A2AClient
-from a2a.types import MessageSendParams, SendMessageRequest
+from a2a.client import A2AClient
+from a2a.types import JSONRPCErrorResponse, MessageSendParams, SendMessageRequest
+
+from conditions import ConditionEngine
+from agent_registry import CARD_CACHE_TTL, CARD_FETCH_TIMEOUT, AgentCardCache, load_agent_endpoints
+from lazy_loading import preload
+from load_balancer import ReplicaPool
+from metrics import metrics
+from model_router import ModelRouter
+from plan_cache import PlanCache
+from plan_parser import PlanError, PlanParser
+from resilience import CircuitOpenError, hedge_delay, hedged
+from rule_engine import RuleEngine
+from skill_index import SkillIndex
+from structured_results import compact_json, facts_from_data
+from workflow_journal import WorkflowJournal, idempotency_key, step_hash
+from deadlines import Deadline, PLANNING_TIMEOUT, STEP_TIMEOUT, WORKFLOW_TIMEOUT, run_with_deadline
+
+
+# Agents whose steps are read-only and may be hedged to a second replica
+HEDGE_READ_AGENTS = {a.strip() for a in os.environ.get("HEDGE_READ_AGENTS", "").split(",") if a.strip()}
+
+
+class WorkflowContext:
+    """Per-request workflow state, so concurrent requests never share history"""
+    
+    def __init__(self, user_input: str, request_id: Optional[str] = None,
+                 timeout: float = WORKFLOW_TIMEOUT, incident_key: Optional[str] = None):
+        self.request_id = request_id or uuid4().hex
+        self.user_input = user_input
+        self.incident_key = incident_key  # Set by the service; journaled so resumes stay with its owner
+        self.deadline = Deadline(timeout)  # Planning and every step draw from it
+        self.workflow: List[Dict[str, Any]] = []
+        self.history: List[Dict[str, Any]] = []  # Track workflow steps
+        self.started_at = time.time()
 
 
 class AgentHost:
     """Host that orchestrates multi-agent workflows with autonomous decision-making"""
     
     def __init__(self):
-        self.model = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash-lite",
-            api_key=os.environ.get("GEMINI_API_KEY"),
+        # Classification and planning start on the cheap tier; invalid output escalates
+        self.models = ModelRouter(
             temperature=0.1,  # Lower temperature for more deterministic, concise responses
             max_output_tokens=256  # Limit output tokens for efficiency
         )
         
-        # Agent endpoints
-        self.agents = {
-            "ticketing": "http://localhost:5001",  # Ticketing agent port
-            "kubernetes": "http://localhost:8889"  # Kubernetes agent port
-        }
+        # Agent endpoints (AGENT_REGISTRY file/env, defaults to the local ports); each agent
+        # name maps to a pool of replicas
+        self.agents = load_agent_endpoints()
+        self.pools = {name: ReplicaPool(name, urls) for name, urls in self.agents.items()}
         
         self.httpx_client = None
-        self.clients = {}
+        self.clients = {}  # agent name -> {replica url: A2AClient}
         self.agent_cards = {}  # Store agent cards separately
-        self.conversation_history = []  # Track workflow steps
-        self.agent_info_cache = None  # Cache agent info to avoid rebuilding
+        self.card_cache = AgentCardCache()
+        self.card_refresh_task = None
+        self.skill_index = SkillIndex()  # Skill terms -> agents, for top-k routing
+        self.rules = RuleEngine.from_file()  # Deterministic fast path before the LLM planner
+        self.conditions = ConditionEngine()  # Compiled step conditions
+        self.journal = WorkflowJournal.from_env()  # Plans and step results, for resuming after a crash
+        self.plan_cache = PlanCache.from_env()  # LLM plans, shared with other orchestrator processes
+        self.recorder = None  # TrafficRecorder when TRAFFIC_TRACE is set
     
     async def __aenter__(self):
-        self.httpx_client = httpx.AsyncClient()
+        # The Gemini client import is slow; load it while the agent cards are fetched
+        preload("langchain_google_genai")
         
-        # Initialize clients for each agent
-        for agent_name, base_url in self.agents.items():
-            try:
-                resolver = A2ACardResolver(
-                    httpx_client=self.httpx_client,
-                    base_url=base_url
-                )
-                agent_card = await resolver.get_agent_card()
-                self.agent_cards[agent_name] = agent_card  # Store card separately
-                self.clients[agent_name] = A2AClient(
-                    httpx_client=self.httpx_client,
-                    agent_card=agent_card
-                )
-                print(f"✓ Connected to {agent_name} agent at {base_url}")
-            except Exception as e:
-                print(f"✗ Failed to connect to {agent_name} agent: {e}")
+        # Size the shared connection pool for every replica's in-flight limit
+        max_connections = sum(
+            replica.max_in_flight for pool in self.pools.values() for replica in pool.replicas
+        )
+        self.httpx_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        
+        # Start from cached cards so a restart needs no network round trips
+        for agent_name, urls in self.agents.items():
+            agent_card = self.card_cache.get(agent_name, urls)
+            if agent_card:
+                self._register_agent(agent_name, agent_card)
+                print(f"✓ Loaded {agent_name} agent card from cache ({len(urls)} replica(s))")
         
+        # Fetch missing cards concurrently; unreachable agents are resolved lazily later
+        missing = [name for name in self.agents if name not in self.clients]
+        if missing:
+            await asyncio.gather(*(self._resolve_agent(name) for name in missing))
+        
+        self.card_refresh_task = asyncio.create_task(self._refresh_agent_cards())
+        
+        # TRAFFIC_TRACE records every workflow with its model and agent replies for replay
+        if os.environ.get("TRAFFIC_TRACE"):
+            from traffic_replay import TrafficRecorder
+            self.recorder = TrafficRecorder(os.environ["TRAFFIC_TRACE"]).attach(self)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.recorder:
+            self.recorder.close()
+        if self.card_refresh_task:
+            self.card_refresh_task.cancel()
         if self.httpx_client:
             await self.httpx_client.aclose()
     
-    async def _classify_request(self, user_input: str) -> str:
+    def _register_agent(self, agent_name: str, agent_card: Any):
+        """Create (or replace) the A2A clients of every replica for an agent card"""
+        if self.agent_cards.get(agent_name) == agent_card:
+            return
+        self.agent_cards[agent_name] = agent_card  # Store card separately
+        self.clients[agent_name] = {
+            url: A2AClient(httpx_client=self.httpx_client, agent_card=agent_card, url=url)
+            for url in self.pools[agent_name].urls
+        }
+        self.skill_index.update(agent_name, agent_card)  # Only this agent's postings change
+    
+    async def _resolve_agent(self, agent_name: str) -> bool:
+        """Fetch an agent card from the first replica that answers and register the agent"""
+        errors = []
+        for replica in self.pools[agent_name].ordered():
+            try:
+                agent_card = await self.card_cache.fetch(
+                    self.httpx_client, agent_name, replica.url, timeout=CARD_FETCH_TIMEOUT
+                )
+                self._register_agent(agent_name, agent_card)
+                print(f"✓ Connected to {agent_name} agent at {replica.url}")
+                return True
+            except Exception as e:
+                errors.append(f"{replica.url}: {e!r}")
+        print(f"✗ Failed to connect to {agent_name} agent: {'; '.join(errors)}")
+        return False
+    
+    async def _refresh_agent_cards(self):
+        """Revalidate stale cards in the background"""
+        interval = max(CARD_CACHE_TTL / 2, 1.0)
+        # Cards served from a stale cache are revalidated right away, the rest on the interval
+        stale = [name for name in self.clients if not self.card_cache.is_fresh(name)]
+        while True:
+            if stale:
+                await asyncio.gather(*(self._resolve_agent(name) for name in stale))
+            await asyncio.sleep(interval)
+            stale = []
+            for name, urls in self.agents.items():
+                if not self.card_cache.is_fresh(name):
+                    stale.append(name)
+                    continue
+                # Another orchestrator process may have refreshed the shared cache file
+                agent_card = self.card_cache.get(name, urls)
+                if agent_card:
+                    self._register_agent(name, agent_card)
+    
+    async def _classify_request(self, user_input: str, deadline: Optional[Deadline] = None) -> str:
         """Use LLM to classify user request and select appropriate agent"""
         
-        # Build cached agent information
-        if not self.agent_info_cache:
-            agent_info = []
-            for agent_name in self.clients.keys():
-                agent_card = self.agent_cards[agent_name]
-                # Only include agent name and primary description
-                agent_info.append(f"{agent_name}: {agent_card.description}")
-            self.agent_info_cache = "\n".join(agent_info)
+        deadline = deadline or Deadline(PLANNING_TIMEOUT)
         
+        # A request only one agent's skills match needs no LLM call
+        matches = self.skill_index.search(user_input)
+        if len(matches) == 1:
+            metrics.inc("classifications", source="index")
+            return matches[0][0]
+        metrics.inc("classifications", source="llm")
+        
+        # Only the top-k candidates go into the prompt, however many agents are registered
+        candidates = [name for name, _ in matches] or self.skill_index.candidates(user_input)
         prompt = f"""Request: "{user_input}"
-Agents: {self.agent_info_cache}
-Reply: agent name only (ticketing/kubernetes)"""
+Agents: {self.skill_index.describe(candidates)}
+Reply: agent name only ({'/'.join(candidates)})"""
         
-        try:
-            response = await self.model.ainvoke(prompt)
+        def agent_name(response):
             selected_agent = response.content.strip().lower()
-            return selected_agent if selected_agent in self.clients else "ticketing"
+            if selected_agent not in self.clients:
+                raise ValueError(f"unknown agent {selected_agent!r}")
+            return selected_agent
+        
+        try:
+            return await self.models.ainvoke(prompt, "classification", deadline, PLANNING_TIMEOUT, agent_name)
         except Exception:
             return "ticketing"  # Fallback
     
-    async def _plan_workflow(self, user_input: str) -> List[Dict[str, Any]]:
-        """Use LLM to create a multi-step workflow plan"""
-        
-        # Build minimal agent information
-        if not self.agent_info_cache:
-            agent_info = []
-            for agent_name in self.clients.keys():
-                agent_card = self.agent_cards[agent_name]
-                agent_info.append(f"{agent_name}: {agent_card.description}")
-            self.agent_info_cache = "\n".join(agent_info)
-        
+    async def _plan_workflow(self, user_input: str, deadline: Optional[Deadline] = None,
+                             on_step: Optional[Callable[[Dict[str, Any]], Any]] = None) -> List[Dict[str, Any]]:
+        """Use LLM to create a multi-step workflow plan
+
+        The reply is streamed and parsed incrementally: ``on_step`` gets each
+        validated step as soon as it is complete, so execution can start early.
+        """
+        
+        deadline = deadline or Deadline(PLANNING_TIMEOUT)
+        
+        # Known patterns are planned by rules; the LLM is only the fallback
+        fast_path = self.rules.match(user_input)
+        if fast_path and all(step["agent"] in self.agents for step in fast_path["workflow"]):
+            print(f"⚡ Planned by rule: {fast_path['rule']}")
+            metrics.inc("plans", source="rules")
+            return fast_path["workflow"]
+        
+        # A plan any orchestrator process made for the same request is reused
+        cached = self.plan_cache.get(user_input, self.agents) if self.plan_cache else None
+        if cached and all(step["agent"] in self.agents for step in cached):
+            metrics.inc("plans", source="cache")
+            return cached
+        metrics.inc("plans", source="llm")
+        
+        # Minimal agent information: the top-k candidates for this request
         prompt = f"""Request: "{user_input}"
-Agents: {self.agent_info_cache}
+Agents: {self.skill_index.describe(self.skill_index.candidates(user_input))}
 
 Create JSON workflow. Rules:
 1. Multi-step if request has multiple actions
@@ -108,82 +227,75 @@ Create JSON workflow. Rules:
 Format: [{{"agent":"name","action":"text","condition":null}}]
 Reply: JSON only"""
         
+        parser = None
+        
+        async def stream(model):
+            nonlocal parser
+            parser = PlanParser(self.agents, on_step)
+            message = None
+            async for chunk in model.astream(prompt):
+                message = chunk if message is None else message + chunk
+                parser.feed(chunk.text)
+            parser.close()
+            return message
+        
+        def planned(message):
+            if not parser.steps:
+                raise PlanError("; ".join(parser.errors) or "no workflow steps in the reply")
+            return parser.steps
+        
         try:
-            response = await self.model.ainvoke(prompt)
-            content = response.content.strip()
-            
-            # Extract JSON from response
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            workflow = json.loads(content)
-            
-            # Validate workflow has multiple steps if request mentions multiple actions
-            if isinstance(workflow, list) and len(workflow) > 0:
-                return workflow
-            
-            raise ValueError("Invalid workflow")
-            
+            workflow = await self.models.run(
+                "planning", lambda model: run_with_deadline(stream(model), deadline, PLANNING_TIMEOUT), planned
+            )
         except Exception as e:
-            print(f"⚠️  Error planning workflow: {e}, using fallback")
+            if parser and parser.steps:
+                # Steps already handed out (e.g. the budget ran out mid-stream) are the plan
+                return parser.steps
+            print(f"⚠️  Error planning workflow: {e!r}, using fallback")
             
             # Intelligent fallback using agent skills and capabilities
-            return await self._create_fallback_workflow(user_input)
+            return await self._create_fallback_workflow(user_input, deadline)
+        if self.plan_cache:
+            self.plan_cache.put(user_input, self.agents, workflow)
+        return workflow
     
-    async def _create_fallback_workflow(self, user_input: str) -> List[Dict[str, Any]]:
+    async def _create_fallback_workflow(self, user_input: str, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """Create fallback workflow using agent skills and cards"""
         
-        # Analyze which agents are relevant based on their skills
-        relevant_agents = []
-        
-        for agent_name in self.clients.keys():
-            agent_card = self.agent_cards[agent_name]
-            
-            # Check if any skill tags or descriptions match the request
-            for skill in agent_card.skills:
-                skill_text = f"{skill.name} {skill.description} {' '.join(skill.tags)}".lower()
-                
-                # Simple relevance check
-                if any(word in user_input.lower() for word in skill_text.split()):
-                    relevant_agents.append({
-                        'name': agent_name,
-                        'card': agent_card,
-                        'matching_skills': [skill for skill in agent_card.skills]
-                    })
-                    break
+        # Agents whose skill names, descriptions, tags or examples match the request
+        relevant_agents = [name for name, _ in self.skill_index.search(user_input)]
         
         # If multiple agents are relevant, create multi-step workflow
         if len(relevant_agents) >= 2:
             # Prioritize kubernetes first (data gathering), then ticketing (action)
             workflow = []
             
-            for agent_info in relevant_agents:
-                if agent_info['name'] == 'kubernetes':
+            for agent_name in relevant_agents:
+                if agent_name == 'kubernetes':
                     workflow.insert(0, {
                         "agent": "kubernetes",
                         "action": f"Execute this request: {user_input}",
                         "condition": None
                     })
-                elif agent_info['name'] == 'ticketing':
+                elif agent_name == 'ticketing':
                     workflow.append({
                         "agent": "ticketing",
                         "action": "Create a ticket with the information from the previous step",
                         "condition": "if issues or errors found"
                     })
             
-            return workflow if workflow else await self._single_agent_fallback(user_input)
+            return workflow if workflow else await self._single_agent_fallback(user_input, deadline)
         
         # Single agent fallback
-        return await self._single_agent_fallback(user_input)
+        return await self._single_agent_fallback(user_input, deadline)
     
-    async def _single_agent_fallback(self, user_input: str) -> List[Dict[str, Any]]:
+    async def _single_agent_fallback(self, user_input: str, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """Fallback to single agent using classification"""
-        agent = await self._classify_request(user_input)
+        agent = await self._classify_request(user_input, deadline)
         return [{"agent": agent, "action": user_input, "condition": None}]
     
-    async def _should_execute_step(self, step: Dict[str, Any], previous_results: List[str]) -> bool:
+    async def _should_execute_step(self, step: Dict[str, Any], previous_results: List[Any]) -> bool:
         """Determine if a step should be executed based on conditions and previous results"""
         
         condition = step.get("condition")
@@ -193,25 +305,48 @@ Reply: JSON only"""
         if not previous_results:
             return True
         
-        # Simple keyword-based condition evaluation to avoid LLM call
-        last_result = previous_results[-1].lower()
-        condition_lower = condition.lower()
-        
-        # Check for common condition patterns
-        if "error" in condition_lower or "fail" in condition_lower:
-            return "error" in last_result or "fail" in last_result
-        
-        if "issue" in condition_lower or "problem" in condition_lower:
-            return "error" in last_result or "fail" in last_result or "issue" in last_result
-        
-        # Default to executing the step
-        return True
+        # Compiled condition over the last step's facts: exact when the agent sent structured
+        # data, extracted from its text otherwise (no LLM call either way). Batched with the
+        # checks of the other workflows the service is running on this host
+        return await self.conditions.decide(condition, previous_results[-1])
+    
+    def _is_idempotent(self, step: Dict[str, Any]) -> bool:
+        """Read steps can be hedged; plans may mark this explicitly with an "idempotent" key"""
+        return bool(step.get("idempotent", step["agent"] in HEDGE_READ_AGENTS))
     
-    async def _call_agent(self, agent_type: str, action: str, context: str = "") -> str:
-        """Call a specific agent with an action and optional context from previous steps"""
+    async def _send_to_replica(self, agent_type: str, request: SendMessageRequest,
+                               step_deadline: Deadline, attempted: List[str]) -> Any:
+        """Send one request to a replica chosen by the pool, skipping replicas already tried"""
+        async with self.pools[agent_type].acquire(exclude=attempted) as replica:
+            attempted.append(replica.url)
+            started = time.monotonic()
+            response = await run_with_deadline(
+                self.clients[agent_type][replica.url].send_message(
+                    request, http_kwargs={'timeout': step_deadline.budget()}
+                ),
+                step_deadline,
+            )
+            if isinstance(response.root, JSONRPCErrorResponse):
+                raise RuntimeError(response.root.error.message)
+            metrics.observe("agent_call_seconds", time.monotonic() - started, agent=agent_type)
+            return response
+    
+    async def _call_agent(self, agent_type: str, action: str, context: str = "",
+                          deadline: Optional[Deadline] = None,
+                          idempotent: bool = False,
+                          idempotency_key: Optional[str] = None) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Call a specific agent with an action and optional context from previous steps.
+
+        Returns the agent's text reply and its structured payload (None if it sent none).
+        ``idempotency_key`` lets a mutating agent recognise a retry of the same step.
+        """
+        
+        # Agents that were down at startup get another chance on first use
+        if agent_type not in self.clients and agent_type in self.agents:
+            await self._resolve_agent(agent_type)
         
         if agent_type not in self.clients:
-            return f"Error: {agent_type} agent is not available"
+            return f"Error: {agent_type} agent is not available", None
         
         # Inject context from previous results if available
         full_action = action
@@ -220,6 +355,9 @@ Reply: JSON only"""
         elif context:
             full_action = f"{action}\n\nContext from previous step:\n{context}"
         
+        # Per-step budget, never beyond the workflow deadline
+        step_deadline = (deadline or Deadline(STEP_TIMEOUT)).child(STEP_TIMEOUT)
+        
         try:
             message_payload = {
                 'message': {
@@ -227,75 +365,195 @@ Reply: JSON only"""
                     'parts': [{'kind': 'text', 'text': full_action}],
                     'message_id': uuid4().hex,
                 },
+                'metadata': step_deadline.to_metadata(),
             }
+            if idempotency_key:
+                message_payload['metadata']['idempotency_key'] = idempotency_key
             
             request = SendMessageRequest(
                 id=str(uuid4()),
                 params=MessageSendParams(**message_payload)
             )
             
-            response = await self.clients[agent_type].send_message(request)
+            # Pick a replica; failures feed the pool's health tracking and circuit breakers.
+            # Read steps race a backup replica once the call outlives the recent p95.
+            attempted = []
+            send = lambda: self._send_to_replica(agent_type, request, step_deadline, attempted)
+            backup = send if idempotent and len(self.pools[agent_type].replicas) > 1 else None
+            response = await hedged(send, backup, hedge_delay("agent_call_seconds", agent=agent_type), agent_type)
+            metrics.inc("agent_calls", agent=agent_type, outcome="ok")
             return self._parse_agent_response(response, agent_type)
             
+        except CircuitOpenError as e:
+            metrics.inc("agent_calls", agent=agent_type, outcome="circuit_open")
+            return f"Error: {agent_type} agent is unavailable ({e})", None
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            metrics.inc("agent_calls", agent=agent_type, outcome="timeout")
+            return f"Error: {agent_type} agent did not respond within the step deadline", None
         except Exception as e:
-            return f"Error communicating with {agent_type} agent: {str(e)}"
+            metrics.inc("agent_calls", agent=agent_type, outcome="error")
+            return f"Error communicating with {agent_type} agent: {str(e)}", None
     
-    def _parse_agent_response(self, response: Any, agent_type: str) -> str:
-        """Parse response from A2A agent"""
+    def _parse_agent_response(self, response: Any, agent_type: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Parse response from A2A agent into its text and DataPart payload"""
         try:
-            return response.root.result.parts[0].root.text
+            text, data = "", None
+            for part in response.root.result.parts:
+                if part.root.kind == "text":
+                    text = text or part.root.text
+                elif part.root.kind == "data":
+                    data = part.root.data
+            return text, data
         except Exception as e:
-            return f"Error parsing response from {agent_type} agent: {str(e)}"
+            return f"Error parsing response from {agent_type} agent: {str(e)}", None
     
-    async def process_request(self, user_input: str) -> str:
+    async def resume_incomplete(self) -> List[Tuple[str, str]]:
+        """Finish workflows an earlier process was running when it died; (request id, response) each"""
+        if not self.journal:
+            return []
+        resumed = []
+        for request_id, user_input, incident_key in self.journal.incomplete():
+            print(f"\n♻️  Resuming interrupted workflow {request_id}")
+            ctx = WorkflowContext(user_input, request_id, incident_key=incident_key)
+            response = await self.process_request(user_input, ctx)
+            resumed.append((request_id, response))
+        return resumed
+    
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """Call metrics plus per-replica balancing, circuit state and model tiers"""
+        snapshot = metrics.snapshot()
+        snapshot["models"] = self.models.stats()
+        snapshot["replicas"] = {name: pool.stats() for name, pool in self.pools.items()}
+        return snapshot
+    
+    async def _planned_steps(self, user_input: str, deadline: Deadline,
+                             recorded: Optional[List[Dict[str, Any]]] = None,
+                             on_plan: Optional[Callable[[List[Dict[str, Any]]], Any]] = None
+                             ) -> AsyncIterator[Dict[str, Any]]:
+        """Workflow steps as soon as the planner has produced them, while it keeps streaming the rest
+
+        ``on_plan`` gets the complete plan once planning has finished.
+        """
+        if recorded:
+            # A resumed workflow follows the plan it was started with
+            for step in recorded:
+                yield step
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        planner = asyncio.ensure_future(self._plan_workflow(user_input, deadline, on_step=queue.put_nowait))
+        streamed = 0
+        try:
+            while True:
+                if queue.empty():
+                    if planner.done():
+                        break
+                    getter = asyncio.ensure_future(queue.get())
+                    await asyncio.wait({getter, planner}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    step = getter.result()
+                else:
+                    step = queue.get_nowait()
+                streamed += 1
+                yield step
+            workflow = planner.result()
+            if on_plan and workflow:
+                on_plan(workflow)
+            # Rule and fallback plans arrive in one piece
+            for step in workflow[streamed:]:
+                yield step
+        finally:
+            if not planner.done():
+                planner.cancel()
+    
+    async def process_request(self, user_input: str, ctx: Optional[WorkflowContext] = None) -> str:
         """Process user request with autonomous multi-agent orchestration"""
         
-        print(f"\n🤔 Planning workflow for: {user_input}")
+        # All per-request state lives in the context; the host itself is shared
+        ctx = ctx or WorkflowContext(user_input)
+        deadline = ctx.deadline
         
-        # Create workflow plan
-        workflow = await self._plan_workflow(user_input)
-        
-        if not workflow:
-            return "Error: Could not create workflow plan"
+        print(f"\n🤔 Planning workflow for: {user_input}")
         
-        print(f"📋 Workflow plan: {len(workflow)} step(s)")
-        for i, step in enumerate(workflow, 1):
-            print(f"  {i}. [{step['agent']}] {step['action'][:80]}{'...' if len(step['action']) > 80 else ''}")
-            if step.get('condition'):
-                print(f"     ⚡ Condition: {step['condition']}")
+        # Steps an earlier, interrupted run of this request already completed are not repeated
+        journal = self.journal.begin(ctx.request_id, user_input, ctx.incident_key) if self.journal else None
+        if journal and journal.results:
+            print(f"♻️  Resuming {ctx.request_id}: {len(journal.results)} step result(s) in the journal")
         
-        # Execute workflow
+        # Execute workflow steps as the planner produces them
         results = []
-        self.conversation_history = []
+        outcomes = []  # What conditions are evaluated against: StepFacts or result text
         context = ""  # Accumulate context for next steps
+        status = "done"
+        
+        record_plan = (lambda workflow: self.journal.record_plan(ctx.request_id, workflow)) if journal else None
+        planned = self._planned_steps(user_input, deadline, journal and journal.plan, record_plan)
+        async with aclosing(planned) as steps:
+            async for step in steps:
+                ctx.workflow.append(step)
+                i = len(ctx.workflow)
+                print(f"📋 Planned step {i}: [{step['agent']}] {step['action'][:80]}{'...' if len(step['action']) > 80 else ''}")
+                if step.get('condition'):
+                    print(f"     ⚡ Condition: {step['condition']}")
+                
+                if deadline.expired():
+                    print("\n⏱️  Workflow deadline reached, skipping the remaining steps")
+                    status = "deadline"
+                    break
+                
+                # Check if step should be executed
+                should_execute = await self._should_execute_step(step, outcomes)
+                
+                if not should_execute:
+                    print(f"\n⏭️  Step {i}: Skipped (condition not met)")
+                    continue
+                
+                input_hash = step_hash(step['agent'], step['action'], context)
+                if journal and input_hash in journal.results:
+                    print(f"\n♻️  Step {i}: Reusing the journaled {step['agent']} result")
+                    metrics.inc("journal_reused_steps", agent=step['agent'])
+                    result, data = journal.results[input_hash]
+                else:
+                    print(f"\n🔄 Step {i}: Calling {step['agent']} agent...")
+                    
+                    # Mutating steps carry a key so a retry after a crash can't act twice
+                    idempotent = self._is_idempotent(step)
+                    key = None if idempotent else idempotency_key(ctx.request_id, input_hash)
+                    if journal:
+                        self.journal.step_started(ctx.request_id, i, input_hash, step['agent'], key)
+                    
+                    # Execute step with context from previous results
+                    result, data = await self._call_agent(
+                        step['agent'], step['action'], context, deadline, idempotent=idempotent,
+                        idempotency_key=key
+                    )
+                    # Failures are not memoized, so a resumed run tries them again
+                    if journal and not result.startswith("Error"):
+                        self.journal.step_done(ctx.request_id, i, input_hash, result, data)
+                results.append(result)
+                outcomes.append(facts_from_data(data) or result)
+                
+                # Update context for next step: the compact payload when there is one, not the prose
+                context = compact_json(data) if data else result
+                
+                ctx.history.append({
+                    'step': i,
+                    'agent': step['agent'],
+                    'action': step['action'],
+                    'result': result,
+                    'data': data
+                })
+                
+                # Show truncated result
+                result_preview = result[:300] + '...' if len(result) > 300 else result
+                print(f"✓ Result: {result_preview}")
         
-        for i, step in enumerate(workflow, 1):
-            # Check if step should be executed
-            should_execute = await self._should_execute_step(step, results)
-            
-            if not should_execute:
-                print(f"\n⏭️  Step {i}: Skipped (condition not met)")
-                continue
-            
-            print(f"\n🔄 Step {i}: Calling {step['agent']} agent...")
-            
-            # Execute step with context from previous results
-            result = await self._call_agent(step['agent'], step['action'], context)
-            results.append(result)
-            
-            # Update context for next step
-            context = result
-            
-            self.conversation_history.append({
-                'step': i,
-                'agent': step['agent'],
-                'action': step['action'],
-                'result': result
-            })
-            
-            # Show truncated result
-            result_preview = result[:300] + '...' if len(result) > 300 else result
-            print(f"✓ Result: {result_preview}")
+        if journal:
+            self.journal.finish(ctx.request_id, status if ctx.workflow else "no_plan")
+        
+        if not ctx.workflow:
+            return "Error: Could not create workflow plan"
         
         # Synthesize final response
         if len(results) == 1:
@@ -304,7 +562,7 @@ Reply: JSON only"""
         # Simple concatenation instead of LLM summarization to save tokens
         summary_parts = []
         for i, result in enumerate(results):
-            agent_name = self.conversation_history[i]['agent']
+            agent_name = ctx.history[i]['agent']
             summary_parts.append(f"[{agent_name}] {result[:200]}")
         
         return "\n\n".join(summary_parts)
@@ -314,14 +572,38 @@ async def main():
     """Interactive agent host with multi-agent orchestration"""
     logging.basicConfig(level=logging.INFO)
     
+    parser = argparse.ArgumentParser(description="Autonomous multi-agent orchestrator")
+    parser.add_argument("--serve", action="store_true",
+                        help="run as an HTTP service handling many requests concurrently")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("ORCHESTRATOR_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=None, help="concurrent workflows in service mode")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="orchestrator processes in service mode, partitioned by incident (ORCHESTRATOR_PROCESSES)")
+    parser.add_argument("--alerts-file", help="NDJSON file of alerts to ingest in service mode")
+    args = parser.parse_args()
+    
+    if args.serve:
+        from orchestrator_cluster import ORCHESTRATOR_PROCESSES, serve_cluster
+        processes = args.processes or ORCHESTRATOR_PROCESSES
+        if processes > 1:
+            await serve_cluster(port=args.port, processes=processes, workers=args.workers,
+                                alerts_file=args.alerts_file)
+            return
+        from orchestrator_service import serve
+        await serve(port=args.port, workers=args.workers, alerts_file=args.alerts_file)
+        return
+    
     async with AgentHost() as host:
         print("\n🤖 Multi-Agent Orchestrator Started")
-        print("Available agents: ticketing, kubernetes")
+        print(f"Available agents: {', '.join(host.agents)}")
         print("\nExample requests:")
         print("  - List namespaces and create ticket if pods in error")
         print("  - Check kubernetes cluster health and report issues")
         print("  - Get all pods and create ticket for any failures")
-        print("\nType 'quit' to exit\n")
+        interrupted = host.journal.incomplete() if host.journal else []
+        if interrupted:
+            print(f"\n♻️  {len(interrupted)} interrupted workflow(s) in the journal, type 'resume' to finish them")
+        print("\nType 'metrics' for call statistics, 'quit' to exit\n")
         
         while True:
             try:
@@ -333,6 +615,15 @@ async def main():
                 if not user_input:
                     continue
                 
+                if user_input.lower() == 'metrics':
+                    print(json.dumps(host.metrics_snapshot(), indent=2, default=str))
+                    continue
+                
+                if user_input.lower() == 'resume':
+                    for request_id, response in await host.resume_incomplete():
+                        print(f"\n🤖 Final Response ({request_id}):\n{response}\n")
+                    continue
+                
                 response = await host.process_request(user_input)
                 print(f"\n🤖 Final Response:\n{response}\n")
                 print("-" * 80)
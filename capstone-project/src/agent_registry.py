@@ -0,0 +1,133 @@
+"""Agent registry - configurable agent endpoints and an on-disk agent card cache"""
+
+import os
+import json
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+from a2a.types import AgentCard
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+
+# Used when no registry is configured
+DEFAULT_AGENTS = {
+    "ticketing": ["http://localhost:5001"],  # Ticketing agent port
+    "kubernetes": ["http://localhost:8889"]  # Kubernetes agent port
+}
+
+CARD_CACHE_PATH = os.environ.get(
+    "AGENT_CARD_CACHE", os.path.expanduser("~/.cache/unie-aiops/agent_cards.json")
+)
+CARD_CACHE_TTL = float(os.environ.get("AGENT_CARD_TTL", "300"))
+CARD_FETCH_TIMEOUT = float(os.environ.get("AGENT_CARD_FETCH_TIMEOUT", "2"))
+
+
+def load_agent_endpoints() -> Dict[str, List[str]]:
+    """Load agent name -> replica base URLs from AGENT_REGISTRY (JSON file path or inline JSON)"""
+    source = os.environ.get("AGENT_REGISTRY")
+    if not source:
+        return {name: list(urls) for name, urls in DEFAULT_AGENTS.items()}
+
+    if os.path.isfile(source):
+        with open(source) as f:
+            registry = json.load(f)
+    else:
+        registry = json.loads(source)
+
+    # Accept both {"name": ...} and {"agents": {"name": ...}}; values are a URL or a list of replica URLs
+    registry = registry.get("agents", registry)
+    if not isinstance(registry, dict) or not registry:
+        raise ValueError(f"AGENT_REGISTRY must map agent names to URLs, got: {registry!r}")
+    return {name: _as_url_list(urls) for name, urls in registry.items()}
+
+
+def _as_url_list(urls: Union[str, List[str]]) -> List[str]:
+    if isinstance(urls, str):
+        urls = [urls]
+    return [url.rstrip("/") for url in urls]
+
+
+class AgentCardCache:
+    """Agent cards persisted on disk (shared by every orchestrator process) and revalidated with ETag/TTL"""
+
+    def __init__(self, path: str = CARD_CACHE_PATH, ttl: float = CARD_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.mtime = None
+        self._load()
+
+    def _load(self):
+        try:
+            self.mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _reload(self):
+        """Pick up cards other orchestrator processes wrote since the last load"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self.mtime:
+            self._load()
+
+    def _store(self, agent_name: str, entry: Dict[str, Any]):
+        # Merge into the current file so concurrent writers only replace their own agent's entry
+        self._reload()
+        self.entries[agent_name] = entry
+        self._save()
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+            self.mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            print(f"⚠️  Could not write agent card cache {self.path}: {e}")
+
+    def get(self, agent_name: str, urls: List[str]) -> Optional[AgentCard]:
+        """Cached card for an agent, stale or not; None if unknown or its replicas changed"""
+        entry = self.entries.get(agent_name)
+        if not entry or entry.get("url") not in urls:
+            return None
+        try:
+            return AgentCard.model_validate(entry["card"])
+        except Exception:
+            return None
+
+    def is_fresh(self, agent_name: str) -> bool:
+        self._reload()
+        entry = self.entries.get(agent_name)
+        return bool(entry) and time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    async def fetch(self, httpx_client: httpx.AsyncClient, agent_name: str, base_url: str,
+                    timeout: float = CARD_FETCH_TIMEOUT) -> AgentCard:
+        """Fetch (or revalidate) an agent card from one replica and store it in the cache"""
+        entry = self.entries.get(agent_name)
+        headers = {}
+        if entry and entry.get("url") == base_url and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+
+        response = await httpx_client.get(
+            f"{base_url}{AGENT_CARD_WELL_KNOWN_PATH}", headers=headers, timeout=timeout
+        )
+        if response.status_code == 304 and entry:
+            entry["fetched_at"] = time.time()
+            self._store(agent_name, entry)
+            return AgentCard.model_validate(entry["card"])
+
+        response.raise_for_status()
+        card = AgentCard.model_validate(response.json())
+        self._store(agent_name, {
+            "url": base_url,
+            "card": card.model_dump(mode="json", exclude_none=True),
+            "etag": response.headers.get("etag"),
+            "fetched_at": time.time(),
+        })
+        return card
@@ -0,0 +1,187 @@
+"""Alert ingestion - groups alert events over a tumbling window before orchestration"""
+
+import os
+import json
+import asyncio
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from metrics import metrics
+
+ALERT_WINDOW = float(os.environ.get("ALERT_WINDOW_SECONDS", "30"))
+ALERT_GROUP_BY = [k.strip() for k in os.environ.get("ALERT_GROUP_BY", "namespace,deployment").split(",") if k.strip()]
+ALERT_BUFFER_SIZE = int(os.environ.get("ALERT_BUFFER_SIZE", "10000"))
+# Windows a group may wait for orchestrator capacity before it is dropped
+ALERT_MAX_DEFERRALS = int(os.environ.get("ALERT_MAX_DEFERRALS", "10"))
+# Distinct alert summaries quoted in one request
+ALERT_SAMPLES = 5
+
+
+def group_key(alert: Dict[str, Any], group_by: Optional[List[str]] = None) -> Tuple[str, ...]:
+    """The grouping label values of an alert; alerts with the same key form one incident"""
+    labels = alert.get("labels", {})
+    return tuple(labels.get(key, "") for key in (group_by or ALERT_GROUP_BY))
+
+
+class AlertGroup:
+    """Alerts sharing the grouping labels within one window"""
+
+    def __init__(self, key: Tuple[str, ...], labels: Dict[str, str]):
+        self.key = key
+        self.labels = labels
+        self.count = 0
+        self.alertnames: Counter = Counter()
+        self.severities: Counter = Counter()
+        self.fingerprints = set()
+        self.samples: List[str] = []
+        self.deferrals = 0
+
+    def add(self, alert: Dict[str, Any]) -> bool:
+        """Add an alert; False if it repeats one already in the group"""
+        labels = alert.get("labels", {})
+        fingerprint = alert.get("fingerprint") or json.dumps(labels, sort_keys=True)
+        if fingerprint in self.fingerprints:
+            return False
+        self.fingerprints.add(fingerprint)
+        self.count += 1
+        self.alertnames[labels.get("alertname", "unknown")] += 1
+        self.severities[labels.get("severity", "unknown")] += 1
+        annotations = alert.get("annotations", {})
+        summary = annotations.get("summary") or annotations.get("description")
+        if summary and len(self.samples) < ALERT_SAMPLES and summary not in self.samples:
+            self.samples.append(summary)
+        return True
+
+    def merge(self, other: "AlertGroup"):
+        """Fold a deferred group from an earlier window into this one"""
+        self.count += other.count
+        self.alertnames.update(other.alertnames)
+        self.severities.update(other.severities)
+        self.fingerprints |= other.fingerprints
+        self.deferrals = max(self.deferrals, other.deferrals)
+        for summary in other.samples:
+            if len(self.samples) < ALERT_SAMPLES and summary not in self.samples:
+                self.samples.append(summary)
+
+    def to_request(self) -> str:
+        """One orchestration request describing the whole group"""
+        where = ", ".join(f"{k} {v}" for k, v in self.labels.items() if v)
+        names = ", ".join(f"{name} x{n}" for name, n in self.alertnames.most_common())
+        severity = ", ".join(f"{sev} x{n}" for sev, n in self.severities.most_common())
+        samples = "; ".join(self.samples)
+        return (
+            f"{self.count} alert(s){' in ' + where if where else ''}: {names} (severity: {severity})."
+            f"{' Details: ' + samples + '.' if samples else ''} "
+            "Check the affected Kubernetes resources and create a ticket if errors found"
+        )
+
+
+class AlertBatcher:
+    """Buffers alert events and turns each label group of a window into one request.
+
+    ``submit(request_text, source, incident_key=...)`` must raise ``asyncio.QueueFull``
+    when the orchestrator is saturated; such groups are carried into the next window.
+    The incident key, passed by keyword, is the group's label values joined by "/".
+    """
+
+    def __init__(self, submit: Callable[..., Any], window: float = ALERT_WINDOW,
+                 group_by: Optional[List[str]] = None, buffer_size: int = ALERT_BUFFER_SIZE):
+        self.submit = submit
+        self.window = window
+        self.group_by = group_by or ALERT_GROUP_BY
+        self.buffer: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.groups: Dict[Tuple[str, ...], AlertGroup] = {}
+        self.tasks = []
+
+    async def start(self):
+        self.tasks = [asyncio.create_task(self._consume()), asyncio.create_task(self._tick())]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.flush()
+
+    def offer(self, alert: Dict[str, Any]) -> bool:
+        """Non-blocking enqueue for webhooks; False (and counted) when the buffer is full"""
+        if alert.get("status", "firing") != "firing":
+            return True
+        try:
+            self.buffer.put_nowait(alert)
+        except asyncio.QueueFull:
+            metrics.inc("alerts_dropped", reason="buffer_full")
+            return False
+        metrics.inc("alerts_received")
+        return True
+
+    async def put(self, alert: Dict[str, Any]):
+        """Blocking enqueue for replayable sources: waits for buffer space instead of dropping"""
+        if alert.get("status", "firing") != "firing":
+            return
+        await self.buffer.put(alert)
+        metrics.inc("alerts_received")
+
+    async def ingest_ndjson(self, path: str, accept: Optional[Callable[[Dict[str, Any]], bool]] = None) -> int:
+        """Feed alerts from an NDJSON file (one alert or Alertmanager payload per line)
+
+        ``accept`` keeps only some alerts, e.g. the incidents of one orchestrator process.
+        """
+        count = 0
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    metrics.inc("alerts_dropped", reason="malformed")
+                    continue
+                for alert in event.get("alerts", [event]):
+                    if accept and not accept(alert):
+                        continue
+                    await self.put(alert)
+                    count += 1
+        return count
+
+    def _group_key(self, alert: Dict[str, Any]) -> Tuple[str, ...]:
+        return group_key(alert, self.group_by)
+
+    async def _consume(self):
+        while True:
+            alert = await self.buffer.get()
+            key = self._group_key(alert)
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = AlertGroup(key, dict(zip(self.group_by, key)))
+            if not group.add(alert):
+                metrics.inc("alerts_deduplicated")
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.window)
+            self.flush()
+
+    def flush(self):
+        """Close the current window: submit one request per group"""
+        groups, self.groups = self.groups, {}
+        for key, group in groups.items():
+            try:
+                # Each window is a new workflow with its own request id; the key only routes and journals it
+                self.submit(group.to_request(), "alerts", incident_key="/".join(key))
+            except asyncio.QueueFull:
+                group.deferrals += 1
+                if group.deferrals > ALERT_MAX_DEFERRALS:
+                    metrics.inc("alert_groups_dropped")
+                    metrics.inc("alerts_dropped", group.count, reason="orchestrator_saturated")
+                    continue
+                # Backpressure: keep the group and merge it with the next window's alerts
+                metrics.inc("alert_groups_deferred")
+                pending = self.groups.get(key)
+                if pending is None:
+                    self.groups[key] = group
+                else:
+                    pending.merge(group)
+                continue
+            metrics.inc("alert_groups_submitted")
+            metrics.observe("alert_group_size", group.count)
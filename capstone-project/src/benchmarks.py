@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the orchestrator hot paths and lab1's ticket stores, compared against saved baselines
+
+    uv run python src/benchmarks.py --save                  # record benchmarks/orchestrator.json on this machine
+    uv run python src/benchmarks.py                         # compare; exits 1 when a path got slower than --tolerance
+    uv run python src/benchmarks.py --suite tickets --save  # lab1-agents/src/ticket_benchmark.py cases
+
+Baselines are only comparable on the machine (and Python) that recorded them, so
+none are committed; the first run on a machine records them with --save.
+"""
+
+import os
+import sys
+import json
+import timeit
+import asyncio
+import argparse
+import platform
+from uuid import uuid4
+
+# Benchmarks must not touch the workflow journal, plan cache or trace files
+os.environ["WORKFLOW_JOURNAL"] = ""
+os.environ["PLAN_CACHE"] = ""
+os.environ.pop("TRAFFIC_TRACE", None)
+
+from a2a.types import (AgentCapabilities, AgentCard, AgentSkill, MessageSendParams, SendMessageRequest,
+                       SendMessageResponse)
+
+from agent_autonomous import AgentHost
+from plan_parser import parse_plan
+from structured_results import compact_json, facts_from_data, summarize_pods
+
+# One baseline file per suite: benchmarks/<suite>.json
+BASELINE_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+# The ticket store lives in lab1, whose ticketing server the ticketing agent talks to
+LAB1_SRC = os.environ.get("LAB1_SRC", os.path.join(os.path.dirname(__file__), "..", "..", "lab1-agents", "src"))
+# Sizes of the synthetic inputs
+SKILLS_PER_AGENT = 200
+AGENTS = 50
+PODS = 500
+REQUEST = "check pods in namespace payments and create a ticket if any deployment keeps failing"
+
+_WORDS = ("cluster namespace deployment replica rollout container image registry volume secret config "
+          "network policy ingress service endpoint node drain cordon taint label annotation quota limit "
+          "incident ticket priority assignee queue escalation report summary audit change request").split()
+# Filler skill words that never occur in REQUEST, so the fallback has to scan every skill
+_FILLER = [word for word in _WORDS if word not in REQUEST]
+_MATCHING = {"kubernetes": "inspect pods and workloads", "ticketing": "open a ticket for an incident"}
+
+
+def synthetic_card(name: str, skills: int = SKILLS_PER_AGENT) -> AgentCard:
+    """An agent card with many long skill descriptions"""
+    return AgentCard(
+        name=name, description=f"{name} agent", url=f"http://localhost/{name}", version="1.0",
+        capabilities=AgentCapabilities(), default_input_modes=["text"], default_output_modes=["text", "data"],
+        skills=[
+            AgentSkill(
+                id=f"{name}-{i}", name=f"{name} skill {i}",
+                description=" ".join(_FILLER[(i + j) % len(_FILLER)] for j in range(25)),
+                tags=[_FILLER[(i * 7 + j) % len(_FILLER)] for j in range(5)] + [name],
+            )
+            for i in range(skills - 1)
+        ] + [
+            # Only the last skill matches the request: the fallback's worst case
+            AgentSkill(id=f"{name}-match", name=f"{name} match", description=_MATCHING.get(name, name),
+                       tags=[name]),
+        ],
+    )
+
+
+def synthetic_pods(n: int = PODS):
+    return [{"ns": f"team-{i % 20}", "name": f"web-{i:05d}", "phase": "Running" if i % 25 else "CrashLoopBackOff",
+             "restarts": i % 5, "ready": bool(i % 25)} for i in range(n)]
+
+
+def pods_table(pods) -> str:
+    lines = ["NAMESPACE    NAME    READY    STATUS    RESTARTS"]
+    lines += [f"{p['ns']}    {p['name']}    {int(p['ready'])}/1    {p['phase']}    {p['restarts']}" for p in pods]
+    return "\n".join(lines)
+
+
+def build_host(extra_agents: int = 0) -> AgentHost:
+    """kubernetes and ticketing plus ``extra_agents`` agents none of whose skills match REQUEST"""
+    host = AgentHost()
+    for name in ["kubernetes", "ticketing"] + [f"agent{i}" for i in range(extra_agents)]:
+        host.agent_cards[name] = synthetic_card(name)
+        host.skill_index.update(name, host.agent_cards[name])
+        host.clients[name] = {}
+    return host
+
+
+def benchmarks():
+    """name -> zero-argument callable"""
+    host = build_host()
+    crowded = build_host(AGENTS - 2)
+    changed = synthetic_card("agent0", SKILLS_PER_AGENT // 2)
+    loop = asyncio.new_event_loop()
+    pods = synthetic_pods()
+    table = pods_table(pods)
+    data = summarize_pods(pods)  # The payload the Kubernetes executor attaches
+    facts = facts_from_data(data)
+    conditional = {"agent": "ticketing", "action": "Create a ticket", "condition": "if errors found"}
+    response = SendMessageResponse.model_validate({
+        "id": "1", "jsonrpc": "2.0",
+        "result": {"kind": "message", "message_id": "m", "role": "agent",
+                   "parts": [{"kind": "text", "text": table}, {"kind": "data", "data": data}]},
+    })
+    context = compact_json(data)
+    plan = json.dumps([{"agent": "kubernetes", "action": f"Check workload {i}", "condition": None} for i in range(4)]
+                      + [{"agent": "ticketing", "action": "Create a ticket", "condition": "if errors found"}])
+
+    def send_message_request():
+        return SendMessageRequest(id=str(uuid4()), params=MessageSendParams(**{
+            "message": {"role": "user", "parts": [{"kind": "text", "text": f"Create a ticket\n\n{context}"}],
+                        "message_id": uuid4().hex},
+            "metadata": {"deadline": 0},
+        }))
+
+    return {
+        f"create_fallback_workflow ({SKILLS_PER_AGENT} skills/agent)":
+            lambda: loop.run_until_complete(host._create_fallback_workflow(REQUEST)),
+        f"create_fallback_workflow ({AGENTS} agents)":
+            lambda: loop.run_until_complete(crowded._create_fallback_workflow(REQUEST)),
+        f"skill index update (1 of {AGENTS} cards)": lambda: crowded.skill_index.update("agent0", changed),
+        f"should_execute_step on text ({PODS} pod rows)":
+            lambda: loop.run_until_complete(host._should_execute_step(conditional, [table])),
+        "should_execute_step on StepFacts":
+            lambda: loop.run_until_complete(host._should_execute_step(conditional, [facts])),
+        f"parse_agent_response (text + {PODS}-pod summary DataPart)":
+            lambda: host._parse_agent_response(response, "kubernetes"),
+        f"SendMessageRequest with {len(context) // 1024} KiB context": send_message_request,
+        "parse_plan (5 steps)": lambda: parse_plan(plan, host.agents),
+    }
+
+
+def ticket_benchmarks():
+    """lab1's ticket store cases (insert, list, search, change log on both stores)"""
+    sys.path.insert(0, os.path.abspath(LAB1_SRC))
+    from ticket_benchmark import benchmarks as tickets
+    return tickets()
+
+
+SUITES = {"orchestrator": benchmarks, "tickets": ticket_benchmarks}
+
+
+def measure(fn, repeat: int = 5) -> float:
+    """Best seconds per call over ``repeat`` runs of an auto-sized loop"""
+    number, _ = timeit.Timer(fn).autorange()
+    return min(timeit.Timer(fn).repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orchestrator and ticket store micro-benchmarks")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="orchestrator")
+    parser.add_argument("--baseline", help="baseline file (default benchmarks/<suite>.json)")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    args = parser.parse_args()
+    args.baseline = args.baseline or os.path.join(BASELINE_DIR, f"{args.suite}.json")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    elif not args.save:
+        print(f"No baseline at {args.baseline}; run with --save to record one on this machine\n")
+
+    cases = {name: fn for name, fn in SUITES[args.suite]().items() if args.filter in name}
+    width = max(map(len, cases), default=0) + 2
+    results, regressions = {}, []
+    print(f"{'benchmark':<{width}}{'µs/call':>12}{'baseline':>12}{'change':>9}")
+    for name, fn in cases.items():
+        seconds = results[name] = measure(fn)
+        line = f"{name:<{width}}{seconds * 1e6:>12.1f}"
+        if name in baseline:
+            change = seconds / baseline[name] - 1
+            line += f"{baseline[name] * 1e6:>12.1f}{change:>+9.0%}"
+            if change > args.tolerance:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            # A filtered run only replaces the benchmarks it ran
+            json.dump({"python": platform.python_version(), "machine": platform.platform(),
+                       "results": {**baseline, **results}}, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    if regressions and not args.save:
+        print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""Cluster state cache - indexed in-memory snapshot of pods, deployments, events and nodes"""
+
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from langchain.tools import tool
+
+from conditions import HEALTHY_PHASES
+from metrics import metrics
+from structured_results import load_document, pod_from_object, pods_from_table, text_content
+
+CLUSTER_CACHE_RESYNC = float(os.environ.get("CLUSTER_CACHE_RESYNC", "30"))
+# Answers from a snapshot older than this are refused so the agent uses the live tools
+CLUSTER_CACHE_MAX_AGE = float(os.environ.get("CLUSTER_CACHE_MAX_AGE", str(CLUSTER_CACHE_RESYNC * 4)))
+CLUSTER_CACHE_MAX_EVENTS = int(os.environ.get("CLUSTER_CACHE_MAX_EVENTS", "1000"))
+# Rows returned by one read tool; the totals are always reported
+CLUSTER_CACHE_MAX_ROWS = 100
+
+# MCP list calls per kind: (tool name, arguments)
+RESYNC_CALLS = {
+    "pods": ("pods_list", {}),
+    "deployments": ("resources_list", {"apiVersion": "apps/v1", "kind": "Deployment"}),
+    "events": ("events_list", {}),
+    "nodes": ("resources_list", {"apiVersion": "v1", "kind": "Node"}),
+}
+
+Key = Tuple[str, str]  # (namespace, name)
+
+_NO_RESOURCES = re.compile(r"^no resources found", re.IGNORECASE)
+
+
+def _field(obj: Dict[str, Any], *names: str, default: Any = None) -> Any:
+    """First present field, accepting the capitalised keys some MCP outputs use"""
+    for name in names:
+        for candidate in (name, name[:1].upper() + name[1:]):
+            if candidate in obj:
+                return obj[candidate]
+    return default
+
+
+def _items(content: Any) -> List[Dict[str, Any]]:
+    document = load_document(text_content(content))
+    if isinstance(document, dict):
+        document = document.get("items", [document])
+    return [item for item in document or [] if isinstance(item, dict)]
+
+
+def _empty_listing(content: Any) -> bool:
+    """Whether a listing that yielded no records really lists nothing, rather than failing to parse"""
+    text = text_content(content).strip()
+    if not text or _NO_RESOURCES.match(text):
+        return True
+    document = load_document(text)
+    return document == [] or isinstance(document, dict) and "items" in document and not document["items"]
+
+
+def _epoch(value: Any) -> int:
+    """RFC 3339 timestamp (or datetime) as epoch seconds; 0 when absent or unparsable"""
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    try:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return 0
+
+
+def _intern(value: Any) -> str:
+    # Namespaces, phases, owners and node names repeat across thousands of objects
+    return sys.intern(str(value or ""))
+
+
+class _Record:
+    """Slotted cluster object with interned strings; serialised only on demand"""
+
+    __slots__ = ()
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and other._values() == self._values()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(zip(self.__slots__, self._values()))
+
+
+class PodRecord(_Record):
+    __slots__ = ("ns", "name", "phase", "restarts", "ready", "owner", "node", "rv")
+
+    def __init__(self, ns, name, phase, restarts=0, ready="", owner="", node="", rv=""):
+        self.ns = _intern(ns)
+        self.name = str(name)
+        self.phase = _intern(phase)
+        self.restarts = int(restarts)
+        self.ready = _intern(ready)
+        self.owner = _intern(owner)
+        self.node = _intern(node)
+        self.rv = str(rv)
+
+    @classmethod
+    def from_object(cls, obj: Dict[str, Any]) -> "PodRecord":
+        pod = pod_from_object(obj)
+        meta = obj.get("metadata") or {}
+        owners = meta.get("ownerReferences") or []
+        owner = f"{owners[0].get('kind')}/{owners[0].get('name')}" if owners else ""
+        # Pods of a Deployment are owned by its ReplicaSet "<deployment>-<hash>"
+        if owner.startswith("ReplicaSet/"):
+            owner = "Deployment/" + owner.split("/", 1)[1].rsplit("-", 1)[0]
+        return cls(owner=owner, node=(obj.get("spec") or {}).get("nodeName", ""),
+                   rv=meta.get("resourceVersion", ""), **pod)
+
+
+class DeploymentRecord(_Record):
+    __slots__ = ("ns", "name", "desired", "ready", "available", "rv")
+
+    def __init__(self, obj: Dict[str, Any]):
+        meta = obj.get("metadata") or {}
+        status = obj.get("status") or {}
+        self.ns = _intern(meta.get("namespace"))
+        self.name = str(meta.get("name", ""))
+        spec_replicas = (obj.get("spec") or {}).get("replicas")
+        self.desired = 1 if spec_replicas is None else int(spec_replicas)
+        self.ready = int(status.get("readyReplicas", 0))
+        self.available = int(status.get("availableReplicas", 0))
+        self.rv = str(meta.get("resourceVersion", ""))
+
+
+class NodeRecord(_Record):
+    __slots__ = ("ns", "name", "ready", "unschedulable", "pressure", "rv")
+
+    def __init__(self, obj: Dict[str, Any]):
+        meta = obj.get("metadata") or {}
+        conditions = (obj.get("status") or {}).get("conditions") or []
+        self.ns = ""
+        self.name = _intern(meta.get("name"))
+        self.ready = any(c.get("type") == "Ready" and c.get("status") == "True" for c in conditions)
+        self.unschedulable = bool((obj.get("spec") or {}).get("unschedulable"))
+        self.pressure = tuple(_intern(c.get("type")) for c in conditions
+                              if c.get("type") != "Ready" and c.get("status") == "True")
+        self.rv = str(meta.get("resourceVersion", ""))
+
+
+class EventRecord(_Record):
+    __slots__ = ("ns", "type", "reason", "object", "message", "count", "time")
+
+    def __init__(self, obj: Dict[str, Any]):
+        meta = obj.get("metadata") or {}
+        involved = _field(obj, "involvedObject", default={}) or {}
+        self.ns = _intern(_field(obj, "namespace", default=meta.get("namespace", "")))
+        self.type = _intern(_field(obj, "type", default="Normal"))
+        self.reason = _intern(_field(obj, "reason", default=""))
+        self.object = f"{_field(involved, 'kind', default='')}/{_field(involved, 'name', default='')}"
+        self.message = _intern(_field(obj, "message", default=""))
+        self.count = int(_field(obj, "count", default=1) or 1)
+        self.time = _epoch(_field(obj, "lastTimestamp", "timestamp", "eventTime", default=""))
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.time, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ") if self.time else "-"
+
+
+class ClusterCache:
+    """Latest cluster snapshot with secondary indexes, refreshed by list-resync diffs"""
+
+    def __init__(self, max_events: int = CLUSTER_CACHE_MAX_EVENTS):
+        self.pods: Dict[Key, PodRecord] = {}
+        self.deployments: Dict[Key, DeploymentRecord] = {}
+        self.nodes: Dict[Key, NodeRecord] = {}
+        self.events: deque = deque(maxlen=max_events)
+        # Pod indexes: namespace / phase / owner -> pod keys
+        self.by_namespace: Dict[str, Set[Key]] = defaultdict(set)
+        self.by_phase: Dict[str, Set[Key]] = defaultdict(set)
+        self.by_owner: Dict[str, Set[Key]] = defaultdict(set)
+        self.synced_at: Dict[str, float] = {}
+
+    # --- updates -------------------------------------------------------------
+
+    def _index(self, key: Key, pod: PodRecord):
+        self.by_namespace[pod.ns].add(key)
+        self.by_phase[pod.phase.lower()].add(key)
+        if pod.owner:
+            self.by_owner[pod.owner].add(key)
+
+    def _unindex(self, key: Key, pod: PodRecord):
+        for index, value in ((self.by_namespace, pod.ns), (self.by_phase, pod.phase.lower()),
+                             (self.by_owner, pod.owner)):
+            keys = index.get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[value]
+
+    def _replace(self, store: Dict[Key, _Record], records: Iterable[_Record],
+                 indexed: bool = False) -> Tuple[int, int]:
+        """Apply a full listing: only added, changed or deleted objects touch the indexes"""
+        incoming = {(record.ns, record.name): record for record in records}
+        changed = 0
+        for key, record in incoming.items():
+            current = store.get(key)
+            if current is not None and (record.rv and current.rv == record.rv or current == record):
+                continue
+            if indexed and current is not None:
+                self._unindex(key, current)
+            store[key] = record
+            if indexed:
+                self._index(key, record)
+            changed += 1
+        deleted = [key for key in store if key not in incoming]
+        for key in deleted:
+            record = store.pop(key)
+            if indexed:
+                self._unindex(key, record)
+        return changed, len(deleted)
+
+    def apply(self, kind: str, content: Any) -> Tuple[int, int]:
+        """Apply one MCP list result for a kind; returns (changed, deleted) counts
+
+        Output that parses to nothing but is not an empty listing (an error message,
+        an unknown format) raises ValueError and leaves the snapshot and its age alone.
+        """
+        if kind == "pods":
+            items = _items(content)
+            if items:
+                records = [PodRecord.from_object(item) for item in items if "metadata" in item]
+            else:
+                # Table output carries no owner/node/resourceVersion
+                records = [PodRecord(**pod) for pod in pods_from_table(text_content(content))]
+        elif kind == "deployments":
+            records = [DeploymentRecord(i) for i in _items(content) if "metadata" in i]
+        elif kind == "nodes":
+            records = [NodeRecord(i) for i in _items(content) if "metadata" in i]
+        elif kind == "events":
+            records = [EventRecord(item) for item in _items(content)]
+        else:
+            raise ValueError(f"Unknown cluster cache kind: {kind}")
+        if not records and not _empty_listing(content):
+            raise ValueError(f"{kind} listing holds nothing that parses: {text_content(content)[:80]!r}")
+
+        if kind == "pods":
+            result = self._replace(self.pods, records, indexed=True)
+        elif kind == "deployments":
+            result = self._replace(self.deployments, records)
+        elif kind == "nodes":
+            result = self._replace(self.nodes, records)
+        else:
+            records.sort(key=lambda event: event.time)
+            self.events.clear()
+            self.events.extend(records)
+            result = (len(records), 0)
+        self.synced_at[kind] = time.monotonic()
+        return result
+
+    # --- reads ---------------------------------------------------------------
+
+    def age(self, kind: str) -> Optional[float]:
+        synced = self.synced_at.get(kind)
+        return None if synced is None else time.monotonic() - synced
+
+    def fresh(self, kind: str, max_age: float = CLUSTER_CACHE_MAX_AGE) -> bool:
+        age = self.age(kind)
+        return age is not None and age <= max_age
+
+    def find_pods(self, namespace: str = "", phase: str = "", owner: str = "",
+                  unhealthy: bool = False) -> List[PodRecord]:
+        """Pods matching every given filter, answered from the indexes"""
+        selections = []
+        if namespace:
+            selections.append(self.by_namespace.get(namespace, set()))
+        if phase:
+            selections.append(self.by_phase.get(phase.lower(), set()))
+        if owner:
+            selections.append(self.by_owner.get(owner if "/" in owner else f"Deployment/{owner}", set()))
+        if unhealthy:
+            selections.append(set().union(*(keys for phase, keys in self.by_phase.items()
+                                             if phase not in HEALTHY_PHASES)))
+        if not selections:
+            keys: Iterable[Key] = self.pods.keys()
+        else:
+            selections.sort(key=len)
+            keys = set(selections[0]).intersection(*selections[1:])
+        return [self.pods[key] for key in sorted(keys)]
+
+    def phase_counts(self, namespace: str = "") -> Dict[str, int]:
+        if not namespace:
+            return {phase: len(keys) for phase, keys in self.by_phase.items()}
+        scope = self.by_namespace.get(namespace, set())
+        counts = {phase: len(keys & scope) for phase, keys in self.by_phase.items()}
+        return {phase: n for phase, n in counts.items() if n}
+
+    def unavailable_deployments(self, namespace: str = "") -> List[DeploymentRecord]:
+        return [d for (ns, _), d in sorted(self.deployments.items())
+                if (not namespace or ns == namespace) and d.available < d.desired]
+
+    def warning_events(self, namespace: str = "", limit: int = 20) -> List[EventRecord]:
+        warnings = [e for e in reversed(self.events)
+                    if e.type == "Warning" and (not namespace or e.ns == namespace)]
+        return warnings[:limit]
+
+    def problem_nodes(self) -> List[NodeRecord]:
+        return [n for _, n in sorted(self.nodes.items()) if not n.ready or n.unschedulable or n.pressure]
+
+
+def pods_table(pods: List[PodRecord]) -> str:
+    """kubectl-style table, the format the agent's structured result extraction reads"""
+    rows = [["NAMESPACE", "NAME", "READY", "STATUS", "RESTARTS", "NODE"]]
+    for pod in pods[:CLUSTER_CACHE_MAX_ROWS]:
+        rows.append([pod.ns, pod.name, pod.ready or "-", pod.phase, str(pod.restarts),
+                     pod.node or "-"])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = ["   ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows]
+    if len(pods) > CLUSTER_CACHE_MAX_ROWS:
+        lines.append(f"... {len(pods) - CLUSTER_CACHE_MAX_ROWS} more pod(s)")
+    return "\n".join(lines)
+
+
+class ClusterSync:
+    """Keeps a ClusterCache current by periodically re-listing each kind.
+
+    ``fetch(tool_name, arguments)`` returns the tool output; by default it calls the
+    MCP session, but any local stand-in with the same shape works.
+    """
+
+    def __init__(self, cache: ClusterCache, fetch: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+                 interval: float = CLUSTER_CACHE_RESYNC, calls: Optional[Dict[str, Tuple[str, Dict]]] = None):
+        self.cache = cache
+        self.fetch = fetch
+        self.interval = interval
+        self.calls = calls or RESYNC_CALLS
+        self.task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def for_session(cls, cache: ClusterCache, session: Any, **kwargs) -> "ClusterSync":
+        async def fetch(name: str, arguments: Dict[str, Any]) -> Any:
+            result = await session.call_tool(name, arguments)
+            if result.isError:
+                raise RuntimeError(text_content([c.model_dump() for c in result.content]))
+            return [c.model_dump() for c in result.content]
+        return cls(cache, fetch, **kwargs)
+
+    async def resync(self):
+        """List every kind concurrently; a failing kind keeps its previous snapshot"""
+        async def one(kind: str, name: str, arguments: Dict[str, Any]):
+            started = time.monotonic()
+            try:
+                changed, deleted = self.cache.apply(kind, await self.fetch(name, arguments))
+            except Exception as e:
+                metrics.inc("cluster_cache_resync", kind=kind, outcome="error")
+                print(f"Cluster cache resync of {kind} failed: {e}")
+                return
+            metrics.inc("cluster_cache_resync", kind=kind, outcome="ok")
+            metrics.inc("cluster_cache_changes", changed + deleted, kind=kind)
+            metrics.observe("cluster_cache_resync_seconds", time.monotonic() - started, kind=kind)
+
+        await asyncio.gather(*(one(kind, name, args) for kind, (name, args) in self.calls.items()))
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.resync()
+
+    async def start(self, initial_timeout: Optional[float] = None):
+        """First listing (bounded), then periodic resyncs in the background"""
+        try:
+            await asyncio.wait_for(self.resync(), initial_timeout)
+        except asyncio.TimeoutError:
+            print("Cluster cache initial sync timed out; serving live tools until it completes")
+        self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+
+def cache_tools(cache: ClusterCache) -> List[Any]:
+    """Read tools answered from the cache; stale data is refused so live tools are used instead"""
+
+    def stale(kind: str) -> Optional[str]:
+        if cache.fresh(kind):
+            return None
+        return f"Cached {kind} data is unavailable or stale; use the live Kubernetes tools instead."
+
+    @tool
+    def cached_pods_not_running(namespace: str = "") -> str:
+        """List pods that are not healthy (crashing, failing, pending, not Running/Succeeded) from the cluster cache, optionally in one namespace. Fastest way to answer health questions."""
+        if error := stale("pods"):
+            return error
+        pods = cache.find_pods(namespace=namespace, unhealthy=True)
+        scope = f" in namespace {namespace}" if namespace else ""
+        if not pods:
+            return f"All {len(cache.find_pods(namespace=namespace))} pods{scope} are running (cached)."
+        return f"{len(pods)} pod(s) not running{scope} (cached):\n{pods_table(pods)}"
+
+    @tool
+    def cached_pods_list(namespace: str = "", phase: str = "", deployment: str = "") -> str:
+        """List pods from the cluster cache filtered by namespace, phase/status (e.g. Running, Pending, CrashLoopBackOff) and owning deployment."""
+        if error := stale("pods"):
+            return error
+        pods = cache.find_pods(namespace=namespace, phase=phase, owner=deployment)
+        return f"{len(pods)} pod(s) (cached):\n{pods_table(pods)}"
+
+    @tool
+    def cached_cluster_health(namespace: str = "") -> str:
+        """Summarise cluster health from the cache: pod phase counts, unavailable deployments, problem nodes and recent warning events."""
+        kinds = ["pods", "deployments", "events"] + ([] if namespace else ["nodes"])
+        for kind in kinds:
+            if error := stale(kind):
+                return error
+        summary = {
+            "phase_counts": cache.phase_counts(namespace),
+            "unavailable_deployments": [f"{d.ns}/{d.name} {d.available}/{d.desired}"
+                                        for d in cache.unavailable_deployments(namespace)],
+            "problem_nodes": [n.name for n in cache.problem_nodes()] if not namespace else [],
+            "warning_events": [f"{e.object} {e.reason}: {e.message}"
+                               for e in cache.warning_events(namespace, limit=10)],
+            "age_seconds": round(max(cache.age(kind) for kind in kinds), 1),
+        }
+        return json.dumps(summary, separators=(",", ":"))
+
+    @tool
+    def cached_warning_events(namespace: str = "", limit: int = 20) -> str:
+        """Most recent Warning events from the cluster cache, optionally in one namespace."""
+        if error := stale("events"):
+            return error
+        events = cache.warning_events(namespace, limit)
+        if not events:
+            return "No warning events (cached)."
+        return "\n".join(f"{e.timestamp} {e.ns} {e.object} {e.reason} x{e.count}: {e.message}"
+                         for e in events)
+
+    return [cached_pods_not_running, cached_pods_list, cached_cluster_health, cached_warning_events]
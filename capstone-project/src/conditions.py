@@ -0,0 +1,238 @@
+"""Compiled step conditions evaluated over facts extracted from step outputs"""
+
+import re
+import asyncio
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Pod phases / container states counted in step outputs
+PHASES = (
+    "running", "pending", "failed", "succeeded", "completed", "unknown", "crashloopbackoff",
+    "error", "oomkilled", "imagepullbackoff", "errimagepull", "evicted", "terminating",
+    "containercreating",
+)
+HEALTHY_PHASES = {"running", "succeeded", "completed"}
+# Fact keys that are not pod phases
+_NON_PHASE_KEYS = {"restarts", "not_running", "pods", "errors"}
+
+# Words that indicate something is wrong in free text
+PROBLEM_TERMS = (
+    "errors?", "fail(?:ed|ure|ures|ing|s)?", "crash(?:ed|es|ing)?", "crashloopbackoff", "oomkilled",
+    "imagepullbackoff", "errimagepull", "evicted", "unhealthy", "issues?", "problems?",
+    "backoff", "notready", "degraded", "unavailable",
+)
+
+# One pass over the text: negated mentions are consumed first so "no errors" is not an error
+_FACT_PATTERN = re.compile(
+    r"(?P<negated>\b(?:no|zero|0|without|not any)\s+(?:\w+\s+){0,2}?(?:" + "|".join(PROBLEM_TERMS) + r")\b)"
+    r"|(?P<restarts_before>\b\d+)\s+restarts?\b"
+    r"|\brestarts?\W{0,3}(?P<restarts_after>\d+)\b"
+    r"|(?P<phase>\b(?:" + "|".join(PHASES) + r")\b)"
+    r"|(?P<problem>\b(?:" + "|".join(PROBLEM_TERMS) + r")\b)",
+    re.IGNORECASE,
+)
+
+
+class StepFacts:
+    """Numbers and signals describing one step's output"""
+
+    __slots__ = ("counts", "problems", "negated")
+
+    def __init__(self):
+        self.counts: Dict[str, float] = {}
+        self.problems = 0  # Problem words not negated
+        self.negated = 0  # Problem words under a negation ("no errors")
+
+    def get(self, metric: str) -> float:
+        return self.counts.get(metric, 0)
+
+    @classmethod
+    def from_text(cls, text: str) -> "StepFacts":
+        facts = cls()
+        counts = facts.counts
+        for match in _FACT_PATTERN.finditer(text or ""):
+            kind = match.lastgroup
+            if kind == "negated":
+                facts.negated += 1
+            elif kind in ("restarts_before", "restarts_after"):
+                counts["restarts"] = max(counts.get("restarts", 0), int(match.group(kind)))
+            elif kind == "phase":
+                phase = match.group(kind).lower()
+                counts[phase] = counts.get(phase, 0) + 1
+                if phase not in HEALTHY_PHASES:
+                    facts.problems += 1
+            else:
+                facts.problems += 1
+        facts._derive()
+        return facts
+
+    @classmethod
+    def from_counts(cls, counts: Dict[str, float]) -> "StepFacts":
+        """Facts from structured step output (exact phase counts, max restarts)
+
+        Every phase outside HEALTHY_PHASES is a problem, including ones PHASES does
+        not list (CreateContainerConfigError, Init:CrashLoopBackOff), as in summarize_pods.
+        """
+        facts = cls()
+        facts.counts = {k.lower(): v for k, v in counts.items()}
+        facts.problems = int(sum(v for k, v in facts.counts.items()
+                                 if k not in _NON_PHASE_KEYS and k not in HEALTHY_PHASES))
+        facts._derive()
+        return facts
+
+    def _derive(self):
+        counts = self.counts
+        phases = {k: v for k, v in counts.items() if k not in _NON_PHASE_KEYS}
+        counts["not_running"] = sum(v for k, v in phases.items() if k not in HEALTHY_PHASES)
+        counts["pods"] = sum(phases.values())
+        counts["errors"] = self.problems
+
+
+_OPS: Dict[str, Callable[[float, float], bool]] = {
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+    "==": operator.eq, "=": operator.eq, "!=": operator.ne,
+}
+
+# Names accepted in numeric conditions, mapped to fact keys
+_METRIC_ALIASES = {
+    "restart": "restarts", "restarts": "restarts", "restart count": "restarts",
+    "not running": "not_running", "unhealthy": "not_running", "errors": "errors", "error": "errors",
+    "pods": "pods",
+}
+
+_COMPARISON = re.compile(
+    r"(?P<metric>not running|restart count|restarts?|unhealthy|errors?|pods|"
+    + "|".join(PHASES) + r")(?:\s+pods?)?\s*(?P<op>>=|<=|==|!=|=|>|<)\s*(?P<value>\d+(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+_HEALTH = r"(?:healthy|all (?:pods? )?(?:are |is )?running|running)"
+# "not healthy", "not all pods running": a problem, checked before the healthy wording it contains
+_NOT_HEALTHY_CONDITION = re.compile(r"\bnot\s+(?:\w+\s+){0,2}?" + _HEALTH + r"\b", re.IGNORECASE)
+# The negation has to apply to the problem noun: "no errors", "without any failures"
+_NEGATED_CONDITION = re.compile(
+    r"\b(?:no|zero|without|none|not any)\s+(?:\w+\s+){0,2}?(?:errors?|issues?|problems?|failures?|crash\w*)\b",
+    re.IGNORECASE,
+)
+_HEALTHY_CONDITION = re.compile(r"\b(?:healthy|all (?:pods? )?(?:are |is )?running)\b", re.IGNORECASE)
+_PROBLEM_CONDITION = re.compile(
+    r"\b(?:errors?|fail\w*|issues?|problems?|unhealthy|crash\w*|broken|down|degraded)\b", re.IGNORECASE
+)
+
+Predicate = Callable[[StepFacts], bool]
+
+
+@lru_cache(maxsize=1024)
+def compile_condition(condition: Optional[str]) -> Predicate:
+    """Parse a condition string once into a predicate over StepFacts"""
+    if not condition:
+        return lambda facts: True
+
+    comparisons: List[Predicate] = []
+    for match in _COMPARISON.finditer(condition):
+        metric = match.group("metric").lower()
+        key = _METRIC_ALIASES.get(metric, metric)
+        op = _OPS[match.group("op")]
+        value = float(match.group("value"))
+        comparisons.append(lambda facts, key=key, op=op, value=value: op(facts.get(key), value))
+    if comparisons:
+        # "restarts > 3 and failed > 0" style conditions: every comparison must hold
+        return lambda facts: all(predicate(facts) for predicate in comparisons)
+
+    if _NOT_HEALTHY_CONDITION.search(condition):
+        return lambda facts: facts.problems > 0
+    if _NEGATED_CONDITION.search(condition) or _HEALTHY_CONDITION.search(condition):
+        return lambda facts: facts.problems == 0
+    if _PROBLEM_CONDITION.search(condition):
+        return lambda facts: facts.problems > 0
+
+    # Unknown conditions keep the previous behaviour: execute the step
+    return lambda facts: True
+
+
+class ConditionEngine:
+    """Evaluates compiled conditions, sharing extracted facts across many workflows.
+
+    ``decide`` queues a check and evaluates every check the running workflows made
+    in the same event loop turn as one batch, so concurrent workflows that got the
+    same output (one incident's alert windows, say) have it scanned only once.
+    """
+
+    def __init__(self):
+        self.pending: List[Tuple[Optional[str], Any, asyncio.Future]] = []
+
+    def facts(self, result: Any) -> StepFacts:
+        if isinstance(result, StepFacts):
+            return result
+        return StepFacts.from_text(result)
+
+    def evaluate(self, condition: Optional[str], result: Any) -> bool:
+        return compile_condition(condition)(self.facts(result))
+
+    def evaluate_batch(self, items: Iterable[Tuple[Optional[str], Any]]) -> List[bool]:
+        """Evaluate (condition, previous result) pairs; each distinct output is scanned once"""
+        scanned: Dict[str, StepFacts] = {}
+        decisions = []
+        for condition, result in items:
+            if isinstance(result, str):
+                facts = scanned.get(result)
+                if facts is None:
+                    facts = scanned[result] = StepFacts.from_text(result)
+            else:
+                facts = self.facts(result)
+            decisions.append(compile_condition(condition)(facts))
+        return decisions
+
+    async def decide(self, condition: Optional[str], result: Any) -> bool:
+        """``evaluate`` as part of the batch of checks made in this event loop turn"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((condition, result, future))
+        if len(self.pending) == 1:
+            loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        pending, self.pending = self.pending, []
+        try:
+            decisions = self.evaluate_batch((condition, result) for condition, result, _ in pending)
+        except Exception as e:
+            decisions = [e] * len(pending)
+        for (_, _, future), decision in zip(pending, decisions):
+            if future.done():  # The workflow was cancelled meanwhile
+                continue
+            if isinstance(decision, Exception):
+                future.set_exception(decision)
+            else:
+                future.set_result(decision)
+
+
+# (condition, step output or facts, expected decision); run this module to check them
+EXAMPLES = [
+    ("if errors found", "web-1 CrashLoopBackOff", True),
+    ("if errors found", "All 3 pods are Running, no errors", False),
+    ("if no errors found", "All 3 pods are Running, no errors", True),
+    ("if no pods have errors", "web-1 CrashLoopBackOff", False),
+    ("if all pods running", "All 3 pods are Running", True),
+    ("if all pods running", "web-1 CrashLoopBackOff", False),
+    ("if healthy", "web-1 Running", True),
+    ("if any pod is not healthy", "web-1 Running", False),
+    ("if any pod is not healthy", "web-1 CrashLoopBackOff", True),
+    ("if not all pods running", "web-1 Running, web-2 Running", False),
+    ("if not all pods running", "web-1 Running, web-2 CrashLoopBackOff", True),
+    ("if pods are unhealthy", "web-1 Pending", True),
+    ("restarts > 3", "web-1 Running 5 restarts", True),
+    ("failed pods > 0", "web-1 Running", False),
+    ("if errors found", StepFacts.from_counts({"Running": 3, "CreateContainerConfigError": 1}), True),
+    ("if errors found", StepFacts.from_counts({"Running": 3, "restarts": 7}), False),
+]
+
+
+if __name__ == "__main__":
+    engine = ConditionEngine()
+    wrong = [(condition, output) for condition, output, expected in EXAMPLES
+             if engine.evaluate(condition, output) != expected]
+    for condition, output in wrong:
+        print(f"wrong decision: {condition!r} on {output!r}")
+    print(f"{len(EXAMPLES) - len(wrong)}/{len(EXAMPLES)} condition examples decided correctly")
+    raise SystemExit(1 if wrong else 0)
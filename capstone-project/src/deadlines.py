@@ -0,0 +1,67 @@
+"""Deadline propagation helpers shared by the agent host and the A2A executors"""
+
+import os
+import time
+import asyncio
+from typing import Any, Dict, Optional
+
+# Key used in A2A message metadata to carry the absolute deadline (epoch seconds)
+DEADLINE_METADATA_KEY = "deadline"
+
+# Default budgets in seconds, overridable through the environment
+WORKFLOW_TIMEOUT = float(os.environ.get("WORKFLOW_TIMEOUT", "180"))
+STEP_TIMEOUT = float(os.environ.get("STEP_TIMEOUT", "90"))
+PLANNING_TIMEOUT = float(os.environ.get("PLANNING_TIMEOUT", "20"))
+AGENT_TIMEOUT = float(os.environ.get("AGENT_TIMEOUT", "90"))
+TOOL_TIMEOUT = float(os.environ.get("TOOL_TIMEOUT", "30"))
+
+# Never hand out a budget smaller than this, so a nearly expired deadline still fails fast
+MIN_BUDGET = 0.05
+
+
+class Deadline:
+    """Absolute wall-clock deadline that can be split into per-step budgets"""
+
+    def __init__(self, timeout: float):
+        self.expires_at = time.time() + timeout
+
+    @classmethod
+    def at(cls, expires_at: float) -> "Deadline":
+        deadline = cls(0)
+        deadline.expires_at = expires_at
+        return deadline
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.time(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def budget(self, cap: Optional[float] = None) -> float:
+        """Seconds available for the next operation, optionally capped by a per-step budget"""
+        remaining = self.remaining()
+        if cap is not None:
+            remaining = min(remaining, cap)
+        return max(remaining, MIN_BUDGET)
+
+    def child(self, cap: float) -> "Deadline":
+        """Deadline for a sub-operation: the earlier of our deadline and now + cap"""
+        return Deadline.at(min(self.expires_at, time.time() + cap))
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {DEADLINE_METADATA_KEY: self.expires_at}
+
+
+def deadline_from_metadata(metadata: Optional[Dict[str, Any]], default_timeout: float) -> Deadline:
+    """Read the caller's deadline from A2A metadata, bounded by our own default budget"""
+    local = Deadline(default_timeout)
+    try:
+        expires_at = float((metadata or {}).get(DEADLINE_METADATA_KEY))
+    except (TypeError, ValueError):
+        return local
+    return Deadline.at(min(expires_at, local.expires_at))
+
+
+async def run_with_deadline(coro, deadline: Deadline, cap: Optional[float] = None):
+    """Await a coroutine, raising asyncio.TimeoutError once the budget is spent"""
+    return await asyncio.wait_for(coro, timeout=deadline.budget(cap))
@@ -0,0 +1,75 @@
+"""Execution policy - bounds on the model/tool loop of the executors' LangChain agents"""
+
+import os
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain.agents.middleware import ModelCallLimitMiddleware, ToolCallLimitMiddleware
+
+AGENT_MAX_MODEL_CALLS = int(os.environ.get("AGENT_MAX_MODEL_CALLS", "6"))
+AGENT_MAX_TOOL_CALLS = int(os.environ.get("AGENT_MAX_TOOL_CALLS", "12"))
+# Tool calls from one model turn that run at the same time
+AGENT_MAX_PARALLEL_TOOLS = int(os.environ.get("AGENT_MAX_PARALLEL_TOOLS", "4"))
+
+PARALLEL_TOOLS_HINT = (
+    "When several tool calls do not depend on each other (for example the same query in "
+    "different namespaces), request them together in one turn; they run concurrently."
+)
+FINAL_ANSWER_PROMPT = (
+    "Answer the original request now, using only the tool results above. Do not call any more tools."
+)
+
+
+def require_answer(response: Any) -> Any:
+    """The agent run or answer turn if it ends with a final answer; ValueError otherwise (grounds to escalate)"""
+    messages = response.get("messages", []) if isinstance(response, dict) else [response]
+    last = messages[-1] if messages else None
+    if not isinstance(last, AIMessage) or last.tool_calls or not last.text.strip():
+        raise ValueError("no final answer")
+    if last.text.startswith("Model call limits exceeded"):
+        raise ValueError("model call budget spent")
+    return response
+
+
+def answer_turn(response: Any) -> List[Any]:
+    """Prompt for one tool-free answer turn over an agent run that ended without an answer"""
+    messages = list(response.get("messages", []))
+    # Its trailing model turns (unanswered tool calls, the call-limit notice) are what failed
+    while messages and isinstance(messages[-1], AIMessage):
+        messages.pop()
+    return messages + [HumanMessage(FINAL_ANSWER_PROMPT)]
+
+
+def with_answer(run: Any, response: Any) -> Any:
+    """The agent run, ending with the escalated answer turn when there was one"""
+    if response is run:
+        return run
+    return {**run, "messages": answer_turn(run) + [response]}
+
+
+class ExecutionPolicy:
+    """Per-request limits: model turns, tool calls and tool concurrency.
+
+    The wall-clock budget is the request deadline the executors already enforce.
+    """
+
+    def __init__(self, max_model_calls: int = AGENT_MAX_MODEL_CALLS, max_tool_calls: int = AGENT_MAX_TOOL_CALLS,
+                 max_parallel_tools: int = AGENT_MAX_PARALLEL_TOOLS):
+        self.max_model_calls = max_model_calls
+        self.max_tool_calls = max_tool_calls
+        self.max_parallel_tools = max_parallel_tools
+
+    def middleware(self) -> List[Any]:
+        return [
+            # Out of model turns: stop and return what the agent has so far
+            ModelCallLimitMiddleware(run_limit=self.max_model_calls, exit_behavior="end"),
+            # Out of tool calls: further calls are refused and the model has to answer
+            ToolCallLimitMiddleware(run_limit=self.max_tool_calls, exit_behavior="continue"),
+        ]
+
+    def config(self) -> Dict[str, Any]:
+        """Run config for ainvoke; the recursion limit is only a backstop behind the middleware"""
+        return {
+            "recursion_limit": 4 * self.max_model_calls + 5,
+            "max_concurrency": self.max_parallel_tools,
+        }
@@ -1,59 +1,153 @@
 """A2A Agent Executor for MCP Kubernetes Agent"""
 
-import os
 import asyncio
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import create_agent
+from datetime import timedelta
+from typing import Optional
 from langchain_mcp_adapters.tools import load_mcp_tools
 from mcp.client.streamable_http import streamablehttp_client
 from mcp import ClientSession
 
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
 from a2a.utils import new_agent_text_message
 
+from cluster_cache import CLUSTER_CACHE_RESYNC, ClusterCache, ClusterSync, cache_tools
+from execution_policy import PARALLEL_TOOLS_HINT, ExecutionPolicy, answer_turn, require_answer, with_answer
+from model_router import ModelRouter
+from prompt_assembly import PromptAssembler, SkillRouter
+from tool_index import ToolIndex
+from structured_results import extract_k8s_data, result_message
+from deadlines import AGENT_TIMEOUT, TOOL_TIMEOUT, Deadline, deadline_from_metadata, run_with_deadline
+from resilience import CircuitBreaker, CircuitOpenError
+
+
+# Tool groups per topic; a request only gets the groups its wording mentions
+K8S_TOOL_SKILLS = {
+    "pods": {
+        "keywords": ["pod", "pods", "container", "containers", "crash", "crashing", "restart", "restarts",
+                     "running", "pending", "health", "healthy", "unhealthy", "status", "errors", "failing"],
+        "tools": ["pods_*", "cached_pods_*", "cached_cluster_health"],
+    },
+    "logs": {"keywords": ["log", "logs", "exec"], "tools": ["pods_log", "pods_exec", "pods_list*"]},
+    "events": {"keywords": ["event", "events", "warning", "warnings", "why"],
+               "tools": ["events_*", "cached_warning_events"]},
+    "namespaces": {"keywords": ["namespace", "namespaces", "project", "projects"],
+                   "tools": ["namespaces_*", "projects_*"]},
+    "nodes": {"keywords": ["node", "nodes", "cpu", "memory", "capacity", "usage", "top"],
+              "tools": ["nodes_*", "pods_top", "resources_list", "resources_get", "cached_cluster_health"]},
+    "resources": {"keywords": ["deployment", "deployments", "service", "services", "configmap", "configmaps",
+                               "ingress", "secret", "secrets", "replica", "replicas", "resource", "resources",
+                               "statefulset", "daemonset", "job", "jobs", "cronjob"],
+                  "tools": ["resources_*", "cached_cluster_health"]},
+    "helm": {"keywords": ["helm", "chart", "charts", "release", "releases"], "tools": ["helm_*"]},
+    "config": {"keywords": ["kubeconfig", "context", "contexts", "config"], "tools": ["configuration_*"]},
+}
+
+
+class BreakerSession(ClientSession):
+    """MCP session whose tool calls go through a circuit breaker.
+
+    Only calls that reach the MCP server count; model errors, the caller's
+    deadline and the cached tools never touch the breaker.
+    """
+
+    def __init__(self, *args, breaker: CircuitBreaker, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = breaker
+
+    async def call_tool(self, *args, **kwargs):
+        self.breaker.guard()
+        try:
+            result = await super().call_tool(*args, **kwargs)
+        except asyncio.CancelledError:
+            self.breaker.release_probe()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
 
 class MCPAgentExecutor(AgentExecutor):
     """A2A Agent Executor for MCP Kubernetes Agent"""
 
     def __init__(self):
-        # Initialize model
-        self.model = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash-lite",
-            api_key=os.environ.get("GEMINI_API_KEY")
-        )
+        # Model tiers: simple tool turns on the cheap model, escalation when it fails
+        self.models = ModelRouter()
         
         # MCP server configuration
         self.server_params = {
             "url": "http://127.0.0.1:8080/mcp"
         }
+        # Stop sending work to a failing MCP server instead of waiting on it every time
+        self.mcp_breaker = CircuitBreaker(self.server_params["url"])
         
-        self.agent = None
+        self.prompts = None  # PromptAssembler once the MCP tools are loaded
+        self.policy = ExecutionPolicy()
         self.session = None
         self.client_context = None
+        # Local cluster snapshot for health questions; CLUSTER_CACHE_RESYNC=0 disables it
+        self.cluster_cache = ClusterCache() if CLUSTER_CACHE_RESYNC > 0 else None
+        self.cluster_sync = None
+        self.running_tasks = {}  # task_id -> running LangChain invocation
 
-    async def _initialize_agent(self):
+    async def _initialize_agent(self, deadline: Optional[Deadline] = None):
         """Initialize the agent with MCP tools"""
-        if self.agent is None:
+        if self.prompts is None:
+            self.mcp_breaker.guard()
+            connected = False
             try:
                 # Keep the client context and session alive
                 self.client_context = streamablehttp_client(**self.server_params)
                 read, write, _ = await self.client_context.__aenter__()
                 
-                self.session = ClientSession(read, write)
+                # Bound every MCP tool call so a slow API server cannot hang the agent
+                self.session = BreakerSession(
+                    read, write, read_timeout_seconds=timedelta(seconds=TOOL_TIMEOUT), breaker=self.mcp_breaker
+                )
                 await self.session.__aenter__()
                 await self.session.initialize()
                 
                 # Load MCP tools from Kubernetes server
                 tools = await load_mcp_tools(self.session)
+                self.mcp_breaker.record_success()
+                connected = True
+                system_prompt = (
+                    "You are a helpful AI assistant with access to Kubernetes cluster information. "
+                    + PARALLEL_TOOLS_HINT
+                )
+                
+                # Cached read tools answer common health questions without an API server round trip
+                if self.cluster_cache is not None:
+                    if self.cluster_sync is None:
+                        self.cluster_sync = ClusterSync.for_session(self.cluster_cache, self.session)
+                        await self.cluster_sync.start(initial_timeout=TOOL_TIMEOUT)
+                    tools = cache_tools(self.cluster_cache) + tools
+                    system_prompt += (
+                        " Prefer the cached_* tools for pod status and health questions;"
+                        " use the live tools when they report stale data or for anything else."
+                    )
                 
-                # Create agent with Kubernetes MCP tools
-                self.agent = create_agent(
-                    model=self.model,
-                    tools=tools,
-                    system_prompt="You are a helpful AI assistant with access to Kubernetes cluster information."
+                # Agent graphs over a canonical prefix, bound to the top-k tools each request needs
+                self.prompts = PromptAssembler(
+                    self.models.model(), system_prompt, tools, "kubernetes",
+                    router=ToolIndex(router=SkillRouter(K8S_TOOL_SKILLS)),
+                    middleware=self.policy.middleware(),
                 )
+            except asyncio.CancelledError:
+                # The MCP client reports a refused connection by cancelling us; only the
+                # caller's deadline running out is not the server's fault
+                if not connected and deadline is not None and deadline.expired():
+                    self.mcp_breaker.release_probe()
+                elif not connected:
+                    self.mcp_breaker.record_failure()
+                raise
             except Exception as e:
+                # Later failures (the cluster cache's first sync) went through the session's breaker
+                if not connected:
+                    self.mcp_breaker.record_failure()
                 import traceback
                 full_error = traceback.format_exc()
                 print(f"Failed to initialize MCP agent: {e}")
@@ -66,15 +160,21 @@ class MCPAgentExecutor(AgentExecutor):
         # Access messages from context
         user_message = context.message.parts[0].root.text
         print(f"User message: '{user_message}'")
+        deadline = deadline_from_metadata(context.metadata, AGENT_TIMEOUT)
+        task = None
 
         try:
-            # Initialize agent if not already done
-            await self._initialize_agent()
+            # Initialize agent if not already done; MCP calls go through the breaker themselves
+            await run_with_deadline(self._initialize_agent(deadline), deadline)
             
-            response = await self.agent.ainvoke({"messages": [{"role": "user", "content": user_message}]})
+            # Run the agent as a task so cancel() can stop it
+            task = asyncio.ensure_future(self._run_agent(user_message))
+            self.running_tasks[context.task_id] = task
+            response = await run_with_deadline(task, deadline)
             print(f"Response: {response}")
 
             # Extract the final AI message content
+            data = None
             if isinstance(response, dict) and "messages" in response:
                 # Get the last AI message
                 messages = response["messages"]
@@ -84,26 +184,71 @@ class MCPAgentExecutor(AgentExecutor):
                         break
                 else:
                     result = "Task completed successfully"
+                # Typed payload from the tool results, so the host needn't re-parse prose
+                data = extract_k8s_data(messages)
             else:
                 result = str(response)
 
-            await event_queue.enqueue_event(new_agent_text_message(result))
+            await event_queue.enqueue_event(result_message(result, data))
+        except CircuitOpenError:
+            error_msg = f"Error: Kubernetes MCP server at {self.server_params['url']} is failing, circuit open"
+            print(error_msg)
+            await event_queue.enqueue_event(new_agent_text_message(error_msg))
+        except asyncio.TimeoutError:
+            error_msg = "Error: Kubernetes agent exceeded the request deadline"
+            print(error_msg)
+            await event_queue.enqueue_event(new_agent_text_message(error_msg))
+        except asyncio.CancelledError:
+            # cancel() unregisters the task before cancelling it; anything else is a shutdown
+            if task is None or self.running_tasks.get(context.task_id) is task:
+                raise
+            print("Agent invocation cancelled")
         except Exception as e:
             import traceback
             full_error = traceback.format_exc()
-            error_msg = f"MCP connection failed. Please ensure the Kubernetes MCP server is running at {self.server_params['url']}. Error: {str(e)}"
+            if self.prompts is None:
+                error_msg = f"Error: MCP connection failed. Please ensure the Kubernetes MCP server is running at {self.server_params['url']}. Error: {str(e)}"
+            else:
+                error_msg = f"Error: Kubernetes agent failed: {str(e)}"
             print(f"Agent invocation failed: {error_msg}")
             print(f"Full traceback: {full_error}")
             await event_queue.enqueue_event(new_agent_text_message(error_msg))
+        finally:
+            if task is not None and self.running_tasks.get(context.task_id) is task:
+                del self.running_tasks[context.task_id]
+
+    async def _run_agent(self, user_message):
+        """Agent run on the cheapest model tier; without a final answer only the answer turn is escalated"""
+        run = None
+
+        async def attempt(model):
+            nonlocal run
+            if run is not None:
+                # Stronger tiers answer from the tool results already gathered instead of redoing them
+                return await model.ainvoke(answer_turn(run))
+            agent, tools = self.prompts.agent_for(user_message, model)
+            run = await agent.ainvoke(
+                {"messages": [{"role": "user", "content": user_message}]}, config=self.policy.config()
+            )
+            self.prompts.report(tools, run)
+            return run
+
+        response = await self.models.run("agent", attempt, require_answer, best_effort=True)
+        return with_answer(run, response)
 
     async def cancel(self, context, event_queue):
-        """Cancel is not supported"""
-        raise Exception("cancel not supported")
+        """Cancel the running LangChain invocation for this task"""
+        task = self.running_tasks.pop(context.task_id, None)
+        if task is not None:
+            task.cancel()
+        await TaskUpdater(event_queue, context.task_id, context.context_id).cancel()
     
     async def __aenter__(self):
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.cluster_sync:
+            await self.cluster_sync.stop()
         if self.session:
             await self.session.__aexit__(exc_type, exc_val, exc_tb)
         if self.client_context:
@@ -1,15 +1,23 @@
 #!/usr/bin/env python3
 """A2A MCP Kubernetes Agent Server"""
 
+import os
+import argparse
+
 import uvicorn
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentCapabilities, AgentCard, AgentSkill
-from k8s_agent_executor import MCPAgentExecutor
+from lazy_loading import LazyAgentExecutor
 
 
 def main():
+    # Replicas run on separate ports, e.g. --port 8890 for a second instance
+    parser = argparse.ArgumentParser(description="Kubernetes Monitoring A2A Agent")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("K8S_AGENT_PORT", "8889")))
+    args = parser.parse_args()
+
     # Define agent skill for Kubernetes monitoring
     monitor_k8s_skill = AgentSkill(
         id='monitor_kubernetes',
@@ -23,17 +31,21 @@ def main():
     agent_card = AgentCard(
         name='Kubernetes Monitoring Agent',
         description='A Kubernetes cluster monitoring agent that provides real-time insights into cluster resources and status',
-        url='http://localhost:8889/',
+        url=f'http://localhost:{args.port}/',
         version='1.0.0',
         default_input_modes=['text'],
-        default_output_modes=['text'],
+        default_output_modes=['text', 'data'],
         capabilities=AgentCapabilities(streaming=True),
         skills=[monitor_k8s_skill],
     )
 
+    # The executor module pulls in LangChain, Gemini and MCP; it is built in the background
+    # so the port binds and the agent card is served right away
+    agent_executor = LazyAgentExecutor("k8s_agent_executor:MCPAgentExecutor")
+
     # Create request handler
     request_handler = DefaultRequestHandler(
-        agent_executor=MCPAgentExecutor(),
+        agent_executor=agent_executor,
         task_store=InMemoryTaskStore(),
     )
 
@@ -43,12 +55,12 @@ def main():
         http_handler=request_handler,
     )
 
-    print("Starting Kubernetes Monitoring A2A Agent on http://localhost:8889")
-    print("Agent Card will be available at: http://localhost:8889/.well-known/agent")
+    print(f"Starting Kubernetes Monitoring A2A Agent on http://localhost:{args.port}")
+    print(f"Agent Card will be available at: http://localhost:{args.port}/.well-known/agent-card.json")
 
 
-    app = server.build()
-    uvicorn.run(app, host="0.0.0.0", port=8889) 
+    app = server.build(lifespan=agent_executor.lifespan)
+    uvicorn.run(app, host="0.0.0.0", port=args.port) 
 
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+"""Lazy loading - keep LangChain, Gemini and MCP imports off the startup path"""
+
+import asyncio
+import importlib
+import threading
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+from a2a.server.agent_execution import AgentExecutor
+
+
+def preload(*modules: str) -> threading.Thread:
+    """Import modules in a daemon thread, so their first real use finds them in sys.modules"""
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception as e:  # The real import reports it again where it matters
+                print(f"⚠️  Preloading {name} failed: {e!r}")
+
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
+
+
+class LazyAgentExecutor(AgentExecutor):
+    """Stands in for an executor whose module is expensive to import.
+
+    ``factory`` is "module:Class". The server can bind and serve its agent card
+    right away; ``warm_up`` builds the real executor in a background thread, and
+    the first request waits for it if it is not ready yet.
+    """
+
+    def __init__(self, factory: str):
+        self.factory = factory
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def _build(self) -> Any:
+        module, _, name = self.factory.partition(":")
+        return getattr(importlib.import_module(module), name)()
+
+    def warm_up(self) -> Future:
+        """Start building the executor (once) without blocking the caller"""
+        with self._lock:
+            if self._future is None:
+                self._future = Future()
+                threading.Thread(target=self._run, name=f"warm-up {self.factory}", daemon=True).start()
+            return self._future
+
+    def _run(self):
+        try:
+            self._future.set_result(self._build())
+            print(f"✓ {self.factory} ready")
+        except BaseException as e:
+            self._future.set_exception(e)
+
+    async def executor(self) -> Any:
+        future = self.warm_up()
+        try:
+            return await asyncio.wrap_future(future)
+        except Exception:
+            # Let the next request try again instead of failing forever
+            with self._lock:
+                if self._future is future:
+                    self._future = None
+            raise
+
+    async def execute(self, context, event_queue):
+        executor = await self.executor()
+        await executor.execute(context, event_queue)
+
+    async def cancel(self, context, event_queue):
+        executor = await self.executor()
+        await executor.cancel(context, event_queue)
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        """Starlette lifespan that starts the warm-up as the server starts"""
+        self.warm_up()
+        yield
@@ -0,0 +1,137 @@
+"""Client-side load balancing across replicas of an agent"""
+
+import os
+import time
+import random
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional
+
+from resilience import CircuitBreaker, CircuitOpenError
+
+# Per-replica concurrency limit and passive health-check settings
+REPLICA_MAX_IN_FLIGHT = int(os.environ.get("REPLICA_MAX_IN_FLIGHT", "16"))
+EJECTION_FAILURE_THRESHOLD = int(os.environ.get("EJECTION_FAILURE_THRESHOLD", "3"))
+EJECTION_BASE_TIME = float(os.environ.get("EJECTION_BASE_TIME", "30"))
+EJECTION_MAX_TIME = float(os.environ.get("EJECTION_MAX_TIME", "300"))
+EJECTION_MAX_PERCENT = float(os.environ.get("EJECTION_MAX_PERCENT", "50"))
+
+
+class Replica:
+    """One endpoint of an agent with its in-flight count and health state"""
+
+    def __init__(self, url: str, max_in_flight: int = REPLICA_MAX_IN_FLIGHT):
+        self.url = url
+        self.max_in_flight = max_in_flight
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.latency_ewma = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.breaker = CircuitBreaker(url)
+
+    def is_ejected(self, now: Optional[float] = None) -> bool:
+        return (now or time.monotonic()) < self.ejected_until
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejected": self.is_ejected(),
+            "latency_ewma": round(self.latency_ewma, 4),
+            "circuit": self.breaker.state,
+        }
+
+
+class ReplicaPool:
+    """Power-of-two-choices over least outstanding requests, with outlier ejection and circuit breakers"""
+
+    def __init__(self, agent_name: str, urls: Iterable[str],
+                 max_in_flight: int = REPLICA_MAX_IN_FLIGHT):
+        self.agent_name = agent_name
+        self.replicas = [Replica(url, max_in_flight) for url in urls]
+        if not self.replicas:
+            raise ValueError(f"Agent {agent_name} has no replica endpoints")
+
+    @property
+    def urls(self) -> List[str]:
+        return [replica.url for replica in self.replicas]
+
+    def candidates(self, exclude: Iterable[str] = ()) -> List[Replica]:
+        """Replicas eligible for traffic; falls back to all if every replica is ejected"""
+        excluded = set(exclude)
+        now = time.monotonic()
+        # Open circuits are never used: failing fast is their whole point
+        pool = [r for r in self.replicas if r.url not in excluded and r.breaker.available()]
+        healthy = [r for r in pool if not r.is_ejected(now)]
+        # Panic mode: better to try an ejected replica than to fail outright
+        return healthy or pool
+
+    def pick(self, exclude: Iterable[str] = ()) -> Optional[Replica]:
+        candidates = self.candidates(exclude)
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = random.sample(candidates, 2)
+        return first if first.outstanding <= second.outstanding else second
+
+    def ordered(self) -> List[Replica]:
+        """All replicas, healthy and least loaded first (used for card discovery)"""
+        now = time.monotonic()
+        return sorted(self.replicas, key=lambda r: (r.is_ejected(now), r.outstanding))
+
+    def record_success(self, replica: Replica, latency: float):
+        replica.breaker.record_success()
+        replica.consecutive_failures = 0
+        replica.ejections = max(replica.ejections - 1, 0)  # Healthy replicas earn back shorter ejections
+        replica.latency_ewma = latency if not replica.latency_ewma else 0.8 * replica.latency_ewma + 0.2 * latency
+
+    def record_failure(self, replica: Replica):
+        replica.breaker.record_failure()
+        replica.failures += 1
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures < EJECTION_FAILURE_THRESHOLD or replica.is_ejected():
+            return
+
+        # Never eject more than the configured share of the pool
+        now = time.monotonic()
+        ejected = sum(1 for r in self.replicas if r.is_ejected(now))
+        if (ejected + 1) * 100 > EJECTION_MAX_PERCENT * len(self.replicas) and len(self.replicas) > 1:
+            return
+        replica.ejections += 1
+        replica.ejected_until = now + min(EJECTION_BASE_TIME * replica.ejections, EJECTION_MAX_TIME)
+        replica.consecutive_failures = 0
+        print(f"⚠️  Ejected {self.agent_name} replica {replica.url} for "
+              f"{replica.ejected_until - now:.0f}s after repeated failures")
+
+    @asynccontextmanager
+    async def acquire(self, exclude: Iterable[str] = ()):
+        """Reserve a slot on the chosen replica and record the outcome passively"""
+        replica = self.pick(exclude)
+        if replica is None or not replica.breaker.allow():
+            raise CircuitOpenError(f"No replica of {self.agent_name} agent is accepting requests")
+
+        replica.outstanding += 1
+        replica.requests += 1
+        started = time.monotonic()
+        try:
+            async with replica.slots:
+                yield replica
+        except asyncio.CancelledError:
+            replica.breaker.release_probe()  # A cancelled call says nothing about health
+            raise
+        except Exception:
+            self.record_failure(replica)
+            raise
+        else:
+            self.record_success(replica, time.monotonic() - started)
+        finally:
+            replica.outstanding -= 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {replica.url: replica.stats() for replica in self.replicas}
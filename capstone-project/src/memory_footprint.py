@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Measure the memory held per 100k cluster objects in each representation"""
+
+import gc
+import json
+import argparse
+import tracemalloc
+
+from cluster_cache import EventRecord, PodRecord
+from structured_results import pod_from_object
+
+
+def sample_pod(i: int) -> dict:
+    """A pod as the MCP server returns it, trimmed to the fields the agent reads"""
+    return {
+        "apiVersion": "v1", "kind": "Pod",
+        "metadata": {
+            "name": f"web-{i // 3:05d}-{i:06d}", "namespace": f"team-{i % 40}",
+            "resourceVersion": str(1000000 + i),
+            "ownerReferences": [{"kind": "ReplicaSet", "name": f"web-{i // 3:05d}-5d9c7"}],
+        },
+        "spec": {"nodeName": f"node-{i % 50}"},
+        "status": {
+            "phase": "Running" if i % 20 else "Pending",
+            "containerStatuses": [{"ready": bool(i % 20), "restartCount": i % 4, "state": {"running": {}}}],
+        },
+    }
+
+
+def sample_event(i: int) -> dict:
+    return {
+        "metadata": {"namespace": f"team-{i % 40}"}, "type": "Warning", "reason": "BackOff",
+        "involvedObject": {"kind": "Pod", "name": f"web-{i // 3:05d}-{i:06d}"},
+        "message": "Back-off restarting failed container", "count": i % 7 + 1,
+        "lastTimestamp": "2025-01-01T12:00:00Z",
+    }
+
+
+def measure(build) -> int:
+    """Bytes still allocated after build() returns its objects"""
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+    n = args.count
+
+    # Source documents are decoded from JSON so no strings are shared with the generator
+    pods_json = json.dumps([sample_pod(i) for i in range(n)])
+    events_json = json.dumps([sample_event(i) for i in range(n)])
+
+    results = {
+        "pods: full JSON dicts": measure(lambda: json.loads(pods_json)),
+        "pods: compact dicts": measure(lambda: [pod_from_object(p) for p in json.loads(pods_json)]),
+        "pods: PodRecord": measure(lambda: [PodRecord.from_object(p) for p in json.loads(pods_json)]),
+        "events: full JSON dicts": measure(lambda: json.loads(events_json)),
+        "events: EventRecord": measure(lambda: [EventRecord(e) for e in json.loads(events_json)]),
+    }
+    print(f"{'representation':<26}{'MiB per ' + format(n, ','):>18}{'bytes/object':>15}")
+    for name, size in results.items():
+        print(f"{name:<26}{size / 2 ** 20:>18.1f}{size / n:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""In-process metrics: labelled counters and latency windows"""
+
+import math
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Optional, Tuple
+
+# Latency samples kept per series for percentile estimates
+LATENCY_WINDOW = 512
+
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, object]) -> SeriesKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format(key: SeriesKey) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+class Metrics:
+    """Counters and sliding latency windows keyed by name and labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[SeriesKey, float] = defaultdict(float)
+        self.latencies: Dict[SeriesKey, deque] = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        with self._lock:
+            self.counters[_key(name, labels)] += amount
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            self.latencies[_key(name, labels)].append(value)
+
+    def count(self, name: str, **labels) -> float:
+        return self.counters.get(_key(name, labels), 0)
+
+    def percentile(self, name: str, q: float, min_samples: int = 1, **labels) -> Optional[float]:
+        """q-th percentile (0-100) of the recent window, None with too few samples"""
+        with self._lock:
+            samples = sorted(self.latencies.get(_key(name, labels), ()))
+        if len(samples) < max(min_samples, 1):
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(q / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, object]:
+        """Counters plus p50/p95/p99 for every latency series"""
+        with self._lock:
+            counters = {_format(k): v for k, v in self.counters.items()}
+            windows = {k: sorted(v) for k, v in self.latencies.items() if v}
+        latencies = {}
+        for key, samples in windows.items():
+            pick = lambda q: samples[min(len(samples) - 1, max(0, math.ceil(q / 100 * len(samples)) - 1))]
+            latencies[_format(key)] = {
+                "count": len(samples), "p50": pick(50), "p95": pick(95), "p99": pick(99)
+            }
+        return {"counters": counters, "latencies": latencies}
+
+
+# Process-wide registry
+metrics = Metrics()
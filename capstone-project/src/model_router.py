@@ -0,0 +1,126 @@
+"""Model router - cheap model first, escalation to a stronger tier when the output fails validation"""
+
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from deadlines import Deadline, run_with_deadline
+from metrics import metrics
+
+# Ordered cheapest first: "name=model,name=model"
+MODEL_TIERS = os.environ.get("MODEL_TIERS", "fast=gemini-2.5-flash-lite,strong=gemini-2.5-flash")
+
+# List prices in USD per million (input, output) tokens, for cost accounting only
+MODEL_PRICES = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+
+def parse_tiers(spec: str) -> List[Tuple[str, str]]:
+    tiers = []
+    for item in spec.split(","):
+        name, _, model = item.strip().partition("=")
+        if name and model:
+            tiers.append((name.strip(), model.strip()))
+    if not tiers:
+        raise ValueError(f"No model tiers in {spec!r}")
+    return tiers
+
+
+def token_usage(response: Any) -> Tuple[int, int]:
+    """(input, output) tokens of a chat model reply or of every model turn in an agent run"""
+    messages = response.get("messages", []) if isinstance(response, dict) else [response]
+    input_tokens = output_tokens = 0
+    for message in messages:
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            input_tokens += usage.get("input_tokens", 0)
+            output_tokens += usage.get("output_tokens", 0)
+    return input_tokens, output_tokens
+
+
+def cost_usd(model_name: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model_name.rsplit("/", 1)[-1], (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class ModelRouter:
+    """Chat models by tier with per-tier latency, token and cost accounting.
+
+    ``run`` tries the cheapest tier first and moves up only when ``validate``
+    raises, e.g. a plan that is not valid JSON. Timeouts are not escalated:
+    a stronger model is slower, not faster.
+    """
+
+    def __init__(self, tiers: Optional[List[Tuple[str, str]]] = None, **model_kwargs):
+        self.tiers = tiers or parse_tiers(MODEL_TIERS)
+        self.model_kwargs = model_kwargs
+        self.models: Dict[str, Any] = {}
+        self.usage = {name: {"model": model, "calls": 0, "escalations": 0, "input_tokens": 0,
+                             "output_tokens": 0, "cost_usd": 0.0} for name, model in self.tiers}
+
+    def model(self, tier: Optional[str] = None) -> Any:
+        tier = tier or self.tiers[0][0]
+        if tier not in self.models:
+            from langchain_google_genai import ChatGoogleGenerativeAI  # Slow import, only needed once a model is used
+            self.models[tier] = ChatGoogleGenerativeAI(
+                model=self.usage[tier]["model"], api_key=os.environ.get("GEMINI_API_KEY"), **self.model_kwargs
+            )
+        return self.models[tier]
+
+    def _account(self, tier: str, task: str, elapsed: float, response: Any):
+        input_tokens, output_tokens = token_usage(response)
+        usage = self.usage[tier]
+        cost = cost_usd(usage["model"], input_tokens, output_tokens)
+        usage["calls"] += 1
+        usage["input_tokens"] += input_tokens
+        usage["output_tokens"] += output_tokens
+        usage["cost_usd"] += cost
+        metrics.inc("model_calls", tier=tier, task=task)
+        metrics.observe("model_seconds", elapsed, tier=tier)
+        print(f"Model {tier} ({usage['model']}) for {task}: {elapsed:.2f}s, "
+              f"{input_tokens}/{output_tokens} tokens, ${cost:.6f}")
+
+    async def run(self, task: str, call: Callable[[Any], Awaitable[Any]], validate: Callable[[Any], Any],
+                  best_effort: bool = False) -> Any:
+        """Result of ``validate(await call(model))`` from the first tier whose output passes.
+
+        With ``best_effort`` the last tier's output is returned even if it fails validation.
+        """
+        error = None
+        for index, (tier, _) in enumerate(self.tiers):
+            started = time.monotonic()
+            response = await call(self.model(tier))
+            self._account(tier, task, time.monotonic() - started, response)
+            try:
+                return validate(response)
+            except (ValueError, TypeError, KeyError) as e:
+                error = e
+                if index + 1 == len(self.tiers):
+                    if best_effort:
+                        return response
+                    break
+                self.usage[tier]["escalations"] += 1
+                metrics.inc("model_escalations", tier=tier, task=task)
+                print(f"↗️  {task} output from {tier} rejected ({e}), escalating to {self.tiers[index + 1][0]}")
+        raise error
+
+    async def ainvoke(self, prompt: Any, task: str, deadline: Deadline, timeout: Optional[float] = None,
+                      validate: Callable[[Any], Any] = lambda response: response) -> Any:
+        """One prompt through the tiers, each attempt bounded by the deadline"""
+        return await self.run(
+            task, lambda model: run_with_deadline(model.ainvoke(prompt), deadline, timeout), validate
+        )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tier calls, escalations, tokens, cost and latency percentiles"""
+        result = {}
+        for tier, _ in self.tiers:
+            stats = dict(self.usage[tier])
+            stats["cost_usd"] = round(stats["cost_usd"], 6)
+            for q in (50, 95):
+                stats[f"p{q}_seconds"] = metrics.percentile("model_seconds", q, tier=tier)
+            result[tier] = stats
+        return result
@@ -0,0 +1,203 @@
+"""Orchestrator cluster - N shared-nothing orchestrator processes behind one front, partitioned by incident"""
+
+import os
+import asyncio
+import multiprocessing
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from orchestrator_service import (
+    JOB_RETENTION, alert_incident_key, json_object, partition_of, request_incident_key, serve,
+)
+from plan_cache import PLAN_CACHE_DEFAULT
+
+ORCHESTRATOR_PROCESSES = int(os.environ.get("ORCHESTRATOR_PROCESSES", "1"))
+# Seconds a worker process may take to load agent cards and bind its port
+WORKER_START_TIMEOUT = float(os.environ.get("ORCHESTRATOR_WORKER_START_TIMEOUT", "60"))
+
+
+def _run_worker(index: int, count: int, port: int, workers: Optional[int], alerts_file: Optional[str]):
+    """Entry point of one orchestrator process: a full AgentHost and service on a loopback port"""
+    try:
+        asyncio.run(serve(port, workers, alerts_file, bind="127.0.0.1", partition=(index, count)))
+    except KeyboardInterrupt:
+        pass
+
+
+class OrchestratorCluster:
+    """Front that owns no workflow state and forwards each request to the process owning its incident.
+
+    Every process has its own event loop, AgentHost, caches and worker pool, so
+    JSON parsing and prompt building spread over cores. They share only local
+    files: the agent card cache, the plan cache and the workflow journal. A
+    process that dies is restarted and resumes its share of the journal.
+    """
+
+    def __init__(self, port: int, processes: int, workers: Optional[int] = None,
+                 alerts_file: Optional[str] = None):
+        self.ports = [port + 1 + i for i in range(processes)]
+        self.workers = workers
+        self.alerts_file = alerts_file
+        # Spawned, not forked: the parent's event loop and sockets must not leak into workers
+        self.mp = multiprocessing.get_context("spawn")
+        self.processes: List[Any] = [None] * processes
+        self.restarts = 0
+        self.owners: "OrderedDict[str, int]" = OrderedDict()  # request id -> process index
+        self.client: Optional[httpx.AsyncClient] = None
+        self.supervisor = None
+
+    def _start_process(self, index: int):
+        process = self.mp.Process(
+            target=_run_worker, name=f"orchestrator-{index}", daemon=True,
+            args=(index, len(self.ports), self.ports[index], self.workers, self.alerts_file),
+        )
+        process.start()
+        self.processes[index] = process
+
+    async def start(self):
+        self.client = httpx.AsyncClient(timeout=None)
+        # Workers inherit the environment: they share one plan cache unless PLAN_CACHE says otherwise ("" disables)
+        os.environ.setdefault("PLAN_CACHE", PLAN_CACHE_DEFAULT)
+        for index in range(len(self.ports)):
+            self._start_process(index)
+        await asyncio.gather(*(self._wait_ready(index) for index in range(len(self.ports))))
+        self.supervisor = asyncio.create_task(self._supervise())
+
+    async def _wait_ready(self, index: int):
+        url = f"http://127.0.0.1:{self.ports[index]}/metrics"
+        deadline = asyncio.get_running_loop().time() + WORKER_START_TIMEOUT
+        while asyncio.get_running_loop().time() < deadline:
+            if not self.processes[index].is_alive():
+                raise RuntimeError(f"orchestrator process {index} exited during startup")
+            try:
+                if (await self.client.get(url, timeout=1)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+        raise TimeoutError(f"orchestrator process {index} did not start within {WORKER_START_TIMEOUT}s")
+
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(1)
+            for index, process in enumerate(self.processes):
+                # Exit code 0 is a shutdown (e.g. Ctrl-C reaches every process), not a crash
+                if not process.is_alive() and process.exitcode != 0:
+                    print(f"⚠️  Orchestrator process {index} exited ({process.exitcode}), restarting")
+                    self.restarts += 1
+                    self._start_process(index)
+
+    async def stop(self):
+        if self.supervisor:
+            self.supervisor.cancel()
+        for process in self.processes:
+            if process and process.is_alive():
+                process.terminate()
+        await asyncio.gather(*(asyncio.to_thread(process.join, 10) for process in self.processes if process))
+        if self.client:
+            await self.client.aclose()
+
+    async def _forward(self, index: int, method: str, path: str, body: Any = None) -> httpx.Response:
+        return await self.client.request(method, f"http://127.0.0.1:{self.ports[index]}{path}", json=body)
+
+    async def _reply(self, index: int, method: str, path: str, body: Any = None) -> JSONResponse:
+        try:
+            response = await self._forward(index, method, path, body)
+        except httpx.TransportError as e:
+            return JSONResponse({"error": f"orchestrator process {index} unavailable: {e!r}"}, status_code=503)
+        return JSONResponse(response.json(), status_code=response.status_code)
+
+    async def handle_request(self, request: Request) -> JSONResponse:
+        """POST /requests - same body as a single orchestrator, plus an optional ``incident_key``"""
+        body = await json_object(request)
+        if body is None:
+            return JSONResponse({"error": "body must be a JSON object"}, status_code=400)
+        # The id is fixed here so status lookups know which process has the job
+        body["request_id"] = body.get("request_id") or uuid4().hex
+        index = partition_of(request_incident_key(body), len(self.ports))
+        self.owners[body["request_id"]] = index
+        self.owners.move_to_end(body["request_id"])
+        while len(self.owners) > JOB_RETENTION * len(self.ports):
+            self.owners.popitem(last=False)
+        return await self._reply(index, "POST", "/requests", body)
+
+    async def handle_job(self, request: Request) -> JSONResponse:
+        """GET /requests/{id}, asking every process when the id predates this front"""
+        job_id = request.path_params["job_id"]
+        index = self.owners.get(job_id)
+        if index is not None:
+            return await self._reply(index, "GET", f"/requests/{job_id}")
+        for index in range(len(self.ports)):
+            try:
+                response = await self._forward(index, "GET", f"/requests/{job_id}")
+            except httpx.TransportError:
+                continue
+            if response.status_code != 404:
+                return JSONResponse(response.json(), status_code=response.status_code)
+        return JSONResponse({"error": "unknown request id"}, status_code=404)
+
+    async def handle_alerts(self, request: Request) -> JSONResponse:
+        """POST /alerts - each alert group goes to the process owning that incident"""
+        body = await json_object(request)
+        alerts = body.get("alerts", []) if body is not None else None
+        if not isinstance(alerts, list) or not all(isinstance(alert, dict) for alert in alerts):
+            return JSONResponse({"error": "body must be an Alertmanager payload"}, status_code=400)
+        batches: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for alert in alerts:
+            batches[partition_of(alert_incident_key(alert), len(self.ports))].append(alert)
+
+        async def send(index: int, alerts: List[Dict[str, Any]]) -> Dict[str, int]:
+            try:
+                return (await self._forward(index, "POST", "/alerts", {"alerts": alerts})).json()
+            except httpx.TransportError:
+                return {"accepted": 0, "dropped": len(alerts)}
+
+        replies = await asyncio.gather(*(send(index, alerts) for index, alerts in batches.items()))
+        accepted = sum(reply.get("accepted", 0) for reply in replies)
+        dropped = sum(reply.get("dropped", 0) for reply in replies)
+        # 429 makes Alertmanager retry; repeated alerts are deduplicated within the window
+        return JSONResponse({"accepted": accepted, "dropped": dropped}, status_code=429 if dropped else 202)
+
+    async def handle_metrics(self, request: Request) -> JSONResponse:
+        async def snapshot(index: int) -> Any:
+            try:
+                return (await self._forward(index, "GET", "/metrics")).json()
+            except httpx.TransportError as e:
+                return {"error": repr(e)}
+
+        snapshots = await asyncio.gather(*(snapshot(index) for index in range(len(self.ports))))
+        return JSONResponse({
+            "processes": len(self.ports),
+            "restarts": self.restarts,
+            "workers": {str(port): data for port, data in zip(self.ports, snapshots)},
+        })
+
+    def build_app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/requests", self.handle_request, methods=["POST"]),
+            Route("/requests/{job_id}", self.handle_job, methods=["GET"]),
+            Route("/alerts", self.handle_alerts, methods=["POST"]),
+            Route("/metrics", self.handle_metrics, methods=["GET"]),
+        ])
+
+
+async def serve_cluster(port: int = 8000, processes: int = ORCHESTRATOR_PROCESSES, workers: Optional[int] = None,
+                        alerts_file: Optional[str] = None):
+    """Run ``processes`` orchestrator processes on port+1.. behind a front on ``port`` until interrupted"""
+    cluster = OrchestratorCluster(port, processes, workers, alerts_file)
+    await cluster.start()
+    print(f"\n🤖 Orchestrator front on http://localhost:{port} "
+          f"({processes} processes on ports {cluster.ports[0]}-{cluster.ports[-1]})")
+    config = uvicorn.Config(cluster.build_app(), host="0.0.0.0", port=port, log_level="warning")
+    try:
+        await uvicorn.Server(config).serve()
+    finally:
+        await cluster.stop()
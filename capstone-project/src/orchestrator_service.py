@@ -0,0 +1,244 @@
+"""Orchestrator service - HTTP front end that runs many AgentHost workflows concurrently"""
+
+import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from agent_autonomous import AgentHost, WorkflowContext
+from alert_ingest import AlertBatcher, group_key
+from metrics import metrics
+
+SERVICE_WORKERS = int(os.environ.get("ORCHESTRATOR_WORKERS", "8"))
+SERVICE_QUEUE_SIZE = int(os.environ.get("ORCHESTRATOR_QUEUE_SIZE", "256"))
+JOB_RETENTION = int(os.environ.get("ORCHESTRATOR_JOB_RETENTION", "1000"))
+
+
+def partition_of(key: str, partitions: int) -> int:
+    """Stable partition of a key; hash() is salted per process, so it cannot be used"""
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "big") % partitions
+
+
+def request_incident_key(body: Dict[str, Any]) -> str:
+    """Requests about the same incident share a key: an explicit ``incident_key``, else the normalised input"""
+    key, user_input = body.get("incident_key"), body.get("input")
+    if isinstance(key, str) and key:
+        return key
+    return " ".join(user_input.lower().split()) if isinstance(user_input, str) else ""
+
+
+def alert_incident_key(alert: Dict[str, Any]) -> str:
+    """Alerts of one group are one incident and must reach the same orchestrator process"""
+    return "/".join(group_key(alert))
+
+
+async def json_object(request: Request) -> Optional[Dict[str, Any]]:
+    """The request body as a JSON object; None when it is not valid JSON or not an object"""
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+class WorkflowJob:
+    """A queued request and, once finished, its outcome"""
+
+    def __init__(self, user_input: str, source: str, request_id: Optional[str] = None,
+                 incident_key: Optional[str] = None):
+        self.ctx = WorkflowContext(user_input, request_id, incident_key=incident_key)
+        self.source = source
+        self.status = "queued"
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.enqueued_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.done = asyncio.Event()
+
+    @property
+    def id(self) -> str:
+        return self.ctx.request_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "source": self.source,
+            "status": self.status,
+            "input": self.ctx.user_input,
+            "workflow": self.ctx.workflow,
+            "steps": self.ctx.history,
+            "result": self.result,
+            "error": self.error,
+            "seconds": round((self.finished_at or time.monotonic()) - self.enqueued_at, 3),
+        }
+
+
+class OrchestratorService:
+    """Bounded request queue drained by a fixed pool of workflow workers
+
+    ``partition`` is (index, count) when this is one of several orchestrator
+    processes (see orchestrator_cluster); it then only owns its share of the
+    interrupted workflows and of an alerts file.
+    """
+
+    def __init__(self, host: AgentHost, workers: int = SERVICE_WORKERS,
+                 queue_size: int = SERVICE_QUEUE_SIZE, partition: Optional[Tuple[int, int]] = None):
+        self.host = host
+        self.workers = workers
+        self.partition = partition
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.jobs: "OrderedDict[str, WorkflowJob]" = OrderedDict()  # Recent jobs for status lookups
+        self.worker_tasks = []
+        # Alerts are grouped per window so workflows scale with incidents, not raw alerts
+        self.batcher = AlertBatcher(self.submit)
+
+    async def start(self):
+        self.worker_tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        await self.batcher.start()
+        # Workflows a previous process died in the middle of continue from the journal; in a
+        # cluster only those of this partition, keyed as the front routed them, since the
+        # other processes are still running theirs
+        if self.host.journal:
+            for request_id, user_input, incident_key in self.host.journal.incomplete():
+                incident_key = incident_key or request_incident_key({"input": user_input})
+                if self.owns(incident_key):
+                    self.submit(user_input, source="resume", request_id=request_id, incident_key=incident_key)
+
+    def owns(self, key: str) -> bool:
+        return self.partition is None or partition_of(key, self.partition[1]) == self.partition[0]
+
+    async def stop(self):
+        await self.batcher.stop()
+        for task in self.worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+
+    def submit(self, user_input: str, source: str = "api", request_id: Optional[str] = None,
+               incident_key: Optional[str] = None) -> WorkflowJob:
+        """Queue a request; raises asyncio.QueueFull when the service is saturated
+
+        Resubmitting a request id that is still queued or running returns that job; a
+        finished or unknown one runs again, reusing the step results in the journal.
+        """
+        current = self.jobs.get(request_id) if request_id else None
+        if current and not current.done.is_set():
+            return current
+        job = WorkflowJob(user_input, source, request_id, incident_key)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            metrics.inc("service_rejected", source=source)
+            raise
+        metrics.inc("service_accepted", source=source)
+        self.jobs[job.id] = job
+        while len(self.jobs) > JOB_RETENTION:
+            self.jobs.popitem(last=False)
+        return job
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self.queue.get()
+            try:
+                metrics.observe("service_queue_seconds", time.monotonic() - job.enqueued_at)
+                if job.ctx.deadline.expired():
+                    # Waited in the queue past its whole budget; don't start work nobody awaits
+                    job.status = "expired"
+                    metrics.inc("service_jobs", outcome="expired")
+                    continue
+                job.status = "running"
+                job.result = await self.host.process_request(job.ctx.user_input, job.ctx)
+                job.status = "done"
+                metrics.inc("service_jobs", outcome="done")
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                metrics.inc("service_jobs", outcome="failed")
+            finally:
+                job.finished_at = time.monotonic()
+                metrics.observe("service_job_seconds", job.finished_at - job.enqueued_at)
+                job.done.set()
+                self.queue.task_done()
+
+    async def _reply(self, job: WorkflowJob, wait: bool) -> JSONResponse:
+        if wait:
+            await job.done.wait()
+            return JSONResponse(job.to_dict())
+        return JSONResponse(job.to_dict(), status_code=202)
+
+    async def handle_request(self, request: Request) -> JSONResponse:
+        """POST /requests {"input": "...", "wait": false, "request_id": optional, to retry or resume}"""
+        body = await json_object(request)
+        if body is None:
+            return JSONResponse({"error": "body must be a JSON object"}, status_code=400)
+        user_input = body.get("input")
+        user_input = user_input.strip() if isinstance(user_input, str) else ""
+        if not user_input:
+            return JSONResponse({"error": "input is required"}, status_code=400)
+        try:
+            job = self.submit(user_input, source="api", request_id=body.get("request_id"),
+                              incident_key=request_incident_key(body))
+        except asyncio.QueueFull:
+            return JSONResponse({"error": "orchestrator is saturated, retry later"}, status_code=429)
+        return await self._reply(job, bool(body.get("wait")))
+
+    async def handle_alerts(self, request: Request) -> JSONResponse:
+        """POST /alerts - Alertmanager webhook payload, batched into per-group workflows"""
+        body = await json_object(request)
+        alerts = body.get("alerts", []) if body is not None else None
+        if not isinstance(alerts, list) or not all(isinstance(alert, dict) for alert in alerts):
+            return JSONResponse({"error": "body must be an Alertmanager payload"}, status_code=400)
+        dropped = sum(1 for alert in alerts if not self.batcher.offer(alert))
+        # 429 makes Alertmanager retry; repeated alerts are deduplicated within the window
+        status_code = 429 if dropped else 202
+        return JSONResponse({"accepted": len(alerts) - dropped, "dropped": dropped}, status_code=status_code)
+
+    async def handle_job(self, request: Request) -> JSONResponse:
+        """GET /requests/{id}"""
+        job = self.jobs.get(request.path_params["job_id"])
+        if job is None:
+            return JSONResponse({"error": "unknown request id"}, status_code=404)
+        return JSONResponse(job.to_dict())
+
+    async def handle_metrics(self, request: Request) -> JSONResponse:
+        snapshot = self.host.metrics_snapshot()
+        snapshot["queue"] = {"depth": self.queue.qsize(), "capacity": self.queue.maxsize,
+                             "workers": self.workers}
+        snapshot["alert_buffer"] = {"depth": self.batcher.buffer.qsize(), "capacity": self.batcher.buffer.maxsize,
+                                    "open_groups": len(self.batcher.groups)}
+        return JSONResponse(snapshot)
+
+    def build_app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/requests", self.handle_request, methods=["POST"]),
+            Route("/requests/{job_id}", self.handle_job, methods=["GET"]),
+            Route("/alerts", self.handle_alerts, methods=["POST"]),
+            Route("/metrics", self.handle_metrics, methods=["GET"]),
+        ])
+
+
+async def serve(port: int = 8000, workers: Optional[int] = None, alerts_file: Optional[str] = None,
+                bind: str = "0.0.0.0", partition: Optional[Tuple[int, int]] = None):
+    """Run the orchestrator as an HTTP service until interrupted"""
+    async with AgentHost() as host:
+        service = OrchestratorService(host, workers or SERVICE_WORKERS, partition=partition)
+        await service.start()
+        print(f"\n🤖 Orchestrator service on http://localhost:{port} ({service.workers} workers)")
+        config = uvicorn.Config(service.build_app(), host=bind, port=port, log_level="warning")
+        ingest_task = None
+        if alerts_file:
+            accept = (lambda alert: service.owns(alert_incident_key(alert))) if partition else None
+            ingest_task = asyncio.create_task(service.batcher.ingest_ndjson(alerts_file, accept))
+        try:
+            await uvicorn.Server(config).serve()
+        finally:
+            if ingest_task:
+                ingest_task.cancel()
+            await service.stop()
@@ -0,0 +1,55 @@
+"""Plan cache - LLM workflow plans in a local SQLite file shared by every orchestrator process"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+# Opt-in: set PLAN_CACHE to a file, or run several orchestrator processes, which use PLAN_CACHE_DEFAULT
+PLAN_CACHE_DEFAULT = os.path.expanduser("~/.cache/unie-aiops/plan_cache.db")
+PLAN_CACHE = os.environ.get("PLAN_CACHE", "")
+PLAN_CACHE_TTL = float(os.environ.get("PLAN_CACHE_TTL", "600"))
+
+
+def plan_key(user_input: str, agents: Iterable[str]) -> str:
+    """Requests that differ only in case and whitespace, against the same agents, share a plan"""
+    normalized = " ".join(user_input.lower().split())
+    return hashlib.sha256(json.dumps([normalized, sorted(agents)]).encode()).hexdigest()
+
+
+class PlanCache:
+    """Workflow plans by request, expired after ``ttl`` seconds.
+
+    WAL mode lets every orchestrator process read while one writes, so a plan
+    made by any worker is reused by all of them.
+    """
+
+    def __init__(self, path: str = PLAN_CACHE_DEFAULT, ttl: float = PLAN_CACHE_TTL):
+        self.ttl = ttl
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS plans (key TEXT PRIMARY KEY, workflow TEXT NOT NULL, "
+                        "created REAL NOT NULL)")
+        self.db.execute("DELETE FROM plans WHERE created < ?", (time.time() - ttl,))
+
+    @classmethod
+    def from_env(cls) -> Optional["PlanCache"]:
+        return cls(PLAN_CACHE) if PLAN_CACHE and PLAN_CACHE_TTL > 0 else None
+
+    def get(self, user_input: str, agents: Iterable[str]) -> Optional[List[Dict[str, Any]]]:
+        row = self.db.execute(
+            "SELECT workflow FROM plans WHERE key = ? AND created >= ?",
+            (plan_key(user_input, agents), time.time() - self.ttl),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, user_input: str, agents: Iterable[str], workflow: List[Dict[str, Any]]):
+        self.db.execute(
+            "INSERT OR REPLACE INTO plans (key, workflow, created) VALUES (?, ?, ?)",
+            (plan_key(user_input, agents), json.dumps(workflow), time.time()),
+        )
@@ -0,0 +1,179 @@
+"""Plan parser - incremental, tolerant parsing of the planner's JSON workflow with step validation"""
+
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_LITERALS = {"None": "null", "True": "true", "False": "false", "null": "null", "true": "true", "false": "false"}
+_CLOSERS = {"{": "}", "[": "]"}
+_DANGLING = re.compile(r"""(,\s*(["']?)\w+\2\s*:?)?\s*,?\s*$""")
+# Conditions the planner writes when it means "always run"
+_NO_CONDITION = {"", "null", "none", "always"}
+STEP_KEYS = ("agent", "action", "condition")
+
+
+class PlanError(ValueError):
+    """The planner's output holds no usable workflow step"""
+
+
+def repair_json(text: str) -> str:
+    """Rewrite common LLM JSON defects into strict JSON.
+
+    Handles single-quoted strings, unquoted keys, Python literals (None/True/False)
+    and trailing commas; anything else is left for json.loads to reject.
+    """
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in "\"'":
+            # Re-emit every string double-quoted
+            quote, i, chars = ch, i + 1, []
+            while i < n and text[i] != quote:
+                if text[i] == "\\" and i + 1 < n:
+                    escaped = text[i + 1]
+                    chars.append(escaped if escaped == "'" else "\\" + escaped)
+                    i += 2
+                    continue
+                chars.append('\\"' if text[i] == '"' else text[i])
+                i += 1
+            out.append('"' + "".join(chars) + '"')
+            i += 1
+            continue
+        word = _WORD.match(text, i)
+        if word:
+            token = word.group()
+            rest = text[word.end():].lstrip()
+            if rest.startswith(":"):
+                out.append(json.dumps(token))
+            else:
+                out.append(_LITERALS.get(token, token))
+            i = word.end()
+            continue
+        if ch in "}]":
+            # Drop a trailing comma before the closer
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def validate_step(step: Any, agents: Iterable[str]) -> Dict[str, Any]:
+    """A step with agent/action/condition (and a boolean "idempotent", if given), normalised;
+    PlanError if it does not fit"""
+    if not isinstance(step, dict):
+        raise PlanError(f"step is not an object: {step!r}")
+    agent = step.get("agent")
+    if not isinstance(agent, str) or agent.strip().lower() not in agents:
+        raise PlanError(f"unknown agent {agent!r}")
+    action = step.get("action")
+    if not isinstance(action, str) or not action.strip():
+        raise PlanError(f"step for {agent} has no action")
+    condition = step.get("condition")
+    if isinstance(condition, str) and condition.strip().lower() in _NO_CONDITION:
+        condition = None
+    if condition is not None and not isinstance(condition, str):
+        raise PlanError(f"condition must be text or null: {condition!r}")
+    validated = {"agent": agent.strip().lower(), "action": action.strip(), "condition": condition}
+    # Marks a step safe to hedge and to retry without an idempotency key (AgentHost._is_idempotent)
+    if isinstance(step.get("idempotent"), bool):
+        validated["idempotent"] = step["idempotent"]
+    return validated
+
+
+class PlanParser:
+    """Feeds on the planner's streamed text and emits each step as soon as its object closes.
+
+    Prose, markdown fences and anything after the closing bracket are ignored; an
+    array cut short by the output token limit keeps its complete steps, and a last
+    step that only lacks its closing braces is completed if all its keys arrived.
+    """
+
+    def __init__(self, agents: Iterable[str], on_step: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        self.agents = set(agents)
+        self.on_step = on_step
+        self.steps: List[Dict[str, Any]] = []
+        self.errors: List[str] = []
+        self.stack: List[str] = []  # Open brackets
+        self.capture: Optional[List[str]] = None  # Text of the step object being read
+        self.capture_depth = 0
+        self.quote: Optional[str] = None
+        self.escaped = False
+        self.done = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume a chunk; returns the steps it completed"""
+        new_steps = []
+        for ch in text or "":
+            if self.done:
+                break
+            if self.capture is not None:
+                self.capture.append(ch)
+            if self.quote:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == self.quote:
+                    self.quote = None
+                continue
+            if ch in "\"'" and self.stack:
+                self.quote = ch
+            elif ch in "[{":
+                if ch == "{" and self.capture is None:
+                    self.capture = [ch]
+                    self.capture_depth = len(self.stack)
+                self.stack.append(ch)
+            elif ch in "]}" and self.stack:
+                self.stack.pop()
+                if self.capture is not None and len(self.stack) == self.capture_depth:
+                    self._emit("".join(self.capture), new_steps)
+                    self.capture = None
+                # A closed top-level array is the whole plan; trailing text is ignored
+                if not self.stack and ch == "]":
+                    self.done = True
+        return new_steps
+
+    def close(self) -> List[Dict[str, Any]]:
+        """End of stream: complete a step cut off after its last value, if there is one"""
+        new_steps = []
+        if self.capture is not None and not self.quote:
+            # Drop a dangling comma or a key whose value never arrived
+            text = _DANGLING.sub("", "".join(self.capture))
+            closers = "".join(_CLOSERS[ch] for ch in reversed(self.stack[self.capture_depth:]))
+            self._emit(text + closers, new_steps, truncated=True)
+        elif self.capture is not None:
+            self.errors.append("last step truncated inside a string")
+        self.capture = None
+        self.done = True
+        return new_steps
+
+    def _emit(self, text: str, new_steps: List[Dict[str, Any]], truncated: bool = False):
+        try:
+            step = json.loads(repair_json(text))
+            # A cut-off step may have lost its condition; run unconditionally it could file a ticket regardless
+            missing = [key for key in STEP_KEYS if key not in step] if truncated and isinstance(step, dict) else []
+            if missing:
+                raise PlanError(f"last step truncated before {', '.join(missing)}")
+            step = validate_step(step, self.agents)
+        except ValueError as e:  # JSONDecodeError and PlanError
+            self.errors.append(f"{e} in {text[:80]!r}")
+            return
+        self.steps.append(step)
+        new_steps.append(step)
+        if self.on_step:
+            self.on_step(step)
+
+
+def parse_plan(text: str, agents: Iterable[str]) -> List[Dict[str, Any]]:
+    """Every valid step in a complete planner reply; PlanError when there is none"""
+    parser = PlanParser(agents)
+    parser.feed(text)
+    parser.close()
+    if not parser.steps:
+        raise PlanError("; ".join(parser.errors) or "no workflow steps in the reply")
+    return parser.steps
@@ -0,0 +1,165 @@
+"""Prompt assembly - byte-stable prompt prefixes and per-request tool pruning for agent graphs"""
+
+import os
+import re
+import json
+import math
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain.agents import create_agent
+
+from metrics import metrics
+
+# Agent graphs kept per assembler, one per distinct tool subset (least recently used evicted)
+AGENT_GRAPH_CACHE_SIZE = int(os.environ.get("AGENT_GRAPH_CACHE_SIZE", "32"))
+
+
+def canonical_text(text: str) -> str:
+    """Whitespace-normalised text, so equal prompts are byte-identical"""
+    return "\n".join(" ".join(line.split()) for line in (text or "").strip().splitlines() if line.strip())
+
+
+def _canonical_schema(schema: Any) -> Any:
+    if isinstance(schema, dict):
+        result = {}
+        for key in sorted(schema):
+            value = schema[key]
+            if key == "description" and isinstance(value, str):
+                value = canonical_text(value)
+            elif key == "required" and isinstance(value, list):
+                value = sorted(value)
+            else:
+                value = _canonical_schema(value)
+            result[key] = value
+        return result
+    if isinstance(schema, list):
+        return [_canonical_schema(item) for item in schema]
+    return schema
+
+
+def canonical_tools(tools: Iterable[Any]) -> List[Any]:
+    """Tools sorted by name with normalised descriptions and key-sorted JSON schemas.
+
+    MCP servers do not guarantee tool or property order; without this two processes
+    (or two reconnects) can send different prefixes and miss the provider's context cache.
+    """
+    result = []
+    for tool in sorted(tools, key=lambda t: t.name):
+        tool.description = canonical_text(tool.description)
+        if isinstance(getattr(tool, "args_schema", None), dict):
+            tool.args_schema = _canonical_schema(tool.args_schema)
+        result.append(tool)
+    return result
+
+
+def tool_specs(tools: Iterable[Any]) -> str:
+    """The tool part of the prompt prefix, as it is sized for token reporting"""
+    specs = []
+    for tool in tools:
+        schema = tool.args_schema if isinstance(tool.args_schema, dict) else tool.args
+        specs.append({"name": tool.name, "description": tool.description, "parameters": schema})
+    return json.dumps(specs, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token; good enough to compare prefixes without an API call
+    return math.ceil(len(text) / 4)
+
+
+class SkillRouter:
+    """Keyword skill groups mapped to tool names; requests matching no skill keep every tool.
+
+    ``skills`` maps a skill name to {"keywords": [...], "tools": [name or "prefix*", ...]}.
+    """
+
+    def __init__(self, skills: Dict[str, Dict[str, List[str]]]):
+        self.skills = skills
+        alternatives = [
+            f"(?P<{name}>" + "|".join(r"\b" + re.escape(k) + r"\b" for k in spec["keywords"]) + ")"
+            for name, spec in skills.items()
+        ]
+        self.pattern = re.compile("|".join(alternatives), re.IGNORECASE)
+
+    def route(self, text: str) -> set:
+        return {match.lastgroup for match in self.pattern.finditer(text or "")}
+
+    @staticmethod
+    def _owns(patterns: List[str], tool_name: str) -> bool:
+        return any(tool_name.startswith(p[:-1]) if p.endswith("*") else tool_name == p for p in patterns)
+
+    def select(self, tools: Sequence[Any], text: str) -> Sequence[Any]:
+        skills = self.route(text)
+        if not skills:
+            return tools
+        patterns = [p for skill in skills for p in self.skills[skill]["tools"]]
+        selected = [tool for tool in tools if self._owns(patterns, tool.name)]
+        return selected or tools
+
+
+class PromptAssembler:
+    """Builds agent graphs over a canonical prompt prefix, one graph per model and tool subset.
+
+    Stable content only: anything request-specific belongs in the user message, never
+    in the system prompt, so the prefix stays identical and provider-side caching can hit.
+    """
+
+    def __init__(self, model: Any, system_prompt: str, tools: Iterable[Any], agent_name: str,
+                 router: Optional[Any] = None, middleware: Sequence[Any] = ()):
+        """``router`` is anything with ``select(tools, request)``: a SkillRouter or a ToolIndex"""
+        self.model = model
+        self.system_prompt = canonical_text(system_prompt)
+        self.tools = canonical_tools(tools)
+        self.agent_name = agent_name
+        self.router = router
+        self.middleware = list(middleware)
+        self.graphs: "OrderedDict[Tuple[str, ...], Any]" = OrderedDict()
+        self.full_prefix_tokens = self.prefix_tokens(self.tools)
+
+    def prefix_tokens(self, tools: Sequence[Any]) -> int:
+        return estimate_tokens(self.system_prompt + tool_specs(tools))
+
+    def select_tools(self, request: str) -> Sequence[Any]:
+        return self.router.select(self.tools, request) if self.router else self.tools
+
+    def agent_for(self, request: str, model: Optional[Any] = None) -> Tuple[Any, Sequence[Any]]:
+        """Graph bound to the tools relevant to this request (cached per model and subset)"""
+        model = model or self.model
+        tools = self.select_tools(request)
+        # Tool names are already in canonical order
+        key = (getattr(model, "model", ""),) + tuple(tool.name for tool in tools)
+        graph = self.graphs.get(key)
+        if graph is None:
+            graph = self.graphs[key] = create_agent(
+                model=model, tools=list(tools), system_prompt=self.system_prompt,
+                middleware=self.middleware,
+            )
+            while len(self.graphs) > AGENT_GRAPH_CACHE_SIZE:
+                self.graphs.popitem(last=False)
+        else:
+            self.graphs.move_to_end(key)
+        return graph, tools
+
+    def report(self, tools: Sequence[Any], response: Any) -> Dict[str, int]:
+        """Prefix size before/after pruning and the prompt tokens the provider billed"""
+        input_tokens = cached_tokens = turns = 0
+        for message in (response.get("messages", []) if isinstance(response, dict) else []):
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                turns += 1
+                input_tokens += usage.get("input_tokens", 0)
+                cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+        report = {
+            "prefix_tokens_full": self.full_prefix_tokens,
+            "prefix_tokens": self.prefix_tokens(tools),
+            "tools": len(tools),
+            "model_turns": turns,
+            "input_tokens": input_tokens,
+            "cached_tokens": cached_tokens,
+        }
+        for name in ("prefix_tokens", "input_tokens", "cached_tokens"):
+            metrics.observe(name, report[name], agent=self.agent_name)
+        print(f"Prompt tokens: prefix {report['prefix_tokens_full']} -> {report['prefix_tokens']} "
+              f"({len(tools)}/{len(self.tools)} tools), billed input {input_tokens} over {turns} turn(s), "
+              f"{cached_tokens} from cache")
+        return report
@@ -0,0 +1,151 @@
+"""Circuit breakers and hedged requests"""
+
+import os
+import time
+import asyncio
+import threading
+from typing import Awaitable, Callable, Optional
+
+from metrics import metrics
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get("CIRCUIT_RESET_TIMEOUT", "30"))
+CIRCUIT_HALF_OPEN_PROBES = int(os.environ.get("CIRCUIT_HALF_OPEN_PROBES", "1"))
+
+# Hedging: delay before the backup request, from the observed p95 when enough samples exist
+HEDGE_DEFAULT_DELAY = float(os.environ.get("HEDGE_DEFAULT_DELAY", "5"))
+HEDGE_MIN_DELAY = float(os.environ.get("HEDGE_MIN_DELAY", "0.5"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the endpoint's circuit is open"""
+
+
+class CircuitBreaker:
+    """Per-endpoint breaker: opens after consecutive failures, probes while half-open.
+
+    State changes hold a lock, since tools (e.g. the ticketing agent's) record
+    outcomes from worker threads while the event loop checks the breaker.
+    """
+
+    def __init__(self, endpoint: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+                 half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        if state != self.state:
+            print(f"⚡ Circuit for {self.endpoint}: {self.state} -> {state}")
+            metrics.inc("circuit_transitions", endpoint=self.endpoint, to=state)
+            self.state = state
+
+    def available(self) -> bool:
+        """Whether a call would be let through now, without reserving a probe"""
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        if self.state == HALF_OPEN:
+            return self.probes_in_flight < self.half_open_probes
+        return True
+
+    def allow(self) -> bool:
+        """Reserve permission for one call; half-open admits a limited number of probes"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+                self.probes_in_flight = 0
+            if self.state == HALF_OPEN and self.probes_in_flight < self.half_open_probes:
+                self.probes_in_flight += 1
+                return True
+            if self.state == CLOSED:
+                return True
+        metrics.inc("circuit_rejected", endpoint=self.endpoint)
+        return False
+
+    def release_probe(self):
+        """Give back a half-open probe slot for a call that never completed"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(self.probes_in_flight - 1, 0)
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(self.probes_in_flight - 1, 0)
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(self.probes_in_flight - 1, 0)
+                self._open()
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self.failures = 0
+        self._transition(OPEN)
+
+    def guard(self):
+        """Raise CircuitOpenError unless a call is allowed"""
+        if not self.allow():
+            raise CircuitOpenError(f"circuit open for {self.endpoint}")
+
+
+def hedge_delay(series: str, **labels) -> float:
+    """Backup-request delay: observed p95 latency, or the default until enough samples exist"""
+    p95 = metrics.percentile(series, 95, min_samples=HEDGE_MIN_SAMPLES, **labels)
+    return max(p95 if p95 is not None else HEDGE_DEFAULT_DELAY, HEDGE_MIN_DELAY)
+
+
+async def hedged(primary: Callable[[], Awaitable], backup: Optional[Callable[[], Awaitable]],
+                 delay: float, name: str):
+    """Run primary; if it is still pending after delay, race it against backup.
+
+    The first successful result wins and the other attempt is cancelled. Only use
+    for idempotent operations.
+    """
+    first = asyncio.ensure_future(primary())
+    if backup is None:
+        return await first
+
+    attempts = [first]
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        metrics.inc("hedge_sent", target=name)
+        second = asyncio.ensure_future(backup())
+        attempts.append(second)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        metrics.inc("hedge_won", target=name)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # Cancel the losing (or orphaned) attempt
+        for task in attempts:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,100 @@
+"""Rule-based fast path - plans known request patterns without calling the LLM"""
+
+import os
+import re
+import copy
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+FAST_PATH_RULES = os.environ.get(
+    "FAST_PATH_RULES", os.path.join(os.path.dirname(__file__), "..", "fast_path_rules.yaml")
+)
+
+
+class Rule:
+    """One declarative rule: keyword groups to match and the workflow it emits"""
+
+    def __init__(self, spec: Dict[str, Any], term_ids: Dict[str, int]):
+        self.name = spec["name"]
+        match = spec.get("match", {})
+        # all: every group needs one hit; any: at least one hit; none: no hit allowed
+        self.all_groups = [self._ids(group, term_ids) for group in match.get("all", [])]
+        self.any_ids = self._ids(match.get("any", []), term_ids)
+        self.none_ids = self._ids(match.get("none", []), term_ids)
+        self.workflow = spec["workflow"]
+        if not isinstance(self.workflow, list) or not self.workflow:
+            raise ValueError(f"Rule {self.name} needs a non-empty workflow")
+        for step in self.workflow:
+            if "agent" not in step or "action" not in step:
+                raise ValueError(f"Rule {self.name} has a step without agent/action: {step}")
+
+    @staticmethod
+    def _ids(terms: List[str], term_ids: Dict[str, int]) -> frozenset:
+        ids = set()
+        for term in terms:
+            key = term if term.startswith("re:") else term.lower()
+            ids.add(term_ids.setdefault(key, len(term_ids)))
+        return frozenset(ids)
+
+    def matches(self, hits: set) -> bool:
+        if self.none_ids & hits:
+            return False
+        if self.any_ids and not self.any_ids & hits:
+            return False
+        return all(group & hits for group in self.all_groups)
+
+    def render(self, user_input: str) -> List[Dict[str, Any]]:
+        workflow = copy.deepcopy(self.workflow)
+        for step in workflow:
+            step["action"] = step["action"].replace("{input}", user_input)
+            step.setdefault("condition", None)
+        return workflow
+
+
+class RuleEngine:
+    """Rules compiled into one combined regex, evaluated in a single pass over the input"""
+
+    def __init__(self, specs: List[Dict[str, Any]]):
+        self.term_ids: Dict[str, int] = {}
+        self.rules = [Rule(spec, self.term_ids) for spec in specs]
+        self.pattern = self._compile()
+
+    @classmethod
+    def from_file(cls, path: str = FAST_PATH_RULES) -> "RuleEngine":
+        """Load rules from YAML; a missing file means no fast path"""
+        if not os.path.isfile(path):
+            return cls([])
+        with open(path) as f:
+            config = yaml.safe_load(f) or {}
+        return cls(config.get("rules", []))
+
+    def _compile(self) -> Optional["re.Pattern"]:
+        if not self.term_ids:
+            return None
+        # Longest literals first so "pods" wins over "pod" at the same position
+        terms = sorted(self.term_ids.items(), key=lambda item: -len(item[0]))
+        alternatives = []
+        for term, term_id in terms:
+            if term.startswith("re:"):
+                body = term[3:]
+            else:
+                body = r"\b" + re.escape(term) + r"\b"
+            alternatives.append(f"(?P<t{term_id}>{body})")
+        return re.compile("|".join(alternatives), re.IGNORECASE)
+
+    def hits(self, text: str) -> set:
+        """Ids of all terms found in the text"""
+        if self.pattern is None:
+            return set()
+        return {int(m.lastgroup[1:]) for m in self.pattern.finditer(text)}
+
+    def match(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """First matching rule as {"rule": name, "workflow": [...]}, or None"""
+        if not self.rules:
+            return None
+        hits = self.hits(user_input)
+        for rule in self.rules:
+            if rule.matches(hits):
+                return {"rule": rule.name, "workflow": rule.render(user_input)}
+        return None
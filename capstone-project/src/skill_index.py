@@ -0,0 +1,99 @@
+"""Skill index - inverted index over agent card skills to route requests among many agents"""
+
+import os
+import math
+import heapq
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from tool_index import B, K1, NAME_WEIGHT, tokenize
+
+# Agents whose descriptions go into the classification and planning prompts; 0 lists every agent
+ROUTING_TOP_K = int(os.environ.get("ROUTING_TOP_K", "5"))
+# Tags are curated keywords, so they count more than free-text descriptions and examples
+TAG_WEIGHT = 2
+
+
+def card_terms(card: Any) -> List[str]:
+    """Every searchable term of an agent card, weighted by repetition"""
+    terms = tokenize(card.name.replace("_", " ")) * NAME_WEIGHT + tokenize(card.description)
+    for skill in card.skills or []:
+        terms += tokenize(skill.name.replace("_", " ")) * NAME_WEIGHT
+        terms += tokenize(skill.description)
+        terms += tokenize(" ".join(skill.tags or [])) * TAG_WEIGHT
+        terms += tokenize(" ".join(skill.examples or []))
+    return terms
+
+
+class SkillIndex:
+    """BM25 over agent cards, kept as postings (term -> agent -> frequency).
+
+    A query only touches the postings of its own terms, so routing costs the
+    same whether the agents have five skills or five hundred. ``update`` swaps
+    one agent's postings when its card changes; nothing else is rebuilt.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.terms: Dict[str, Counter] = {}  # agent -> term frequencies, to undo on update
+        self.lengths: Dict[str, int] = {}
+        self.total_length = 0
+        self.descriptions: Dict[str, str] = {}  # agent -> prompt line
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.terms
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def update(self, name: str, card: Any):
+        """Index (or re-index) one agent's card"""
+        self.remove(name)
+        terms = Counter(card_terms(card))
+        for term, tf in terms.items():
+            self.postings[term][name] = tf
+        self.terms[name] = terms
+        self.lengths[name] = sum(terms.values())
+        self.total_length += self.lengths[name]
+        self.descriptions[name] = f"{name}: {card.description}"
+
+    def remove(self, name: str):
+        terms = self.terms.pop(name, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self.postings[term]
+            posting.pop(name, None)
+            if not posting:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(name)
+        self.descriptions.pop(name, None)
+
+    def search(self, text: str, k: int = ROUTING_TOP_K) -> List[Tuple[str, float]]:
+        """Up to k (agent, score) pairs with a positive score, best first; k <= 0 returns all matches"""
+        n = len(self.terms)
+        if not n:
+            return []
+        avg_length = self.total_length / n
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(text)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for name, tf in posting.items():
+                norm = K1 * (1 - B + B * self.lengths[name] / avg_length)
+                scores[name] += idf * tf * (K1 + 1) / (tf + norm)
+        ranked = [(name, score) for name, score in scores.items() if score > 0]
+        # Ties go to the name so the same request always yields the same candidates
+        key = lambda pair: (-pair[1], pair[0])
+        return heapq.nsmallest(k, ranked, key=key) if k > 0 else sorted(ranked, key=key)
+
+    def candidates(self, text: str, k: int = ROUTING_TOP_K) -> List[str]:
+        """The agents to offer the LLM: the top-k matches, or every agent when nothing matches"""
+        matches = [name for name, _ in self.search(text, k)]
+        return matches or sorted(self.terms)
+
+    def describe(self, names: Iterable[str]) -> str:
+        """Prompt lines ("name: description") for the given agents"""
+        return "\n".join(self.descriptions[name] for name in names if name in self.descriptions)
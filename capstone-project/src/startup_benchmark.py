@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark - import time (python -X importtime) and time until the agent card is served
+
+    uv run python src/startup_benchmark.py              # every entry point, plus server time-to-card
+    uv run python src/startup_benchmark.py --top 15 --no-serve
+
+Each measurement runs in a fresh interpreter, so nothing is shared with this process.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.request
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+SRC = os.path.dirname(os.path.abspath(__file__))
+ENTRY_POINTS = ["k8s_agent_server", "ticketing_a2a_server", "agent_autonomous"]
+# Imported lazily by the above; measured for reference
+DEFERRED = ["k8s_agent_executor", "ticketing_agent_executor"]
+SERVERS = ["k8s_agent_server", "ticketing_a2a_server"]
+CARD_PATH = "/.well-known/agent-card.json"
+
+
+def _env() -> Dict[str, str]:
+    # Server startup must not need real credentials or touch the user's journal
+    return {**os.environ, "PYTHONPATH": SRC, "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "x"),
+            "WORKFLOW_JOURNAL": ""}
+
+
+def import_profile(module: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """(seconds to import ``module``, [(top-level package, self seconds)] heaviest first)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=_env(), cwd=SRC)
+    if result.returncode:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    total = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if name == module:
+            total = int(cumulative_us) / 1e6
+        packages[name.split(".")[0]] += int(self_us) / 1e6
+    return total, sorted(packages.items(), key=lambda item: -item[1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_card(module: str, timeout: float = 30.0) -> float:
+    """Seconds from process start until the server answers its agent card URL"""
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(SRC, f"{module}.py"), "--port", str(port)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=_env(), cwd=SRC)
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"{module} exited with status {process.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{CARD_PATH}", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError(f"{module} served no agent card within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for the agent servers and the host")
+    parser.add_argument("--top", type=int, default=8, help="heaviest packages to list per module")
+    parser.add_argument("--no-serve", action="store_true", help="skip the time-to-agent-card measurement")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {"python": sys.version.split()[0], "imports": {}, "time_to_card": {}}
+    for module in ENTRY_POINTS + DEFERRED:
+        total, packages = import_profile(module)
+        report["imports"][module] = {"seconds": total, "packages": dict(packages[:args.top])}
+        label = " (deferred)" if module in DEFERRED else ""
+        print(f"import {module}{label}: {total * 1000:.0f} ms")
+        for package, seconds in packages[:args.top]:
+            print(f"    {package:<32}{seconds * 1000:>8.1f} ms")
+
+    if not args.no_serve:
+        print()
+        for module in SERVERS:
+            seconds = report["time_to_card"][module] = time_to_card(module)
+            print(f"{module}: agent card served after {seconds * 1000:.0f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Structured step results exchanged as A2A DataParts between agents and the host"""
+
+import re
+import json
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import yaml
+from a2a.types import DataPart, Part, TextPart
+from a2a.utils import new_agent_parts_message
+
+from conditions import HEALTHY_PHASES, StepFacts
+
+PODS_SCHEMA = "k8s.pods/v1"
+NAMESPACES_SCHEMA = "k8s.namespaces/v1"
+TICKETS_SCHEMA = "tickets/v1"
+
+POD_COLUMNS = ["ns", "name", "phase", "restarts", "ready"]
+# Unhealthy pods listed individually; healthy ones are only counted
+MAX_LISTED_PODS = 50
+
+_COLUMN_SPLIT = re.compile(r"\s{2,}")
+
+
+def text_content(content: Any) -> str:
+    """ToolMessage content is a string or a list of content blocks"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+        )
+    return str(content or "")
+
+
+def load_document(text: str) -> Any:
+    """Parse JSON or YAML tool output; None if it is neither"""
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError:
+        return None
+
+
+def pod_from_object(obj: Dict[str, Any]) -> Dict[str, Any]:
+    meta = obj.get("metadata") or {}
+    status = obj.get("status") or {}
+    containers = status.get("containerStatuses") or []
+    phase = status.get("phase", "Unknown")
+    # Surface waiting reasons such as CrashLoopBackOff, like kubectl does
+    for container in containers:
+        waiting = (container.get("state") or {}).get("waiting") or {}
+        if waiting.get("reason"):
+            phase = waiting["reason"]
+            break
+    ready = sum(1 for container in containers if container.get("ready"))
+    return {
+        "ns": meta.get("namespace", ""),
+        "name": meta.get("name", ""),
+        "phase": phase,
+        "restarts": sum(container.get("restartCount", 0) for container in containers),
+        "ready": f"{ready}/{len(containers)}",
+    }
+
+
+def pods_from_table(text: str) -> List[Dict[str, Any]]:
+    """kubectl-style table with NAME/STATUS(/NAMESPACE/RESTARTS/READY) columns"""
+    lines = [line for line in text.splitlines() if line.strip()]
+    # The header may follow a line of prose, e.g. "3 pod(s) not running:"
+    for start, line in enumerate(lines[:3]):
+        header = [column.upper() for column in _COLUMN_SPLIT.split(line.strip())]
+        if "NAME" in header and "STATUS" in header:
+            break
+    else:
+        return []
+    lines = lines[start:]
+    index = {column: i for i, column in enumerate(header)}
+    pods = []
+    for line in lines[1:]:
+        cells = _COLUMN_SPLIT.split(line.strip())
+        if len(cells) < len(header):
+            continue
+        cell = lambda column, default="": cells[index[column]] if column in index else default
+        restarts = cell("RESTARTS", "0").split(" ")[0]
+        pods.append({
+            "ns": cell("NAMESPACE"),
+            "name": cell("NAME"),
+            "phase": cell("STATUS"),
+            "restarts": int(restarts) if restarts.isdigit() else 0,
+            "ready": cell("READY"),
+        })
+    return pods
+
+
+def pods_from_tool_output(content: Any) -> List[Dict[str, Any]]:
+    """Pods found in an MCP tool result (Kubernetes JSON/YAML objects or a table)"""
+    text = text_content(content)
+    document = load_document(text)
+    if isinstance(document, dict):
+        items = document.get("items") if "items" in document else [document]
+    elif isinstance(document, list):
+        items = document
+    else:
+        items = None
+    if items is not None:
+        return [pod_from_object(item) for item in items if isinstance(item, dict) and item.get("kind", "Pod") == "Pod"
+                and "metadata" in item]
+    return pods_from_table(text)
+
+
+def summarize_pods(pods: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compact pod status payload: counts for everything, rows for unhealthy pods only"""
+    phase_counts: Counter = Counter()
+    namespaces = set()
+    max_restarts = 0
+    unhealthy = []
+    total = 0
+    for pod in pods:
+        total += 1
+        phase_counts[pod["phase"]] += 1
+        namespaces.add(pod["ns"])
+        max_restarts = max(max_restarts, pod["restarts"])
+        if pod["phase"].lower() not in HEALTHY_PHASES and len(unhealthy) < MAX_LISTED_PODS:
+            unhealthy.append([pod[column] for column in POD_COLUMNS])
+    return {
+        "schema": PODS_SCHEMA,
+        "total": total,
+        "phase_counts": dict(phase_counts),
+        "max_restarts": max_restarts,
+        "namespaces": sorted(ns for ns in namespaces if ns),
+        "columns": POD_COLUMNS,
+        "unhealthy": unhealthy,
+    }
+
+
+def extract_k8s_data(messages: List[Any]) -> Optional[Dict[str, Any]]:
+    """Structured pod/namespace status from the MCP tool results of one agent run"""
+    pods: Dict[tuple, Dict[str, Any]] = {}
+    namespaces: List[str] = []
+    for message in messages:
+        if getattr(message, "type", None) != "tool":
+            continue
+        name = getattr(message, "name", "") or ""
+        if name.startswith("namespaces"):
+            document = load_document(text_content(message.content))
+            items = document.get("items", []) if isinstance(document, dict) else document or []
+            namespaces.extend((item.get("metadata") or {}).get("name", "") for item in items if isinstance(item, dict))
+            if not namespaces:
+                namespaces.extend(row["name"] for row in pods_from_table(text_content(message.content)))
+        elif "pod" in name or name.startswith("resources"):
+            for pod in pods_from_tool_output(message.content):
+                pods[(pod["ns"], pod["name"])] = pod  # Later calls refresh earlier ones
+    if pods:
+        data = summarize_pods(pods.values())
+        if namespaces:
+            data["namespaces"] = sorted(set(data["namespaces"]) | set(namespaces))
+        return data
+    if namespaces:
+        return {"schema": NAMESPACES_SCHEMA, "namespaces": sorted(set(namespaces))}
+    return None
+
+
+def extract_ticket_data(messages: List[Any]) -> Optional[Dict[str, Any]]:
+    """Ticket objects returned by the ticket tools (their ToolMessage artifacts)"""
+    tickets: Dict[Any, Dict[str, Any]] = {}
+    for message in messages:
+        if getattr(message, "type", None) != "tool":
+            continue
+        artifact = getattr(message, "artifact", None)
+        if isinstance(artifact, dict):
+            artifact = [artifact]
+        if isinstance(artifact, list):
+            for ticket in artifact:
+                if isinstance(ticket, dict) and "id" in ticket:
+                    tickets[ticket["id"]] = ticket
+    if not tickets:
+        return None
+    return {"schema": TICKETS_SCHEMA, "tickets": list(tickets.values())}
+
+
+def facts_from_data(data: Optional[Dict[str, Any]]) -> Optional[StepFacts]:
+    """Exact condition facts from a structured payload, None if it carries no pod status"""
+    if not data or data.get("schema") != PODS_SCHEMA:
+        return None
+    counts = dict(data.get("phase_counts", {}))
+    counts["restarts"] = data.get("max_restarts", 0)
+    return StepFacts.from_counts(counts)
+
+
+def compact_json(data: Dict[str, Any]) -> str:
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+def result_message(text: str, data: Optional[Dict[str, Any]] = None):
+    """Agent reply with the human summary as text and, when available, the typed payload"""
+    parts = [Part(root=TextPart(text=text))]
+    if data:
+        parts.append(Part(root=DataPart(data=data)))
+    return new_agent_parts_message(parts)
@@ -1,15 +1,23 @@
 #!/usr/bin/env python3
 """A2A Ticketing Agent Server"""
 
+import os
+import argparse
+
 import uvicorn
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentCapabilities, AgentCard, AgentSkill
-from ticketing_agent_executor import TicketingAgentExecutor
+from lazy_loading import LazyAgentExecutor
 
 
 def main():
+    # Replicas run on separate ports, e.g. --port 8890 for a second instance
+    parser = argparse.ArgumentParser(description="Ticketing A2A Agent")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("TICKETING_AGENT_PORT", "5001")))
+    args = parser.parse_args()
+
     # Define agent skills
     create_ticket_skill = AgentSkill(
         id='create_ticket',
@@ -39,17 +47,21 @@ def main():
     agent_card = AgentCard(
         name='Ticketing System Agent',
         description='A support ticketing system agent that can create, list, and query tickets',
-        url='http://localhost:5001/',
+        url=f'http://localhost:{args.port}/',
         version='1.0.0',
         default_input_modes=['text'],
-        default_output_modes=['text'],
+        default_output_modes=['text', 'data'],
         capabilities=AgentCapabilities(streaming=True),
         skills=[create_ticket_skill, list_tickets_skill, query_tickets_skill],
     )
 
+    # The ticketing executor imports LangChain, the Gemini client and requests, so it is
+    # built in the background; the port binds and the agent card is served right away
+    agent_executor = LazyAgentExecutor("ticketing_agent_executor:TicketingAgentExecutor")
+
     # Create request handler
     request_handler = DefaultRequestHandler(
-        agent_executor=TicketingAgentExecutor(),
+        agent_executor=agent_executor,
         task_store=InMemoryTaskStore(),
     )
 
@@ -59,12 +71,12 @@ def main():
         http_handler=request_handler,
     )
 
-    print("Starting Ticketing A2A Agent on http://localhost:5001")
-    print("Agent Card will be available at: http://localhost:5001/.well-known/agent")
+    print(f"Starting Ticketing A2A Agent on http://localhost:{args.port}")
+    print(f"Agent Card will be available at: http://localhost:{args.port}/.well-known/agent-card.json")
 
 
-    app = server.build()
-    uvicorn.run(app, host="0.0.0.0", port=5001) 
+    app = server.build(lifespan=agent_executor.lifespan)
+    uvicorn.run(app, host="0.0.0.0", port=args.port) 
 
 
 if __name__ == "__main__":
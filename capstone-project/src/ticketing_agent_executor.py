@@ -1,75 +1,138 @@
 """A2A Agent Executor for Ticketing System"""
 
 import os
+import asyncio
+import itertools
+import contextvars
+from typing import Optional
 import requests
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import create_agent
 from langchain.tools import tool
 
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
 from a2a.utils import new_agent_text_message
 
+from execution_policy import PARALLEL_TOOLS_HINT, ExecutionPolicy, answer_turn, require_answer, with_answer
+from model_router import ModelRouter
+from prompt_assembly import PromptAssembler
+from structured_results import extract_ticket_data, result_message
+from deadlines import AGENT_TIMEOUT, TOOL_TIMEOUT, deadline_from_metadata, run_with_deadline
+from resilience import CircuitBreaker
 
-@tool
-def create_ticket(message: str) -> str:
+
+# Ticket backend; every call goes through one circuit breaker
+TICKET_API_URL = os.environ.get("TICKET_API_URL", "http://localhost:5000/api/tickets")
+ticket_api_breaker = CircuitBreaker(TICKET_API_URL)
+
+
+class IdempotencyScope:
+    """Idempotency-Key values for the tickets one workflow step creates: <step key>-1, -2, ..."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.counter = itertools.count(1)
+
+    def next_key(self) -> str:
+        return f"{self.key}-{next(self.counter)}"
+
+
+# Set per request from the A2A metadata; tools run in copies of the request's context
+idempotency_scope: contextvars.ContextVar[Optional[IdempotencyScope]] = contextvars.ContextVar(
+    "idempotency_scope", default=None
+)
+
+
+def _ticket_api(method: str, path: str = "", **kwargs):
+    """Call the ticket API, failing fast while its circuit is open"""
+    ticket_api_breaker.guard()
+    scope = idempotency_scope.get()
+    if method == 'POST' and scope:
+        # A retried workflow step gets its earlier tickets back instead of duplicates
+        kwargs['headers'] = {**kwargs.get('headers', {}), 'Idempotency-Key': scope.next_key()}
+    try:
+        response = requests.request(method, TICKET_API_URL + path, timeout=TOOL_TIMEOUT, **kwargs)
+    except requests.RequestException:
+        ticket_api_breaker.record_failure()
+        raise
+    # Client errors are the caller's fault and say nothing about the backend's health
+    if response.status_code >= 500:
+        ticket_api_breaker.record_failure()
+    else:
+        ticket_api_breaker.record_success()
+    response.raise_for_status()
+    return response.json()
+
+
+# Tools return (text for the model, ticket objects as artifact); the artifact becomes the reply's DataPart
+@tool(response_format="content_and_artifact")
+def create_ticket(message: str):
     """Create a new ticket with the given message"""
     try:
-        response = requests.post(
-            "http://localhost:5000/api/tickets",
+        ticket = _ticket_api(
+            "POST",
             json={"message": message},
             headers={"Content-Type": "application/json"}
         )
-        response.raise_for_status()
-        return f"Ticket created successfully: {response.json()}"
+        return f"Ticket created successfully: {ticket}", ticket
     except Exception as e:
-        return f"Error creating ticket: {str(e)}"
+        return f"Error creating ticket: {str(e)}", None
 
 
-@tool
-def get_all_tickets() -> str:
+@tool(response_format="content_and_artifact")
+def get_all_tickets():
     """Get all tickets from the system"""
     try:
-        response = requests.get("http://localhost:5000/api/tickets")
-        response.raise_for_status()
-        return f"All tickets: {response.json()}"
+        tickets = _ticket_api('GET')
+        return f"All tickets: {tickets}", tickets
     except Exception as e:
-        return f"Error getting tickets: {str(e)}"
+        return f"Error getting tickets: {str(e)}", None
 
 
-@tool
-def query_tickets(query: str) -> str:
+@tool(response_format="content_and_artifact")
+def query_tickets(query: str):
     """Query tickets by search term"""
     try:
-        response = requests.get(f"http://localhost:5000/api/tickets?q={query}")
-        response.raise_for_status()
-        return f"Query results: {response.json()}"
+        tickets = _ticket_api('GET', params={'q': query})
+        return f"Query results: {tickets}", tickets
+    except Exception as e:
+        return f"Error querying tickets: {str(e)}", None
+
+
+@tool(response_format="content_and_artifact")
+def get_ticket_changes(since: int = 0):
+    """Get only the tickets created since a change sequence number (0 for all). Pass the returned last_seq next time."""
+    try:
+        result = _ticket_api('GET', '/changes', params={'since': since})
+        tickets = [change['ticket'] for change in result['changes']]
+        return f"Ticket changes since {since} (last_seq {result['last_seq']}): {result['changes']}", tickets
     except Exception as e:
-        return f"Error querying tickets: {str(e)}"
+        return f"Error getting ticket changes: {str(e)}", None
 
 
 class TicketingAgentExecutor(AgentExecutor):
     """A2A Agent Executor for Ticketing System"""
 
     def __init__(self):
-        # Initialize model
-        self.model = ChatGoogleGenerativeAI(
-            model="models/gemini-2.5-flash",
-            api_key=os.environ.get("GEMINI_API_KEY")
-        )
+        # Model tiers: simple tool turns on the cheap model, escalation when it fails
+        self.models = ModelRouter()
 
         # Register tools
-        self.tools = [create_ticket, get_all_tickets, query_tickets]
-
-        # Create LangChain agent
-        self.agent = create_agent(
-            model=self.model,
-            tools=self.tools,
-            system_prompt=(
-                "You are a ticketing system assistant. "
-                "Help users create, view, and query tickets."
-            )
+        self.tools = [create_ticket, get_all_tickets, query_tickets, get_ticket_changes]
+
+        # Create LangChain agent over a canonical, cacheable prompt prefix, with bounded turns
+        self.policy = ExecutionPolicy()
+        self.prompts = PromptAssembler(
+            self.models.model(),
+            "You are a ticketing system assistant. "
+            "Help users create, view, and query tickets. "
+            "To find out what is new, use get_ticket_changes instead of listing every ticket. "
+            + PARALLEL_TOOLS_HINT,
+            self.tools,
+            "ticketing",
+            middleware=self.policy.middleware(),
         )
+        self.running_tasks = {}  # task_id -> running LangChain invocation
 
     async def execute(self, context, event_queue):
         """Execute agent logic for incoming message"""
@@ -77,12 +140,20 @@ class TicketingAgentExecutor(AgentExecutor):
         # Access messages from context (latest SDK)
         user_message = context.message.parts[0].root.text
         print(f"User: '{user_message}'")
+        deadline = deadline_from_metadata(context.metadata, AGENT_TIMEOUT)
+        key = (context.metadata or {}).get("idempotency_key")
+        idempotency_scope.set(IdempotencyScope(key) if key else None)
+        task = None
 
         try:
-            response = await self.agent.ainvoke({"messages": [{"role": "user", "content": user_message}]})
+            # Run the agent as a task so cancel() can stop it
+            task = asyncio.ensure_future(self._run_agent(user_message))
+            self.running_tasks[context.task_id] = task
+            response = await run_with_deadline(task, deadline)
             print(f"Ticketing Agent: {response}")
 
             # Extract the final AI message content
+            data = None
             if isinstance(response, dict) and "messages" in response:
                 # Get the last AI message
                 messages = response["messages"]
@@ -92,14 +163,49 @@ class TicketingAgentExecutor(AgentExecutor):
                         break
                 else:
                     result = "Task completed successfully"
+                # Typed payload from the tool results, so the host needn't re-parse prose
+                data = extract_ticket_data(messages)
             else:
                 result = str(response)
 
-            await event_queue.enqueue_event(new_agent_text_message(result))
+            await event_queue.enqueue_event(result_message(result, data))
+        except asyncio.TimeoutError:
+            print("Agent invocation exceeded the request deadline")
+            await event_queue.enqueue_event(new_agent_text_message("Error: Ticketing agent exceeded the request deadline"))
+        except asyncio.CancelledError:
+            # cancel() unregisters the task before cancelling it; anything else is a shutdown
+            if task is None or self.running_tasks.get(context.task_id) is task:
+                raise
+            print("Agent invocation cancelled")
         except Exception as e:
             print(f"Agent invocation failed: {e}")
             await event_queue.enqueue_event(new_agent_text_message(f"Error: {str(e)}"))
+        finally:
+            if task is not None and self.running_tasks.get(context.task_id) is task:
+                del self.running_tasks[context.task_id]
+
+    async def _run_agent(self, user_message):
+        """Agent run on the cheapest model tier; without a final answer only the answer turn is escalated"""
+        run = None
+
+        async def attempt(model):
+            nonlocal run
+            if run is not None:
+                # Stronger tiers answer from the tool results already gathered instead of redoing them
+                return await model.ainvoke(answer_turn(run))
+            agent, tools = self.prompts.agent_for(user_message, model)
+            run = await agent.ainvoke(
+                {"messages": [{"role": "user", "content": user_message}]}, config=self.policy.config()
+            )
+            self.prompts.report(tools, run)
+            return run
+
+        response = await self.models.run("agent", attempt, require_answer, best_effort=True)
+        return with_answer(run, response)
 
     async def cancel(self, context, event_queue):
-        """Cancel is not supported"""
-        raise Exception("cancel not supported")
+        """Cancel the running LangChain invocation for this task"""
+        task = self.running_tasks.pop(context.task_id, None)
+        if task is not None:
+            task.cancel()
+        await TaskUpdater(event_queue, context.task_id, context.context_id).cancel()
@@ -0,0 +1,100 @@
+"""Tool index - BM25 keyword ranking of tool descriptions to bind only the top-k per request"""
+
+import os
+import re
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+TOOL_TOP_K = int(os.environ.get("TOOL_TOP_K", "6"))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Tool names are the strongest signal, so their terms count several times
+NAME_WEIGHT = 3
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "any", "as", "at", "be", "by", "can", "do", "for", "from", "give", "i",
+    "in", "is", "it", "me", "my", "of", "on", "or", "please", "show", "tell", "that", "the", "there",
+    "this", "to", "what", "which", "with",
+}
+
+
+def _stem(token: str) -> str:
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(t) for t in _TOKEN.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+def _tool_terms(tool: Any) -> List[str]:
+    terms = tokenize(tool.name.replace("_", " ")) * NAME_WEIGHT + tokenize(tool.description)
+    schema = tool.args_schema if isinstance(getattr(tool, "args_schema", None), dict) else {}
+    for name, prop in (schema.get("properties") or {}).items():
+        terms += tokenize(name) + tokenize(prop.get("description", "") if isinstance(prop, dict) else "")
+    return terms
+
+
+class _Corpus:
+    """BM25 statistics for one tool list"""
+
+    def __init__(self, tools: Sequence[Any]):
+        self.docs = {tool.name: Counter(_tool_terms(tool)) for tool in tools}
+        self.lengths = {name: sum(doc.values()) for name, doc in self.docs.items()}
+        self.avg_length = sum(self.lengths.values()) / max(len(self.docs), 1)
+        df = Counter(term for doc in self.docs.values() for term in doc)
+        n = len(self.docs)
+        self.idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    def score(self, name: str, query: List[str]) -> float:
+        doc = self.docs[name]
+        norm = K1 * (1 - B + B * self.lengths[name] / self.avg_length)
+        total = 0.0
+        for term in query:
+            tf = doc.get(term)
+            if tf:
+                total += self.idf[term] * tf * (K1 + 1) / (tf + norm)
+        return total
+
+
+class ToolIndex:
+    """Selects the k tools whose descriptions best match a request.
+
+    An optional skill ``router`` (see prompt_assembly.SkillRouter) narrows the
+    candidates first; requests with no matching terms keep the router's choice.
+    """
+
+    def __init__(self, k: int = TOOL_TOP_K, router: Optional[Any] = None):
+        self.k = k
+        self.router = router
+        self.corpora: Dict[Tuple[str, ...], _Corpus] = {}
+
+    def _corpus(self, tools: Sequence[Any]) -> _Corpus:
+        key = tuple(tool.name for tool in tools)
+        corpus = self.corpora.get(key)
+        if corpus is None:
+            corpus = self.corpora[key] = _Corpus(tools)
+        return corpus
+
+    def select(self, tools: Sequence[Any], text: str) -> Sequence[Any]:
+        candidates = self.router.select(tools, text) if self.router else tools
+        if self.k <= 0 or len(candidates) <= self.k:
+            return candidates
+        # Scores come from the full tool list so term rarity reflects every tool
+        corpus = self._corpus(tools)
+        query = tokenize(text)
+        scored = sorted(((corpus.score(tool.name, query), tool) for tool in candidates),
+                        key=lambda pair: (-pair[0], pair[1].name))
+        top = [tool for score, tool in scored[:self.k] if score > 0]
+        if not top:
+            return candidates
+        # Keep the canonical order so equal subsets share one cached agent graph
+        chosen = {tool.name for tool in top}
+        return [tool for tool in candidates if tool.name in chosen]
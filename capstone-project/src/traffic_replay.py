@@ -0,0 +1,336 @@
+"""Traffic replay - record workflows with every model and agent response, replay them as load
+
+Record real traffic by setting TRAFFIC_TRACE on the orchestrator (interactive or --serve):
+    TRAFFIC_TRACE=traces/ops.ndjson.gz uv run python src/agent_autonomous.py --serve
+or by feeding a file of requests, one per line, through a live host:
+    uv run python src/traffic_replay.py record requests.txt --trace traces/ops.ndjson.gz
+
+Replay against AgentHost with the recorded responses stubbed in, at 10x the original pace:
+    uv run python src/traffic_replay.py replay traces/ops.ndjson.gz --speed 10
+or against the live local agents (planning still replays the recorded model output):
+    uv run python src/traffic_replay.py replay traces/ops.ndjson.gz --live
+"""
+
+import os
+import gzip
+import json
+import time
+import asyncio
+import argparse
+import contextvars
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from workflow_journal import step_hash
+
+TRAFFIC_TRACE = os.environ.get("TRAFFIC_TRACE", "")
+TRACE_VERSION = 1
+# Chunk size when replaying a streamed model reply, so the plan parser still sees it incrementally
+REPLAY_CHUNK_CHARS = 24
+
+# The record of the workflow currently running in this task (planner tasks inherit it)
+_current: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("traffic_trace", default=None)
+
+
+def _open(path: str, mode: str):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    opener = gzip.open if path.endswith(".gz") else open
+    return opener(path, mode + "t", encoding="utf-8")
+
+
+def _dumps(record: Dict[str, Any]) -> str:
+    return json.dumps(record, separators=(",", ":"), default=str) + "\n"
+
+
+def read_trace(path: str):
+    """(header, workflow records) of a trace file"""
+    header, workflows = {}, []
+    with _open(path, "r") as trace:
+        for line in trace:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record["type"] == "header":
+                header = record
+            elif record["type"] == "workflow":
+                workflows.append(record)
+    workflows.sort(key=lambda record: record["offset"])
+    return header, workflows
+
+
+def decisions(plan: List[Dict[str, Any]], history: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """What a workflow decided: its plan and which steps actually ran"""
+    return {
+        "plan": [[step["agent"], step["action"], step.get("condition")] for step in plan],
+        "executed": [entry["step"] for entry in history],
+    }
+
+
+class RecordingModel:
+    """Wraps a tier's chat model and notes every reply in the current workflow record"""
+
+    def __init__(self, model: Any, tier: str):
+        self.inner = model
+        self.tier = tier
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def _note(self, text: str, started: float):
+        record = _current.get()
+        if record is not None:
+            record["llm"].append({"tier": self.tier, "text": text, "seconds": round(time.monotonic() - started, 4)})
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        started = time.monotonic()
+        message = await self.inner.ainvoke(prompt, *args, **kwargs)
+        self._note(message.text, started)
+        return message
+
+    async def astream(self, prompt, *args, **kwargs):
+        started, parts = time.monotonic(), []
+        async for chunk in self.inner.astream(prompt, *args, **kwargs):
+            parts.append(chunk.text)
+            yield chunk
+        self._note("".join(parts), started)
+
+
+class ReplayModel:
+    """Answers with the recorded replies of the current workflow for its tier, in order"""
+
+    def __init__(self, tier: str, model_name: str, delay: bool):
+        self.tier = tier
+        self.model = model_name
+        self.delay = delay
+
+    def _next(self) -> Dict[str, Any]:
+        replay = _current.get()
+        replies = replay["llm"].get(self.tier) if replay else None
+        if not replies:
+            # The host now asks something it did not ask when recording: a changed decision
+            raise ValueError(f"no recorded {self.tier} model reply left")
+        return replies.pop(0)
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        reply = self._next()
+        if self.delay:
+            await asyncio.sleep(reply["seconds"])
+        return AIMessage(content=reply["text"])
+
+    async def astream(self, prompt, *args, **kwargs):
+        reply = self._next()
+        text = reply["text"]
+        pieces = [text[i:i + REPLAY_CHUNK_CHARS] for i in range(0, len(text), REPLAY_CHUNK_CHARS)] or [""]
+        for piece in pieces:
+            if self.delay:
+                await asyncio.sleep(reply["seconds"] / len(pieces))
+            yield AIMessageChunk(content=piece)
+
+
+class TrafficRecorder:
+    """Appends one compact NDJSON record per workflow: input, model replies, agent replies, decisions"""
+
+    def __init__(self, path: str = TRAFFIC_TRACE):
+        self.path = path
+        self.trace = None
+        self.started = time.monotonic()
+
+    def attach(self, host: Any) -> "TrafficRecorder":
+        self.trace = _open(self.path, "a")
+        self.trace.write(_dumps({
+            "type": "header", "version": TRACE_VERSION, "started": time.time(),
+            "agents": {name: card.model_dump(mode="json", exclude_none=True) for name, card in host.agent_cards.items()},
+        }))
+        for tier, _ in host.models.tiers:
+            host.models.models[tier] = RecordingModel(host.models.model(tier), tier)
+
+        call_agent, process_request = host._call_agent, host.process_request
+
+        async def recorded_call(agent_type, action, context="", *args, **kwargs):
+            started = time.monotonic()
+            result, data = await call_agent(agent_type, action, context, *args, **kwargs)
+            record = _current.get()
+            if record is not None:
+                record["calls"].append({
+                    "agent": agent_type, "key": step_hash(agent_type, action, context), "result": result,
+                    "data": data, "seconds": round(time.monotonic() - started, 4),
+                })
+            return result, data
+
+        async def recorded_request(user_input, ctx=None):
+            from agent_autonomous import WorkflowContext
+            ctx = ctx or WorkflowContext(user_input)
+            record = {"type": "workflow", "id": ctx.request_id, "offset": round(time.monotonic() - self.started, 4),
+                      "input": user_input, "llm": [], "calls": []}
+            token = _current.set(record)
+            started = time.monotonic()
+            try:
+                response = await process_request(user_input, ctx)
+            finally:
+                _current.reset(token)
+            record.update(decisions(ctx.workflow, ctx.history), response=response,
+                          seconds=round(time.monotonic() - started, 4))
+            self.trace.write(_dumps(record))
+            self.trace.flush()
+            return response
+
+        host._call_agent, host.process_request = recorded_call, recorded_request
+        return self
+
+    def close(self):
+        if self.trace:
+            self.trace.close()
+            self.trace = None
+
+
+def _stub_host(host: Any, header: Dict[str, Any], live: bool, delay: bool, unmatched: Dict[str, int]):
+    """Point a host at recorded model replies and, unless live, recorded agent replies"""
+    from a2a.types import AgentCard
+    host.journal = None  # Replays must not reuse or add journaled steps
+    host.plan_cache = None  # Plans must come from the recorded model replies
+    for tier, model_name in host.models.tiers:
+        host.models.models[tier] = ReplayModel(tier, model_name, delay)
+    if live:
+        return
+    for name, card in header.get("agents", {}).items():
+        host.agent_cards[name] = AgentCard.model_validate(card)
+        host.skill_index.update(name, host.agent_cards[name])
+        host.clients[name] = {}
+
+    async def replayed_call(agent_type, action, context="", *args, **kwargs):
+        replay = _current.get()
+        replies = replay["calls"].get(step_hash(agent_type, action, context)) if replay else None
+        if not replies:
+            unmatched[replay["id"] if replay else "?"] += 1
+            return f"Error: no recorded {agent_type} reply for this step", None
+        reply = replies.pop(0)
+        if delay:
+            await asyncio.sleep(reply["seconds"])
+        return reply["result"], reply["data"]
+
+    host._call_agent = replayed_call
+
+
+async def replay(path: str, speed: float = 1.0, live: bool = False, delay: bool = True,
+                 limit: Optional[int] = None) -> Dict[str, Any]:
+    """Re-issue every recorded workflow at its original offset divided by ``speed`` (0: all at once)"""
+    from agent_autonomous import AgentHost, WorkflowContext
+    header, workflows = read_trace(path)
+    workflows = workflows[:limit] if limit else workflows
+    if not workflows:
+        raise ValueError(f"No workflows recorded in {path}")
+    unmatched: Dict[str, int] = defaultdict(int)
+    latencies, changed, failed = [], [], []
+
+    async def run_one(host, record, base):
+        if speed > 0:
+            await asyncio.sleep(max(0.0, (record["offset"] - base) / speed - (time.monotonic() - started)))
+        llm = defaultdict(list)
+        for reply in record["llm"]:
+            llm[reply["tier"]].append(reply)
+        calls = defaultdict(list)
+        for reply in record["calls"]:
+            calls[reply["key"]].append(reply)
+        _current.set({"id": record["id"], "llm": llm, "calls": calls})
+        ctx = WorkflowContext(record["input"])
+        begun = time.monotonic()
+        try:
+            await host.process_request(record["input"], ctx)
+        except Exception as e:
+            failed.append({"id": record["id"], "error": repr(e)})
+            return
+        latencies.append(time.monotonic() - begun)
+        now = decisions(ctx.workflow, ctx.history)
+        before = {"plan": record["plan"], "executed": record["executed"]}
+        if now != before:
+            changed.append({"id": record["id"], "input": record["input"], "recorded": before, "replayed": now})
+
+    host = AgentHost()
+    if live:
+        await host.__aenter__()
+    try:
+        _stub_host(host, header, live, delay, unmatched)
+        base = workflows[0]["offset"]
+        started = time.monotonic()
+        await asyncio.gather(*(asyncio.create_task(run_one(host, record, base)) for record in workflows))
+        elapsed = time.monotonic() - started
+    finally:
+        if live:
+            await host.__aexit__(None, None, None)
+
+    latencies.sort()
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 4) if latencies else None
+    return {
+        "workflows": len(workflows), "completed": len(latencies), "failed": failed,
+        "seconds": round(elapsed, 3), "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_s": {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)},
+        "decisions_changed": changed, "unmatched_agent_calls": dict(unmatched),
+    }
+
+
+async def record(inputs: str, trace: str, concurrency: int = 1):
+    """Run a file of requests (one per line) through a live host while recording them"""
+    from agent_autonomous import AgentHost
+    with open(inputs) as f:
+        requests = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    semaphore = asyncio.Semaphore(concurrency)
+    # Otherwise the host attaches a second recorder from TRAFFIC_TRACE and every workflow is written twice
+    os.environ.pop("TRAFFIC_TRACE", None)
+    async with AgentHost() as host:
+        recorder = TrafficRecorder(trace).attach(host)
+
+        async def one(user_input):
+            async with semaphore:
+                await host.process_request(user_input)
+
+        try:
+            await asyncio.gather(*(one(user_input) for user_input in requests))
+        finally:
+            recorder.close()
+    print(f"Recorded {len(requests)} workflow(s) to {trace}")
+
+
+def _print_report(report: Dict[str, Any]):
+    latency = report["latency_s"]
+    print(f"\n{report['completed']}/{report['workflows']} workflows in {report['seconds']}s "
+          f"-> {report['throughput_per_s']} workflows/s")
+    print(f"latency s: p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}")
+    print(f"decisions changed: {len(report['decisions_changed'])}, failed: {len(report['failed'])}, "
+          f"unmatched agent calls: {sum(report['unmatched_agent_calls'].values())}")
+    for change in report["decisions_changed"][:10]:
+        print(f"  {change['id']} {change['input'][:60]!r}")
+        print(f"    recorded {change['recorded']}")
+        print(f"    replayed {change['replayed']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay orchestrator traffic")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record", help="run requests from a file through a live host and record them")
+    rec.add_argument("inputs", help="text file with one request per line")
+    rec.add_argument("--trace", default=TRAFFIC_TRACE or "traffic.ndjson.gz")
+    rec.add_argument("--concurrency", type=int, default=1)
+    rep = commands.add_parser("replay", help="replay a trace and report throughput, latency and decision changes")
+    rep.add_argument("trace")
+    rep.add_argument("--speed", type=float, default=1.0, help="N x the recorded pace; 0 sends everything at once")
+    rep.add_argument("--live", action="store_true", help="call the live local agents instead of recorded replies")
+    rep.add_argument("--no-delay", action="store_true", help="return recorded replies without their latency")
+    rep.add_argument("--limit", type=int, help="replay only the first N workflows")
+    rep.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        asyncio.run(record(args.inputs, args.trace, args.concurrency))
+        return
+    report = asyncio.run(replay(args.trace, args.speed, args.live, not args.no_delay, args.limit))
+    _print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
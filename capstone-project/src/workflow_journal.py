@@ -0,0 +1,110 @@
+"""Workflow journal - append-only SQLite log of plans and step results for crash recovery"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+# "" disables the journal
+WORKFLOW_JOURNAL = os.environ.get(
+    "WORKFLOW_JOURNAL", os.path.expanduser("~/.cache/unie-aiops/workflow_journal.db")
+)
+
+
+def step_hash(agent: str, action: str, context: str) -> str:
+    """Identity of a step's input: the same agent, action and upstream context give the same result"""
+    return hashlib.sha256(json.dumps([agent, action, context]).encode()).hexdigest()
+
+
+def idempotency_key(request_id: str, input_hash: str) -> str:
+    """Key a mutating step sends along, stable across retries of the same workflow step"""
+    return hashlib.sha256(f"{request_id}:{input_hash}".encode()).hexdigest()[:32]
+
+
+class JournalState:
+    """What an earlier run of a workflow left behind"""
+
+    def __init__(self, plan: Optional[List[Dict[str, Any]]] = None,
+                 results: Optional[Dict[str, Tuple[str, Optional[Dict[str, Any]]]]] = None):
+        self.plan = plan  # Only set once planning completed
+        self.results = results or {}  # input hash -> (result text, data)
+
+
+class WorkflowJournal:
+    """Events per request id: started, plan, step_started, step_done, finished.
+
+    Rows are only ever appended; a workflow with a ``started`` but no ``finished``
+    event was interrupted and can be resumed with the same request id.
+    """
+
+    def __init__(self, path: str = WORKFLOW_JOURNAL):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, request_id TEXT NOT NULL, kind TEXT NOT NULL, "
+            "step INTEGER, input_hash TEXT, payload TEXT, created REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS events_request ON events (request_id, seq)")
+
+    @classmethod
+    def from_env(cls) -> Optional["WorkflowJournal"]:
+        return cls(WORKFLOW_JOURNAL) if WORKFLOW_JOURNAL else None
+
+    def _append(self, request_id: str, kind: str, step: Optional[int] = None,
+                input_hash: Optional[str] = None, payload: Any = None):
+        self.db.execute(
+            "INSERT INTO events (request_id, kind, step, input_hash, payload, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (request_id, kind, step, input_hash, None if payload is None else json.dumps(payload, default=str),
+             time.time()),
+        )
+
+    def begin(self, request_id: str, user_input: str, incident_key: Optional[str] = None) -> JournalState:
+        """Record a (re)start and return the plan and step results of earlier attempts
+
+        ``incident_key`` is what the orchestrator processes are partitioned by, so
+        a restarted process resumes only the workflows it owned.
+        """
+        state = JournalState()
+        rows = self.db.execute(
+            "SELECT kind, input_hash, payload FROM events WHERE request_id = ? AND kind IN ('plan', 'step_done') "
+            "ORDER BY seq", (request_id,)
+        )
+        for kind, input_hash, payload in rows:
+            if kind == "plan":
+                state.plan = json.loads(payload)
+            else:
+                done = json.loads(payload)
+                state.results[input_hash] = (done["result"], done["data"])
+        self._append(request_id, "started", payload={"input": user_input, "incident_key": incident_key})
+        return state
+
+    def record_plan(self, request_id: str, workflow: List[Dict[str, Any]]):
+        self._append(request_id, "plan", payload=workflow)
+
+    def step_started(self, request_id: str, step: int, input_hash: str, agent: str, key: Optional[str] = None):
+        self._append(request_id, "step_started", step, input_hash, {"agent": agent, "idempotency_key": key})
+
+    def step_done(self, request_id: str, step: int, input_hash: str, result: str, data: Optional[Dict[str, Any]]):
+        self._append(request_id, "step_done", step, input_hash, {"result": result, "data": data})
+
+    def finish(self, request_id: str, status: str = "done"):
+        self._append(request_id, "finished", payload={"status": status})
+
+    def incomplete(self, limit: int = 100) -> List[Tuple[str, str, Optional[str]]]:
+        """(request id, user input, incident key) of workflows that started but never finished, oldest first"""
+        rows = self.db.execute(
+            "SELECT s.request_id, s.payload FROM events s "
+            "WHERE s.kind = 'started' AND s.seq = (SELECT MAX(seq) FROM events WHERE request_id = s.request_id "
+            "AND kind = 'started') "
+            "AND NOT EXISTS (SELECT 1 FROM events f WHERE f.request_id = s.request_id AND f.kind = 'finished' "
+            "AND f.seq > s.seq) "
+            "ORDER BY s.seq LIMIT ?", (limit,)
+        )
+        started = [(request_id, json.loads(payload)) for request_id, payload in rows]
+        return [(request_id, payload["input"], payload.get("incident_key")) for request_id, payload in started]
@@ -0,0 +1,49 @@
+"""Micro-benchmark cases for the ticket stores (insert, list, search, change log)
+
+The harness that runs them and keeps baselines is the capstone's benchmarks.py:
+
+    cd ../capstone-project && uv run python src/benchmarks.py --suite tickets --save
+"""
+
+import os
+import tempfile
+from itertools import count
+
+from ticket_store import SqliteTicketStore, TicketStore
+
+# Tickets in the table before measuring
+TICKETS = int(os.environ.get('TICKET_BENCH_TICKETS', '50000'))
+MESSAGES = [
+    'Pod {} in CrashLoopBackOff in namespace payments',
+    'Disk pressure on node-{}',
+    'Deployment web-{} has 0/3 replicas available',
+    'Certificate for ingress {} expires in 7 days',
+]
+
+
+def filled(store, n=TICKETS):
+    for i in range(n):
+        store.add(MESSAGES[i % len(MESSAGES)].format(i % 500), created=1_700_000_000 + i)
+    return store
+
+
+def benchmarks(n=TICKETS):
+    """name -> zero-argument callable"""
+    directory = tempfile.mkdtemp()
+    memory = filled(TicketStore(), n)
+    sqlite = filled(SqliteTicketStore(os.path.join(directory, 'tickets.db')), n)
+    keys = count()
+    result = {}
+    for label, store, scratch in (('memory', memory, TicketStore()),
+                                  ('sqlite', sqlite, SqliteTicketStore(os.path.join(directory, 'scratch.db')))):
+        # Inserts go to their own store so the read benchmarks keep a table of n tickets
+        result.update({
+            f'{label}: insert': lambda scratch=scratch: scratch.add('Pod web-1 in CrashLoopBackOff'),
+            f'{label}: insert with Idempotency-Key':
+                lambda scratch=scratch: scratch.add_once(f'key-{next(keys)}', 'Pod web-1 in CrashLoopBackOff'),
+            f'{label}: list {n:,} as dicts': store.to_dicts,
+            f'{label}: list since last 20': lambda store=store: [t.to_dict() for t in store.since(store.last_id() - 20)],
+            f'{label}: search {n:,}': lambda store=store: store.search('disk pressure'),
+            f'{label}: changes since last 100': lambda store=store: store.changes_since(store.last_seq() - 100),
+        })
+    return result
@@ -0,0 +1,61 @@
+"""Load test for the ticketing server: concurrent clients creating and listing tickets
+
+Run it against each server to compare, e.g.:
+    python src/ticketing_server.py                                  # Flask dev server
+    TICKET_DB=/tmp/tickets.db python src/ticketing_asgi.py --workers 4
+    python src/ticket_loadtest.py --url http://localhost:5000 --clients 50 --requests 5000
+"""
+
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+
+async def client(http, url, count, write_ratio, latencies, errors):
+    for i in range(count):
+        started = time.perf_counter()
+        try:
+            # Every n-th request creates a ticket, the rest list them (the agents' mix)
+            if i % write_ratio == 0:
+                response = await http.post(f"{url}/api/tickets", json={'message': f"load test ticket {i}"})
+            else:
+                response = await http.get(f"{url}/api/tickets")
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(url, clients, total, write_ratio, seed):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as http:
+        # Pre-populate so GET responses have a realistic size
+        for i in range(seed):
+            await http.post(f"{url}/api/tickets", json={'message': f"seed ticket {i}"})
+        latencies, errors = [], []
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            client(http, url, total // clients, write_ratio, latencies, errors) for _ in range(clients)
+        ))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    quantile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f"{len(latencies)} ok, {len(errors)} errors in {elapsed:.1f}s -> {len(latencies) / elapsed:.0f} req/s")
+    if latencies:
+        print(f"latency ms: p50 {quantile(0.5):.1f}  p95 {quantile(0.95):.1f}  p99 {quantile(0.99):.1f}"
+              f"  mean {statistics.mean(latencies) * 1000:.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ticketing server load test')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--write-ratio', type=int, default=10, help='one POST every n requests')
+    parser.add_argument('--seed', type=int, default=200, help='tickets created before measuring')
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.clients, args.requests, args.write_ratio, args.seed))
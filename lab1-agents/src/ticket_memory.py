@@ -0,0 +1,54 @@
+"""Compare the memory held by 100k tickets as dicts and in the TicketStore"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from ticket_store import TicketStore
+
+# Usage: ticket_memory.py [count] [unique]
+COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+# Tickets opened by alerts mostly repeat a handful of messages; "unique" makes every one distinct
+DISTINCT = COUNT if 'unique' in sys.argv else 20
+MESSAGES = [f"Pod crash-looping in namespace team-{i}" for i in range(DISTINCT)]
+
+
+def fresh_message(i):
+    # A new string object per ticket, as decoded from each request body, so its bytes are
+    # allocated inside the measured section rather than shared with MESSAGES
+    return MESSAGES[i % len(MESSAGES)].encode().decode()
+
+
+def as_dicts():
+    now = time.time()
+    return [{
+        'id': i + 1,
+        'message': fresh_message(i),
+        'timestamp': datetime.fromtimestamp(now + i).strftime('%Y-%m-%d %H:%M:%S')
+    } for i in range(COUNT)]
+
+
+def as_store():
+    now = time.time()
+    store = TicketStore()
+    for i in range(COUNT):
+        store.add(fresh_message(i), now + i)
+    return store
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    tickets = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tickets
+    return size
+
+
+if __name__ == '__main__':
+    for name, build in (('list of dicts', as_dicts), ('TicketStore', as_store)):
+        size = measure(build)
+        print(f"{name:<15} {size / 2 ** 20:6.1f} MiB per {COUNT:,} tickets ({size / COUNT:.0f} bytes/ticket)")
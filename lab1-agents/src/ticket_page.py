@@ -0,0 +1,56 @@
+"""HTML page of the ticketing servers, a Jinja2 template shared by the Flask and ASGI apps"""
+
+HTML_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Ticketing System</title>
+    <style>
+        body { font-family: Arial; margin: 20px; }
+        .ticket { border: 1px solid #ccc; padding: 10px; margin: 10px 0; }
+        .message { background: #f0f0f0; padding: 5px; margin: 5px 0; }
+    </style>
+</head>
+<body>
+    <h1>Ticketing System</h1>
+    <div id="tickets">
+        {% for ticket in tickets %}
+        <div class="ticket">
+            <strong>Ticket #{{ ticket.id }}</strong> - {{ ticket.timestamp }}<br>
+            <div class="message">{{ ticket.message }}</div>
+        </div>
+        {% endfor %}
+    </div>
+    <script>
+        // Only tickets newer than lastId are fetched and appended; the page is never reloaded
+        let lastId = {{ last_id }};
+        const list = document.getElementById('tickets');
+
+        function append(ticket) {
+            if (ticket.id <= lastId) return;
+            const div = document.createElement('div');
+            div.className = 'ticket';
+            const title = document.createElement('strong');
+            title.textContent = `Ticket #${ticket.id}`;
+            const message = document.createElement('div');
+            message.className = 'message';
+            message.textContent = ticket.message;
+            div.append(title, ` - ${ticket.timestamp}`, document.createElement('br'), message);
+            list.append(div);
+            lastId = ticket.id;
+        }
+
+        {% if stream %}
+        // Server-Sent Events; on reconnect the browser resumes from the Last-Event-ID
+        const source = new EventSource(`/api/tickets/stream?since=${lastId}`);
+        source.addEventListener('ticket', (event) => append(JSON.parse(event.data)));
+        {% else %}
+        setInterval(async () => {
+            const response = await fetch(`/api/tickets?since=${lastId}`);
+            if (response.ok) (await response.json()).forEach(append);
+        }, 5000);
+        {% endif %}
+    </script>
+</body>
+</html>
+"""
@@ -0,0 +1,235 @@
+"""Compact ticket storage: one array per field instead of one dict per ticket"""
+
+import sys
+import json
+import time
+import sqlite3
+from array import array
+from datetime import datetime
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Changes returned by one changes_since() call
+CHANGES_PAGE = 500
+
+
+class _TicketFields:
+    """Wire format shared by every ticket representation"""
+
+    __slots__ = ()
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.created).strftime(TIMESTAMP_FORMAT)
+
+    def to_dict(self):
+        return {'id': self.id, 'message': self.message, 'timestamp': self.timestamp}
+
+
+class Ticket(_TicketFields):
+    """View of one ticket in a TicketStore; the dict is only built when it is sent over the wire"""
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def id(self):
+        return self.index + 1
+
+    @property
+    def message(self):
+        return self.store.messages[self.index]
+
+    @property
+    def created(self):
+        """Creation time as epoch seconds"""
+        return self.store.created[self.index]
+
+
+class TicketRecord(_TicketFields):
+    """Ticket read back from the SQLite store"""
+
+    __slots__ = ('id', 'message', 'created')
+
+    def __init__(self, id, message, created):
+        self.id = id
+        self.message = message
+        self.created = created
+
+
+class NdjsonSink:
+    """Appends every change to a local file, one JSON object per line, for exporters"""
+
+    def __init__(self, path):
+        self.file = open(path, 'a', buffering=1)
+
+    def write(self, change):
+        self.file.write(json.dumps(change, separators=(',', ':')) + '\n')
+
+
+def _change(seq, op, ticket):
+    return {'seq': seq, 'op': op, 'ticket': ticket.to_dict()}
+
+
+class TicketStore:
+    """Append-only ticket columns: interned messages and int64 epoch timestamps.
+
+    Ticket ids are positions (id = index + 1), so they need no storage at all.
+    Tickets are only ever created, so the change log is the tickets themselves:
+    change seq n is the creation of ticket n and costs no extra storage.
+    """
+
+    def __init__(self, sink=None):
+        self.messages = []
+        self.created = array('q')
+        self.idempotency_keys = {}  # Idempotency-Key -> ticket id
+        self.sink = sink
+
+    def add(self, message, created=None):
+        # Alert-generated tickets repeat the same text; interning stores it once
+        self.messages.append(sys.intern(message))
+        self.created.append(int(time.time() if created is None else created))
+        ticket = Ticket(self, len(self.messages) - 1)
+        if self.sink:
+            self.sink.write(_change(ticket.id, 'created', ticket))
+        return ticket
+
+    def add_once(self, key, message, created=None):
+        """(ticket, True) for a new key; (the ticket first created with it, False) for a retry"""
+        ticket_id = self.idempotency_keys.get(key)
+        if ticket_id is not None:
+            return self.get(ticket_id), False
+        ticket = self.add(message, created)
+        self.idempotency_keys[key] = ticket.id
+        return ticket, True
+
+    def last_seq(self):
+        return len(self.messages)
+
+    def changes_since(self, seq, limit=CHANGES_PAGE):
+        """Changes with a sequence number above seq, oldest first"""
+        start = max(seq, 0)
+        stop = min(len(self.messages), start + limit)
+        return [_change(index + 1, 'created', Ticket(self, index)) for index in range(start, stop)]
+
+    def get(self, ticket_id):
+        if 1 <= ticket_id <= len(self.messages):
+            return Ticket(self, ticket_id - 1)
+        return None
+
+    def __len__(self):
+        return len(self.messages)
+
+    def last_id(self):
+        """Id of the newest ticket; tickets are append-only, so it versions the whole list"""
+        return len(self.messages)
+
+    def __iter__(self):
+        return (Ticket(self, index) for index in range(len(self.messages)))
+
+    def since(self, ticket_id):
+        """Tickets newer than ticket_id, the cursor incremental readers keep"""
+        return (Ticket(self, index) for index in range(max(ticket_id, 0), len(self.messages)))
+
+    def search(self, term):
+        """Tickets whose message contains term, ignoring case"""
+        term = term.lower()
+        return [Ticket(self, index) for index, message in enumerate(self.messages) if term in message.lower()]
+
+    def to_dicts(self):
+        return [ticket.to_dict() for ticket in self]
+
+
+class SqliteTicketStore:
+    """Same interface backed by a SQLite file, so several server processes share the tickets"""
+
+    def __init__(self, path, sink=None):
+        self.sink = sink
+        self.db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        # WAL lets readers in other workers proceed while one worker writes
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS tickets ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, message TEXT NOT NULL, created INTEGER NOT NULL)'
+        )
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS changes ('
+            'seq INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT NOT NULL, ticket_id INTEGER NOT NULL)'
+        )
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS idempotency_keys (key TEXT PRIMARY KEY, ticket_id INTEGER NOT NULL)'
+        )
+
+    def _insert(self, message, created):
+        cursor = self.db.execute('INSERT INTO tickets (message, created) VALUES (?, ?)', (message, created))
+        ticket = TicketRecord(cursor.lastrowid, message, created)
+        seq = self.db.execute('INSERT INTO changes (op, ticket_id) VALUES (?, ?)', ('created', ticket.id)).lastrowid
+        return ticket, seq
+
+    def add(self, message, created=None):
+        created = int(time.time() if created is None else created)
+        # The ticket and its change log entry are committed together
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            ticket, seq = self._insert(message, created)
+        if self.sink:
+            self.sink.write(_change(seq, 'created', ticket))
+        return ticket
+
+    def add_once(self, key, message, created=None):
+        created = int(time.time() if created is None else created)
+        # Checked and claimed in one transaction, so concurrent retries in other workers can't both insert
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            row = self.db.execute('SELECT ticket_id FROM idempotency_keys WHERE key = ?', (key,)).fetchone()
+            if row:
+                ticket = self.get(row[0])
+            else:
+                ticket, seq = self._insert(message, created)
+                self.db.execute('INSERT INTO idempotency_keys (key, ticket_id) VALUES (?, ?)', (key, ticket.id))
+        if row:
+            return ticket, False
+        if self.sink:
+            self.sink.write(_change(seq, 'created', ticket))
+        return ticket, True
+
+    def last_seq(self):
+        return self.db.execute('SELECT COALESCE(MAX(seq), 0) FROM changes').fetchone()[0]
+
+    def changes_since(self, seq, limit=CHANGES_PAGE):
+        rows = self.db.execute(
+            'SELECT c.seq, c.op, t.id, t.message, t.created FROM changes c JOIN tickets t ON t.id = c.ticket_id '
+            'WHERE c.seq > ? ORDER BY c.seq LIMIT ?', (seq, limit)
+        )
+        return [_change(row[0], row[1], TicketRecord(*row[2:])) for row in rows]
+
+    def get(self, ticket_id):
+        row = self.db.execute('SELECT id, message, created FROM tickets WHERE id = ?', (ticket_id,)).fetchone()
+        return TicketRecord(*row) if row else None
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM tickets').fetchone()[0]
+
+    def last_id(self):
+        return self.db.execute('SELECT COALESCE(MAX(id), 0) FROM tickets').fetchone()[0]
+
+    def __iter__(self):
+        for row in self.db.execute('SELECT id, message, created FROM tickets ORDER BY id'):
+            yield TicketRecord(*row)
+
+    def since(self, ticket_id):
+        rows = self.db.execute('SELECT id, message, created FROM tickets WHERE id > ? ORDER BY id', (ticket_id,))
+        return [TicketRecord(*row) for row in rows]
+
+    def search(self, term):
+        escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        rows = self.db.execute(
+            "SELECT id, message, created FROM tickets WHERE message LIKE ? ESCAPE '\\' ORDER BY id", (f'%{escaped}%',)
+        )
+        return [TicketRecord(*row) for row in rows]
+
+    def to_dicts(self):
+        return [ticket.to_dict() for ticket in self]
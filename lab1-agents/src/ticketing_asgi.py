@@ -0,0 +1,214 @@
+"""ASGI ticketing server - the /api/tickets API of ticketing_server.py for uvicorn"""
+
+import os
+import asyncio
+import argparse
+import contextlib
+
+import orjson
+import uvicorn
+from jinja2 import Template
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from ticket_page import HTML_TEMPLATE
+from ticket_store import CHANGES_PAGE, NdjsonSink, SqliteTicketStore, TicketStore
+
+# SQLite file shared by all workers; without it tickets live in one process's memory
+TICKET_DB = os.environ.get('TICKET_DB')
+# Optional NDJSON file every ticket change is appended to
+TICKET_CHANGES_FILE = os.environ.get('TICKET_CHANGES_FILE')
+# Set TICKET_HTML=0 to serve only the API
+TICKET_HTML = os.environ.get('TICKET_HTML', '1') != '0'
+# Seconds between checks for tickets written by other workers (SQLite store only)
+TICKET_FEED_POLL = float(os.environ.get('TICKET_FEED_POLL', '1'))
+# Comment frames keep idle streams open through proxies
+KEEPALIVE_SECONDS = 15
+# Longest a long-poll for changes may wait
+MAX_WAIT_SECONDS = 30
+
+sink = NdjsonSink(TICKET_CHANGES_FILE) if TICKET_CHANGES_FILE else None
+tickets = SqliteTicketStore(TICKET_DB, sink) if TICKET_DB else TicketStore(sink)
+page = Template(HTML_TEMPLATE)
+# Serialised ticket list and the last ticket id it includes; rebuilt only after new tickets
+listing = {'last_id': -1, 'body': b'[]'}
+
+
+class TicketFeed:
+    """Fans new tickets out to every open event stream of this process.
+
+    Each batch of new tickets is encoded once and shared by all subscribers that were
+    up to date, so the work per change does not grow with the number of viewers.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.last_id = store.last_id()
+        self.batch_from = self.last_id
+        self.batch = b''  # SSE frames for tickets in (batch_from, last_id]
+        self.changed = asyncio.Event()
+
+    @staticmethod
+    def frames(new_tickets):
+        return b''.join(
+            b'id: %d\nevent: ticket\ndata: %s\n\n' % (ticket.id, orjson.dumps(ticket.to_dict()))
+            for ticket in new_tickets
+        )
+
+    def publish(self):
+        """Pick up tickets added since the last batch and wake the subscribers"""
+        last_id = self.store.last_id()
+        if last_id == self.last_id:
+            return
+        self.batch = self.frames(self.store.since(self.last_id))
+        self.batch_from, self.last_id = self.last_id, last_id
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(TICKET_FEED_POLL)
+            self.publish()
+
+    async def stream(self, cursor):
+        """SSE body for one subscriber whose newest known ticket is cursor"""
+        while True:
+            if cursor < self.last_id:
+                # Up-to-date subscribers share the batch; late ones catch up from the store
+                chunk = self.batch if cursor == self.batch_from else self.frames(self.store.since(cursor))
+                cursor = self.last_id
+                yield chunk
+                continue
+            try:
+                await asyncio.wait_for(self.changed.wait(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b': keepalive\n\n'
+
+
+feed = TicketFeed(tickets)
+
+
+class ORJSONResponse(Response):
+    media_type = 'application/json'
+
+    def render(self, content):
+        return orjson.dumps(content)
+
+
+async def index(request):
+    current = list(tickets)
+    last_id = current[-1].id if current else 0
+    return HTMLResponse(page.render(tickets=current, last_id=last_id, stream=True))
+
+
+async def create_ticket(request):
+    body = await request.body()
+    try:
+        data = orjson.loads(body) if body else {}
+    except orjson.JSONDecodeError:
+        return ORJSONResponse({'error': 'invalid JSON'}, status_code=400)
+    message = data.get('message', 'No message') if isinstance(data, dict) else None
+    if not isinstance(message, str):
+        return ORJSONResponse({'error': 'body must be a JSON object with a string message'}, status_code=400)
+    # A retried request with the same Idempotency-Key gets the ticket it created the first time
+    key = request.headers.get('idempotency-key')
+    ticket, created = tickets.add_once(key, message) if key else (tickets.add(message), True)
+    if not created:
+        return ORJSONResponse(ticket.to_dict(), headers={'Idempotent-Replayed': 'true'})
+    print(f"New ticket: {ticket.message}")
+    feed.publish()
+    return ORJSONResponse(ticket.to_dict())
+
+
+def _cursor(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def get_tickets(request):
+    # ?since=<id> returns only newer tickets, for incremental readers
+    since = _cursor(request.query_params.get('since'))
+    if since is not None:
+        return ORJSONResponse([ticket.to_dict() for ticket in tickets.since(since)])
+    # ?q=<term> returns the tickets whose message contains the term
+    query = request.query_params.get('q')
+    if query:
+        return ORJSONResponse([ticket.to_dict() for ticket in tickets.search(query)])
+    last_id = tickets.last_id()
+    if listing['last_id'] != last_id:
+        listing['body'] = orjson.dumps(tickets.to_dicts())
+        listing['last_id'] = last_id
+    return Response(listing['body'], media_type='application/json')
+
+
+async def get_changes(request):
+    """GET /api/tickets/changes?since=<seq>&limit=<n>&wait=<seconds>
+
+    Changes after seq, oldest first. With wait, an empty answer is held until a change
+    arrives or the wait runs out (long-poll). Clients pass the returned last_seq next time.
+    """
+    since = _cursor(request.query_params.get('since')) or 0
+    # 1..CHANGES_PAGE; SQLite would read a negative LIMIT as no limit at all
+    limit = max(1, min(_cursor(request.query_params.get('limit')) or CHANGES_PAGE, CHANGES_PAGE))
+    try:
+        wait = min(float(request.query_params.get('wait', 0)), MAX_WAIT_SECONDS)
+    except ValueError:
+        return ORJSONResponse({'error': 'wait must be a number of seconds'}, status_code=400)
+    changed = feed.changed  # Taken before reading so a change in between still wakes us
+    changes = tickets.changes_since(since, limit)
+    if not changes and wait > 0:
+        try:
+            await asyncio.wait_for(changed.wait(), wait)
+        except asyncio.TimeoutError:
+            pass
+        changes = tickets.changes_since(since, limit)
+    return ORJSONResponse({'changes': changes, 'last_seq': changes[-1]['seq'] if changes else since})
+
+
+async def stream_tickets(request):
+    """Server-Sent Events: one "ticket" event per ticket newer than the cursor"""
+    # EventSource sends Last-Event-ID when it reconnects
+    cursor = _cursor(request.headers.get('last-event-id'))
+    if cursor is None:
+        cursor = _cursor(request.query_params.get('since'))
+    if cursor is None:
+        cursor = feed.last_id
+    return StreamingResponse(feed.stream(cursor), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Other workers' tickets only reach this process through the shared SQLite file
+    watcher = asyncio.create_task(feed.watch()) if TICKET_DB else None
+    try:
+        yield
+    finally:
+        if watcher:
+            watcher.cancel()
+
+
+routes = [
+    Route('/api/tickets', create_ticket, methods=['POST']),
+    Route('/api/tickets', get_tickets, methods=['GET']),
+    Route('/api/tickets/stream', stream_tickets, methods=['GET']),
+    Route('/api/tickets/changes', get_changes, methods=['GET']),
+]
+if TICKET_HTML:
+    routes.append(Route('/', index))
+
+app = Starlette(routes=routes, lifespan=lifespan)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ASGI ticketing server')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('TICKET_WORKERS', '1')))
+    args = parser.parse_args()
+    if args.workers > 1 and not TICKET_DB:
+        parser.error('more than one worker needs TICKET_DB so the workers share their tickets')
+    uvicorn.run('ticketing_asgi:app', host='0.0.0.0', port=args.port, workers=args.workers,
+                log_level='warning', app_dir=os.path.dirname(os.path.abspath(__file__)))
@@ -1,57 +1,63 @@
 from flask import Flask, request, jsonify, render_template_string
+import os
 import json
-from datetime import datetime
+import threading
+
+from ticket_page import HTML_TEMPLATE
+from ticket_store import CHANGES_PAGE, NdjsonSink, TicketStore
 
 app = Flask(__name__)
-tickets = []
-
-HTML_TEMPLATE = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Ticketing System</title>
-    <style>
-        body { font-family: Arial; margin: 20px; }
-        .ticket { border: 1px solid #ccc; padding: 10px; margin: 10px 0; }
-        .message { background: #f0f0f0; padding: 5px; margin: 5px 0; }
-    </style>
-</head>
-<body>
-    <h1>Ticketing System</h1>
-    <div id="tickets">
-        {% for ticket in tickets %}
-        <div class="ticket">
-            <strong>Ticket #{{ ticket.id }}</strong> - {{ ticket.timestamp }}<br>
-            <div class="message">{{ ticket.message }}</div>
-        </div>
-        {% endfor %}
-    </div>
-    <script>
-        setInterval(() => location.reload(), 5000);
-    </script>
-</body>
-</html>
-"""
+# Optional NDJSON file every ticket change is appended to
+changes_file = os.environ.get('TICKET_CHANGES_FILE')
+tickets = TicketStore(NdjsonSink(changes_file) if changes_file else None)
+# Wakes long-polling change readers
+changed = threading.Condition()
+
 
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE, tickets=tickets)
+    return render_template_string(HTML_TEMPLATE, tickets=tickets, last_id=tickets.last_id(), stream=False)
 
 @app.route('/api/tickets', methods=['POST'])
 def create_ticket():
-    data = request.json
-    ticket = {
-        'id': len(tickets) + 1,
-        'message': data.get('message', 'No message'),
-        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    }
-    tickets.append(ticket)
-    print(f"New ticket: {ticket['message']}")
-    return jsonify(ticket)
+    data = request.get_json(silent=True)
+    message = data.get('message', 'No message') if isinstance(data, dict) else None
+    if not isinstance(message, str):
+        return jsonify({'error': 'body must be a JSON object with a string message'}), 400
+    # A retried request with the same Idempotency-Key gets the ticket it created the first time
+    key = request.headers.get('Idempotency-Key')
+    with changed:
+        ticket, created = tickets.add_once(key, message) if key else (tickets.add(message), True)
+        changed.notify_all()
+    if not created:
+        return jsonify(ticket.to_dict()), 200, {'Idempotent-Replayed': 'true'}
+    print(f"New ticket: {ticket.message}")
+    return jsonify(ticket.to_dict())
 
 @app.route('/api/tickets', methods=['GET'])
 def get_tickets():
-    return jsonify(tickets)
+    # ?since=<id> returns only newer tickets, for incremental readers
+    since = request.args.get('since', type=int)
+    if since is not None:
+        return jsonify([ticket.to_dict() for ticket in tickets.since(since)])
+    # ?q=<term> returns the tickets whose message contains the term
+    query = request.args.get('q')
+    if query:
+        return jsonify([ticket.to_dict() for ticket in tickets.search(query)])
+    return jsonify(tickets.to_dicts())
+
+@app.route('/api/tickets/changes', methods=['GET'])
+def get_changes():
+    # Changes after ?since=<seq>; ?wait=<seconds> holds an empty answer until one arrives
+    since = request.args.get('since', 0, type=int)
+    # 1..CHANGES_PAGE; SQLite would read a negative LIMIT as no limit at all
+    limit = max(1, min(request.args.get('limit', CHANGES_PAGE, type=int), CHANGES_PAGE))
+    wait = min(request.args.get('wait', 0, type=float), 30)
+    if wait > 0:
+        with changed:
+            changed.wait_for(lambda: tickets.last_seq() > since, timeout=wait)
+    changes = tickets.changes_since(since, limit)
+    return jsonify({'changes': changes, 'last_seq': changes[-1]['seq'] if changes else since})
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file